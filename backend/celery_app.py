@@ -22,4 +22,23 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+# 재생목록/채널 수집은 확장·다운로드에 수 시간이 걸릴 수 있어 전용 큐로 보낸다. 기본 워커(-P solo)가
+# 묶음 전체를 붙잡고 있으면 항목별로 투입된 전사 작업이 다운로드가 다 끝날 때까지 시작되지 못하므로,
+# 수집 큐는 두 번째 워커(run_celery_ingest_win.ps1)가 소비한다
+INGEST_QUEUE = os.getenv("CELERY_INGEST_QUEUE", "ingest")
+celery_app.conf.task_routes = {
+    "tasks.async_transcription.ingest_playlist_async": {"queue": INGEST_QUEUE},
+}
 
+# 저장소 보존 정리 주기 실행 (celery -A celery_app.celery_app beat). beat 없이도 전사 작업 종료 시
+# 같은 간격으로 한 번씩 투입되므로 필수는 아니다 (utils.lifecycle.claim_sweep_slot)
+try:
+    _sweep_interval = max(60.0, float(os.getenv("LIFECYCLE_INTERVAL_MIN", "30")) * 60)
+except Exception:
+    _sweep_interval = 1800.0
+celery_app.conf.beat_schedule = {
+    "storage-lifecycle-sweep": {
+        "task": "tasks.async_transcription.storage_lifecycle_sweep",
+        "schedule": _sweep_interval,
+    },
+}
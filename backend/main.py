@@ -1,23 +1,41 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 import os
 import shutil
 import uuid
-from io import BytesIO
+from io import StringIO
 from dotenv import load_dotenv
 import csv
 import json
 import re
+import hashlib
+import base64
+import itertools
 
 # 내부 모듈
-from utils.validator import allowed_file, validate_file_size
-from tasks.video_processing import extract_audio, convert_wav_to_mp3
-from tasks.transcription import TranscriptionService
-from celery_app import celery_app
-from tasks.async_transcription import transcribe_video_async, transcribe_url_async, download_url_async
-from tasks.url_download import download_media_via_ytdlp
+from utils.validator import allowed_file, validate_file_size, MAX_FILE_SIZE
+from tasks.video_processing import load_audio_pcm, extract_audio_from_stream
+from tasks.job_stages import process_audio
+from tasks.model_pool import get_model_pool, get_transcription_service
+from celery_app import celery_app, REDIS_URL
+from tasks.async_transcription import transcribe_video_async, transcribe_url_async, download_url_async, ingest_playlist_async
+from tasks.async_transcription import storage_lifecycle_sweep
+from tasks.async_transcription import lookup_cached_result, store_cached_result
+from tasks.url_download import download_media_via_ytdlp, canonical_media_key
+from tasks.result_cache import get_result_cache, hash_audio
+from utils.progress import channel_name, segments_key, last_key
+from utils.task_status import bulk_status, fetch_task_payloads
+from utils.admission import get_sync_executor, Saturated
+from utils.resumable import ResumableUploads, UploadError
+from utils.job_store import get_job_store, load_job_meta, record_job
+from utils.artifacts import discard_artifact, record_artifact, resolve_output, source_path, touch_artifact, upload_file
+from utils.lifecycle import relieve_disk_pressure, sweep_storage
+from utils.segment_cache import get_segment_cache
+from utils.exports import ExportUnavailable, export_line, render_docx, render_pdf, get_export_cache
+from utils.exports import spool_chunks, stream_zip
 
 
 load_dotenv()
@@ -43,6 +61,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 재개 가능한 업로드/혼잡/조건부 상태 조회 응답 헤더를 브라우저에서 읽을 수 있도록 노출
+    expose_headers=["Upload-Offset", "Upload-Length", "Upload-Task-Id", "Upload-Job-Status", "Location",
+                    "Tus-Resumable", "Retry-After", "ETag"],
 )
 
 UPLOAD_FOLDER = "uploads"
@@ -51,10 +72,52 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 app.mount("/uploads", StaticFiles(directory=UPLOAD_FOLDER), name="uploads")
-app.mount("/outputs", StaticFiles(directory=OUTPUT_FOLDER), name="outputs")
 
 
-transcription_service = TranscriptionService(model_size=os.getenv("WHISPER_MODEL_SIZE", "base"))
+@app.get("/outputs/{name}")
+def serve_output(name: str):
+    """논리 경로 outputs/{job_id}.{ext} → 팬아웃 디렉터리의 실제 파일 (디렉터리 나열 없음)."""
+    job_id, ext = os.path.splitext(os.path.basename(name))
+    if not job_id or not ext:
+        raise HTTPException(status_code=404, detail="파일이 없습니다")
+    path = resolve_output(OUTPUT_FOLDER, job_id, ext.lstrip("."))
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="파일이 없습니다")
+    touch_artifact(job_id, ext.lstrip("."))
+    return FileResponse(path)
+
+
+# 기본 모델을 풀에 미리 적재 (참조는 풀만 보관해야 축출 시 메모리가 실제로 풀림)
+get_transcription_service(os.getenv("WHISPER_MODEL_SIZE", "base"))
+
+
+def save_upload(file: UploadFile, path: str) -> str:
+    """업로드 본문을 저장하면서 sha256을 함께 계산 (결과 캐시 별칭용)."""
+    h = hashlib.sha256()
+    with open(path, "wb") as f:
+        while True:
+            chunk = file.file.read(1024 * 1024)
+            if not chunk:
+                break
+            h.update(chunk)
+            f.write(chunk)
+    return h.hexdigest()
+
+
+def write_meta(job_id: str, payload: dict) -> None:
+    # 작업 저장소에 UPSERT (outputs/{job_id}.json은 더 이상 쓰지 않고 읽기 폴백만 유지)
+    record_job(job_id, **{k: v for k, v in payload.items() if k != "job_id"})
+
+
+async def run_sync_job(fn, *args):
+    try:
+        return await get_sync_executor().run(fn, *args)
+    except Saturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="처리 중인 요청이 많습니다. 잠시 후 다시 시도하거나 비동기 전사를 사용하세요",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 
 @app.post("/upload")
@@ -83,110 +146,481 @@ async def transcribe_video(file: UploadFile = File(...), language: str = Form("k
     # auto는 Whisper 자동 감지(None)로 위임
     effective_lang = None if language_code == "auto" else language_code
 
-    job_id = str(uuid.uuid4())
+    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
+    # 디코딩/전사는 이벤트 루프 밖 전용 실행기에서 (포화 시 503 + Retry-After)
+    return await run_sync_job(transcribe_upload_job, file, effective_lang, do_diarize, model)
 
-    video_filename = f"{job_id}_{os.path.basename(file.filename)}"
-    video_path = os.path.join(UPLOAD_FOLDER, video_filename)
-    with open(video_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
 
-    # 원본 파일명 메타 저장
+def transcribe_upload_job(file: UploadFile, effective_lang: str | None, do_diarize: bool, model: str | None) -> dict:
+    job_id = str(uuid.uuid4())
+    relieve_disk_pressure()
+    video_path = upload_file(UPLOAD_FOLDER, job_id, file.filename)
     try:
-        meta_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.json")
-        with open(meta_path, "w", encoding="utf-8") as mf:
-            json.dump({"job_id": job_id, "original_filename": os.path.basename(file.filename)}, mf, ensure_ascii=False)
-    except Exception:
-        pass
+        source_hash = save_upload(file, video_path)
+        record_artifact(job_id, "source", video_path, "upload", sha256=source_hash)
+
+        # 원본 파일명 메타 저장
+        write_meta(job_id, {"job_id": job_id, "original_filename": os.path.basename(file.filename)})
+
+        # 같은 업로드 파일의 결과가 캐시에 있으면 디코딩/전사 생략
+        cached = lookup_cached_result(f"upload:{source_hash}", job_id, effective_lang, do_diarize, model, alias=True, output_dir=OUTPUT_FOLDER)
+        if cached is None:
+            # 원본을 한 번만 디코딩해 메모리 버퍼로 공유 (중간 WAV 없음)
+            success, audio = load_audio_pcm(video_path)
+            if not success:
+                raise HTTPException(status_code=500, detail=audio)
+            audio_id = hash_audio(audio)
+            cached = lookup_cached_result(audio_id, job_id, effective_lang, do_diarize, model, output_dir=OUTPUT_FOLDER)
+        if cached:
+            return {
+                "job_id": job_id,
+                "text": cached["text"],
+                "txt_file": cached["txt_file"],
+                "srt_file": cached["srt_file"],
+                "language": cached.get("language"),
+                "audio_mp3": cached["audio_mp3"],
+                "cached": True,
+            }
+
+        # 요청 단위 모델 스위치(선택): 모델 풀에서 상주 인스턴스 재사용
+        svc = get_transcription_service(model)
+        # 전사/화자 분리/MP3를 동시에 실행 (MP3 인코딩이 전사를 기다리게 하지 않음)
+        stages = process_audio(svc, audio, job_id, effective_lang, do_diarize, OUTPUT_FOLDER)
+        if not stages.get("success"):
+            raise HTTPException(status_code=500, detail=stages.get("error", "전사 실패"))
+        transcription_result = stages["transcription"]
+        speakers = stages["speakers"]
+        mp3_out = stages["mp3_path"]
+
+        store_cached_result(audio_id, job_id, effective_lang, do_diarize, model, transcription_result, speakers,
+                            source_ids=[f"upload:{source_hash}"], original_filename=os.path.basename(file.filename),
+                            output_dir=OUTPUT_FOLDER)
+
+        return {
+            "job_id": job_id,
+            "text": transcription_result["text"],
+            "txt_file": f"outputs/{job_id}.txt",
+            "srt_file": f"outputs/{job_id}.srt",
+            "language": transcription_result["language"],
+            "audio_mp3": f"outputs/{job_id}.mp3" if mp3_out else None,
+        }
+    finally:
+        # 실패/예외 경로에서도 원본을 남기지 않음
+        discard_artifact(job_id, video_path)
+
+
+@app.post("/transcribe-async")
+async def transcribe_video_async_endpoint(file: UploadFile = File(...), language: str = Form("ko"), model: str = Form(None), diarize: str = Form(None)):
+    if not file or file.filename == "":
+        raise HTTPException(status_code=400, detail="파일이 없습니다")
+    language_code = (language or "ko").lower()
+    if language_code not in ALLOWED_LANGUAGE_CODES:
+        raise HTTPException(status_code=400, detail="지원하지 않는 언어 코드입니다 (ko,en,ja,zh,es,fr)")
+    effective_lang = None if language_code == "auto" else language_code
+
+    job_id = str(uuid.uuid4())
+    video_path = upload_file(UPLOAD_FOLDER, job_id, file.filename)
+    source_hash = save_upload(file, video_path)
+    record_artifact(job_id, "source", video_path, "upload", sha256=source_hash)
+
+    # 원본 파일명 메타 저장 (비동기용)
+    write_meta(job_id, {"job_id": job_id, "original_filename": os.path.basename(file.filename)})
+
+    # diarize 플래그 전달 (문자열 true/false 수용)
+    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
+    # 모델 크기(프론트에서 전달된 값 우선)
+    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
+    return enqueue_uploaded_video(job_id, video_path, os.path.basename(file.filename), source_hash,
+                                  effective_lang, do_diarize, model_size)
+
 
-    audio_path = os.path.join(UPLOAD_FOLDER, f"{job_id}.wav")
-    success, result = extract_audio(video_path, audio_path)
-    if not success:
-        raise HTTPException(status_code=500, detail=result)
+def enqueue_uploaded_video(job_id: str, video_path: str, original_filename: str, source_hash: str,
+                           effective_lang: str | None, do_diarize: bool, model_size: str) -> dict:
+    # 같은 업로드 파일의 결과가 캐시에 있으면 작업 큐를 거치지 않고 즉시 완료
+    cached = lookup_cached_result(f"upload:{source_hash}", job_id, effective_lang, do_diarize, model_size, alias=True, output_dir=OUTPUT_FOLDER)
+    if cached:
+        discard_artifact(job_id, video_path)
+        cached["original_filename"] = original_filename
+        return {"job_id": job_id, "task_id": None, "status": "completed", "result": cached}
 
-    # 동기 전사에서도 MP3 생성 (출력 폴더)
-    mp3_out = os.path.join(OUTPUT_FOLDER, f"{job_id}.mp3")
+    record_job(job_id, status="queued", language=effective_lang, model=model_size, diarize=do_diarize)
+    task = transcribe_video_async.delay(video_path, effective_lang, do_diarize, model_size, source_hash, original_filename)
+    return {"job_id": job_id, "task_id": task.id, "status": "processing"}
+
+
+def lookup_cached_url(url: str, job_id: str, effective_lang: str | None, do_diarize: bool, model_size: str) -> dict | None:
+    """링크 결과 캐시 조회. 정규화 키 계산(yt-dlp 추출기 패턴 매칭)이 느릴 수 있어 스레드 풀에서 호출."""
+    return lookup_cached_result(canonical_media_key(url), job_id, effective_lang, do_diarize, model_size,
+                                alias=True, output_dir=OUTPUT_FOLDER)
+
+
+def parse_batch_urls(urls: str | None) -> list[str]:
+    """JSON 배열 또는 줄바꿈/공백 구분 문자열 → http(s) URL 목록 (순서 유지, 중복 제거)."""
+    if not urls or not str(urls).strip():
+        return []
     try:
-        os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-        ok, mp3_res = convert_wav_to_mp3(audio_path, mp3_out)
-        if not ok:
-            # 변환 실패는 치명적이지 않으므로 로그 수준으로만 처리
-            mp3_out = None
+        parsed = json.loads(urls)
+        candidates = parsed if isinstance(parsed, list) else [str(parsed)]
     except Exception:
-        mp3_out = None
+        candidates = str(urls).split()
+    out = [str(u).strip() for u in candidates if re.match(r"^https?://", str(u).strip())]
+    return list(dict.fromkeys(out))
 
-    # 요청 단위 모델 스위치(선택): 모델명이 다르면 임시 인스턴스 생성
-    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
-    svc = transcription_service if model_size == os.getenv("WHISPER_MODEL_SIZE", "base") else TranscriptionService(model_size=model_size)
-    transcription_result = svc.transcribe(audio_path, effective_lang)
-    if not transcription_result.get("success"):
-        raise HTTPException(status_code=500, detail=transcription_result.get("error", "전사 실패"))
-
-    output_txt = os.path.join(OUTPUT_FOLDER, f"{job_id}.txt")
-    output_srt = os.path.join(OUTPUT_FOLDER, f"{job_id}.srt")
-    transcription_service.save_transcription(transcription_result, output_txt)
-    # 화자 분리(선택)
-    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
-    if do_diarize:
-        try:
-            from tasks.diarization import diarize_audio, write_srt_with_speakers  # type: ignore
-            speakers = diarize_audio(audio_path)
-            ok = write_srt_with_speakers(transcription_result["segments"], speakers, output_srt)
-            if not ok:
-                transcription_service.create_srt(transcription_result["segments"], output_srt)
-        except Exception:
-            transcription_service.create_srt(transcription_result["segments"], output_srt)
-    else:
-        transcription_service.create_srt(transcription_result["segments"], output_srt)
 
+# 일괄 제출: 여러 파일/URL을 같은 옵션으로 Celery group 하나로 큐에 넣고 묶음 id 반환
+@app.post("/batch")
+async def submit_batch(files: list[UploadFile] = File(None), urls: str = Form(None), language: str = Form("ko"),
+                       model: str = Form(None), diarize: str = Form(None)):
+    from celery import group
+
+    files = [f for f in (files or []) if f and f.filename]
+    url_list = parse_batch_urls(urls)
+    if not files and not url_list:
+        raise HTTPException(status_code=400, detail="파일 또는 URL을 하나 이상 지정하세요")
     try:
-        os.remove(video_path)
-        os.remove(audio_path)
+        max_items = int(os.getenv("BATCH_MAX_ITEMS", "500"))
     except Exception:
-        pass
+        max_items = 500
+    if len(files) + len(url_list) > max_items:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {max_items}개까지 제출할 수 있습니다")
+    bad = [f.filename for f in files if not allowed_file(f.filename)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 파일 형식입니다: {', '.join(bad)}")
+    language_code = (language or "ko").lower()
+    if language_code not in ALLOWED_LANGUAGE_CODES:
+        raise HTTPException(status_code=400, detail="지원하지 않는 언어 코드입니다 (ko,en,ja,zh,es,fr)")
+    effective_lang = None if language_code == "auto" else language_code
+    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
+    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
 
+    items: list[dict] = []
+    signatures = []
+    for f in files:
+        job_id = str(uuid.uuid4())
+        original_filename = os.path.basename(f.filename)
+        video_path = upload_file(UPLOAD_FOLDER, job_id, original_filename)
+        source_hash = await run_in_threadpool(save_upload, f, video_path)
+        record_artifact(job_id, "source", video_path, "upload", sha256=source_hash)
+        write_meta(job_id, {"job_id": job_id, "original_filename": original_filename})
+        item = {"job_id": job_id, "task_id": None, "kind": "file", "source": original_filename}
+        cached = await run_in_threadpool(lookup_cached_result, f"upload:{source_hash}", job_id, effective_lang,
+                                         do_diarize, model_size, alias=True, output_dir=OUTPUT_FOLDER)
+        if cached:
+            discard_artifact(job_id, video_path)
+        else:
+            record_job(job_id, status="queued", language=effective_lang, model=model_size, diarize=do_diarize)
+            item["sig"] = len(signatures)
+            signatures.append(transcribe_video_async.s(video_path, effective_lang, do_diarize, model_size, source_hash, original_filename))
+        items.append(item)
+    for url in url_list:
+        job_id = str(uuid.uuid4())
+        item = {"job_id": job_id, "task_id": None, "kind": "url", "source": url}
+        cached = await run_in_threadpool(lookup_cached_url, url, job_id, effective_lang, do_diarize, model_size)
+        if cached:
+            write_meta(job_id, {"job_id": job_id, "original_filename": cached.get("original_filename") or url, "source_url": url})
+        else:
+            write_meta(job_id, {"job_id": job_id, "source_url": url, "status": "queued"})
+            item["sig"] = len(signatures)
+            signatures.append(transcribe_url_async.s(url, job_id, effective_lang, do_diarize, model_size))
+        items.append(item)
+
+    batch_id = str(uuid.uuid4())
+    if signatures:
+        # GroupResult를 결과 백엔드에 저장해 두면 GroupResult.restore(batch_id)로도 조회 가능
+        group_result = group(signatures).apply_async()
+        group_result.save()
+        batch_id = group_result.id
+        for item in items:
+            if "sig" in item:
+                item["task_id"] = group_result.results[item.pop("sig")].id
+    get_job_store().save_batch(batch_id, items)
     return {
-        "job_id": job_id,
-        "text": transcription_result["text"],
-        "txt_file": f"outputs/{job_id}.txt",
-        "srt_file": f"outputs/{job_id}.srt",
-        "language": transcription_result["language"],
-        "audio_mp3": f"outputs/{job_id}.mp3" if mp3_out and os.path.exists(mp3_out) else None,
+        "batch_id": batch_id,
+        "total": len(items),
+        "queued": len(signatures),
+        "cached": len(items) - len(signatures),
+        "items": items,
     }
 
 
-@app.post("/transcribe-async")
-async def transcribe_video_async_endpoint(file: UploadFile = File(...), language: str = Form("ko"), model: str = Form(None), diarize: str = Form(None)):
-    if not file or file.filename == "":
-        raise HTTPException(status_code=400, detail="파일이 없습니다")
+# 재생목록/채널 수집: 항목 확장과 다운로드는 워커에서, 끝난 항목부터 전사 큐에 들어간다 (진행은 GET /batch/{batch_id})
+@app.post("/ingest/playlist")
+async def ingest_playlist(url: str = Form(...), language: str = Form("ko"), model: str = Form(None),
+                          diarize: str = Form(None), limit: int = Form(None)):
+    if not isinstance(url, str) or not re.match(r"^https?://", url.strip()):
+        raise HTTPException(status_code=400, detail="유효한 URL이 아닙니다")
+    language_code = (language or "ko").lower()
+    if language_code not in ALLOWED_LANGUAGE_CODES:
+        raise HTTPException(status_code=400, detail="지원하지 않는 언어 코드입니다 (ko,en,ja,zh,es,fr)")
+    effective_lang = None if language_code == "auto" else language_code
+    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
+    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit은 1 이상이어야 합니다")
+
+    # 수집 태스크 id를 묶음 id로 사용 (GET /batch에서 확장/다운로드 단계 진행률 조회)
+    batch_id = str(uuid.uuid4())
+    get_job_store().upsert_batch(batch_id, kind="playlist", source=url.strip(), status="queued")
+    ingest_playlist_async.apply_async(args=(url.strip(), batch_id, effective_lang, do_diarize, model_size, limit),
+                                      task_id=batch_id)
+    return {"batch_id": batch_id, "task_id": batch_id, "status": "processing"}
+
+
+def batch_item_state(item: dict, payloads: dict) -> dict:
+    """작업 저장소 상태 우선(완료/실패/다운로드 중), 진행 중인 항목은 일괄 조회한 Celery 상태 사용."""
+    status = item.get("status")
+    if status == "completed":
+        return {"state": "SUCCESS", "progress": 100}
+    if status == "failed":
+        return {"state": "FAILURE", "progress": 100, "error": item.get("error")}
+    if status == "downloading" or (status == "queued" and not item.get("task_id")):
+        # 재생목록 수집 항목: 아직 전사 태스크가 없음
+        return {"state": "DOWNLOADING" if status == "downloading" else "PENDING", "progress": 0}
+    payload = payloads.get(item.get("task_id") or "")
+    if payload is None:
+        return {"state": "PENDING", "progress": 0}
+    state = payload["state"]
+    if state == "SUCCESS":
+        return {"state": state, "progress": 100}
+    if state in ("FAILURE", "REVOKED"):
+        return {"state": state, "progress": 100, "error": payload.get("error")}
+    return {"state": state, "progress": payload.get("progress", 0)}
+
+
+@app.get("/batch/{batch_id}")
+def get_batch_status(batch_id: str):
+    """
+    묶음 전체 진행률(항목 평균)과 상태별 개수, 항목별 상태.
+    재생목록 수집 묶음은 ingest(확장/다운로드 단계 상태)를 함께 반환하고, 항목 확장 전에는 항목이 비어 있다.
+    """
+    store = get_job_store()
+    rows = store.get_batch(batch_id)
+    header = store.get_batch_info(batch_id)
+    if not rows and header is None:
+        raise HTTPException(status_code=404, detail="묶음을 찾을 수 없습니다")
+    # 아직 끝나지 않은 항목만 결과 백엔드에서 파이프라인 한 번으로 조회
+    pending_ids = [r["task_id"] for r in rows if r["task_id"] and r.get("status") not in ("completed", "failed")]
+    ingesting = header is not None and header["status"] not in ("completed", "failed")
+    payloads = fetch_task_payloads(pending_ids + ([batch_id] if ingesting else []))
+    items = []
+    counts: dict[str, int] = {}
+    for row in rows:
+        state = batch_item_state(row, payloads)
+        counts[state["state"]] = counts.get(state["state"], 0) + 1
+        items.append({
+            "job_id": row["job_id"],
+            "task_id": row["task_id"],
+            "kind": row["kind"],
+            "source": row["source"],
+            "original_filename": row.get("original_filename"),
+            **state,
+        })
+    finished = sum(n for s, n in counts.items() if s in ("SUCCESS", "FAILURE", "REVOKED"))
+    response = {
+        "batch_id": batch_id,
+        "total": len(items),
+        "counts": counts,
+        "progress": round(sum(float(i.get("progress") or 0) for i in items) / len(items), 1) if items else 0,
+        "done": finished == len(items) and not ingesting,
+        "items": items,
+    }
+    if header is not None:
+        ingest = {k: header[k] for k in ("kind", "source", "title", "status", "entry_count", "error")}
+        if ingesting:
+            ingest["progress"] = payloads.get(batch_id, {}).get("progress", 0)
+        response["ingest"] = ingest
+    return response
+
+
+@app.post("/transcribe-stream")
+async def transcribe_stream(request: Request, filename: str, language: str = "ko", model: str = None, diarize: str = None):
+    """
+    원시 요청 본문(application/octet-stream)을 받는 대로 ffmpeg에 흘려 오디오만 저장한 뒤 비동기 전사.
+    동영상은 디스크에 쓰지 않는다. 파이프로 디먹스할 수 없는 컨테이너(moov atom이 끝에 있는 MP4 등)는 422.
+    """
+    filename = os.path.basename(filename or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="파일 이름이 없습니다")
+    if not allowed_file(filename):
+        raise HTTPException(status_code=400, detail="지원하지 않는 파일 형식입니다")
     language_code = (language or "ko").lower()
     if language_code not in ALLOWED_LANGUAGE_CODES:
         raise HTTPException(status_code=400, detail="지원하지 않는 언어 코드입니다 (ko,en,ja,zh,es,fr)")
     effective_lang = None if language_code == "auto" else language_code
+    try:
+        declared = int(request.headers.get("Content-Length", "0"))
+    except Exception:
+        declared = 0
+    if declared > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail=f"파일이 너무 큽니다 (최대 {MAX_FILE_SIZE // (1024 * 1024)}MB)")
 
     job_id = str(uuid.uuid4())
-    video_filename = f"{job_id}_{os.path.basename(file.filename)}"
-    video_path = os.path.join(UPLOAD_FOLDER, video_filename)
-    with open(video_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    audio_path = upload_file(UPLOAD_FOLDER, job_id, f"{os.path.splitext(filename)[0]}.wav")
+    ok, info = await extract_audio_from_stream(request.stream(), audio_path, MAX_FILE_SIZE)
+    if not ok:
+        raise HTTPException(status_code=info["status"], detail=info["error"])
+    await run_in_threadpool(record_artifact, job_id, "wav", audio_path, "extract")
 
-    # 원본 파일명 메타 저장 (비동기용)
+    write_meta(job_id, {"job_id": job_id, "original_filename": filename})
+    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
+    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
+    return await run_in_threadpool(
+        enqueue_uploaded_video, job_id, audio_path, filename, info["sha256"], effective_lang, do_diarize, model_size,
+    )
+
+
+# ---- 재개 가능한 업로드 (tus 방식: POST 생성 → HEAD 오프셋 확인 → PATCH 이어 쓰기) ----
+# /uploads 는 정적 파일 마운트이므로 /upload/resumable 경로 사용
+resumable_uploads = ResumableUploads(UPLOAD_FOLDER)
+TUS_HEADERS = {"Tus-Resumable": "1.0.0"}
+
+
+def upload_job_headers(state: dict) -> dict:
+    """완료된 업로드의 전사 작업 정보 (마지막 PATCH 응답을 놓친 클라이언트가 HEAD로 다시 얻는다)."""
+    headers = {}
+    if state.get("task_id"):
+        headers["Upload-Task-Id"] = state["task_id"]
+    if state.get("job_status"):
+        headers["Upload-Job-Status"] = state["job_status"]
+    return headers
+
+
+def parse_upload_metadata(raw: str | None) -> dict:
+    """tus Upload-Metadata: 'key base64value,key2 base64value2'."""
+    out = {}
+    for pair in (raw or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            out[parts[0]] = base64.b64decode(parts[1]).decode("utf-8") if len(parts) > 1 else ""
+        except Exception:
+            raise HTTPException(status_code=400, detail=f"Upload-Metadata 형식 오류: {parts[0]}")
+    return out
+
+
+@app.post("/upload/resumable", status_code=201)
+async def create_resumable_upload(request: Request):
     try:
-        meta_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.json")
-        with open(meta_path, "w", encoding="utf-8") as mf:
-            json.dump({"job_id": job_id, "original_filename": os.path.basename(file.filename)}, mf, ensure_ascii=False)
+        length = int(request.headers.get("Upload-Length", ""))
     except Exception:
-        pass
+        raise HTTPException(status_code=400, detail="Upload-Length 헤더가 필요합니다")
+    meta = parse_upload_metadata(request.headers.get("Upload-Metadata"))
+    filename = os.path.basename(meta.get("filename") or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="파일 이름(filename 메타데이터)이 없습니다")
+    if not allowed_file(filename):
+        raise HTTPException(status_code=400, detail="지원하지 않는 파일 형식입니다")
+    language_code = (meta.get("language") or "ko").lower()
+    if language_code not in ALLOWED_LANGUAGE_CODES:
+        raise HTTPException(status_code=400, detail="지원하지 않는 언어 코드입니다 (ko,en,ja,zh,es,fr)")
 
-    # diarize 플래그 전달 (문자열 true/false 수용)
-    do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
-    # 모델 크기(프론트에서 전달된 값 우선)
-    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
-    task = transcribe_video_async.delay(video_path, effective_lang, do_diarize, model_size)
-    return {"job_id": job_id, "task_id": task.id, "status": "processing"}
+    upload_id = str(uuid.uuid4())
+    try:
+        resumable_uploads.create(upload_id, filename, length, {
+            "language": language_code,
+            "model": meta.get("model"),
+            "diarize": str(meta.get("diarize") or "").lower() in ("1", "true", "yes", "on"),
+        })
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    write_meta(upload_id, {"job_id": upload_id, "original_filename": filename})
+    return JSONResponse(
+        {"upload_id": upload_id, "job_id": upload_id, "offset": 0, "length": length},
+        status_code=201,
+        headers={**TUS_HEADERS, "Location": f"/upload/resumable/{upload_id}", "Upload-Offset": "0"},
+    )
+
+
+@app.head("/upload/resumable/{upload_id}")
+def resumable_upload_offset(upload_id: str):
+    state = resumable_uploads.get(upload_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="업로드를 찾을 수 없습니다")
+    return Response(status_code=200, headers={
+        **TUS_HEADERS,
+        "Upload-Offset": str(state["offset"]),
+        "Upload-Length": str(state["length"]),
+        "Cache-Control": "no-store",
+        **upload_job_headers(state),
+    })
+
+
+@app.patch("/upload/resumable/{upload_id}")
+async def append_resumable_upload(upload_id: str, request: Request):
+    try:
+        client_offset = int(request.headers.get("Upload-Offset", ""))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Upload-Offset 헤더가 필요합니다")
+    try:
+        state = resumable_uploads.begin(upload_id, client_offset)
+        state = await resumable_uploads.append(state, request.stream())
+    except UploadError as e:
+        current = resumable_uploads.get(upload_id)
+        headers = {**TUS_HEADERS, "Upload-Offset": str(current["offset"])} if current else TUS_HEADERS
+        if current and current["completed"]:
+            # 완료 후 재시도된 PATCH: 작업 id/task id를 다시 돌려줘 /status, /events 조회가 가능하도록
+            body = {"detail": e.message, "job_id": upload_id, "task_id": current.get("task_id"),
+                    "status": current.get("job_status")}
+            if body["status"] == "completed" and not body["task_id"]:
+                body["result"] = await run_in_threadpool(completed_upload_result, upload_id)
+            return JSONResponse(body, status_code=e.status_code, headers={**headers, **upload_job_headers(current)})
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=headers)
+
+    headers = {**TUS_HEADERS, "Upload-Offset": str(state["offset"])}
+    if not state["completed"]:
+        return Response(status_code=204, headers=headers)
+
+    # 마지막 청크 도착: 누적 해시로 캐시 조회 후 전사 작업에 바로 넘김.
+    # 인계가 실패하면(예: 브로커 중단) job_status가 비어 있어 같은 오프셋의 빈 PATCH로 다시 인계할 수 있다
+    meta = state.get("metadata") or {}
+    language_code = meta.get("language") or "ko"
+    model_size = (meta.get("model") or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
+    try:
+        await run_in_threadpool(record_artifact, upload_id, "source", state["path"], "upload", state["sha256"])
+        result = await run_in_threadpool(
+            enqueue_uploaded_video, upload_id, state["path"], state["filename"], state["sha256"],
+            None if language_code == "auto" else language_code, bool(meta.get("diarize")), model_size,
+        )
+        state["task_id"] = result.get("task_id")
+        state["job_status"] = result.get("status")
+        resumable_uploads.update(state)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"전사 작업 등록 실패, 잠시 후 다시 시도하세요: {e}",
+                            headers={**headers, "Retry-After": "5"})
+    finally:
+        resumable_uploads.release(upload_id)
+    return JSONResponse(result, headers=headers)
+
+
+def completed_upload_result(job_id: str) -> dict | None:
+    """캐시 적중으로 바로 완료된 재개 업로드의 결과 (마지막 PATCH 응답을 놓친 클라이언트용)."""
+    job = get_job_store().get_job(job_id)
+    if job is None:
+        return None
+    return {
+        "success": True,
+        "job_id": job_id,
+        "text": job.get("text") or "",
+        "txt_file": f"outputs/{job_id}.txt",
+        "srt_file": f"outputs/{job_id}.srt",
+        "audio_mp3": f"outputs/{job_id}.mp3" if os.path.exists(resolve_output(OUTPUT_FOLDER, job_id, "mp3")) else None,
+        "language": job.get("language"),
+        "original_filename": job.get("original_filename"),
+        "cached": True,
+    }
+
+
+@app.delete("/upload/resumable/{upload_id}", status_code=204)
+def cancel_resumable_upload(upload_id: str):
+    if not resumable_uploads.delete(upload_id):
+        raise HTTPException(status_code=404, detail="업로드를 찾을 수 없습니다")
+    return Response(status_code=204, headers=TUS_HEADERS)
 
 
 @app.post("/transcribe-url-async")
-async def transcribe_url_async_endpoint(url: str = Form(...), language: str = Form("ko"), model: str = Form(None), diarize: str = Form(None)):
+async def transcribe_url_async_endpoint(url: str = Form(...), language: str = Form("ko"), model: str = Form(None), diarize: str = Form(None),
+                                        stream: str = Form(None)):
     if not isinstance(url, str) or not re.match(r"^https?://", url.strip()):
         raise HTTPException(status_code=400, detail="유효한 URL이 아닙니다")
     language_code = (language or "ko").lower()
@@ -198,15 +632,20 @@ async def transcribe_url_async_endpoint(url: str = Form(...), language: str = Fo
     do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
     model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
 
+    # 같은 링크(정규화 URL/영상 id)의 결과가 캐시에 있으면 즉시 완료
+    cached = await run_in_threadpool(lookup_cached_url, url, job_id, effective_lang, do_diarize, model_size)
+    if cached:
+        cached["original_filename"] = cached.get("original_filename") or url
+        cached["source_url"] = url
+        write_meta(job_id, {"job_id": job_id, "original_filename": cached["original_filename"], "source_url": url})
+        return {"job_id": job_id, "task_id": None, "status": "completed", "result": cached}
+
     # 메타에 원본 URL 저장
-    try:
-        meta_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.json")
-        with open(meta_path, "w", encoding="utf-8") as mf:
-            json.dump({"job_id": job_id, "source_url": url}, mf, ensure_ascii=False)
-    except Exception:
-        pass
+    write_meta(job_id, {"job_id": job_id, "source_url": url, "status": "queued"})
 
-    task = transcribe_url_async.delay(url, job_id, effective_lang, do_diarize, model_size)
+    # stream: 다운로드 중 디코딩/전사 시작 (미지정이면 워커의 URL_STREAM_MODE 기본값)
+    stream_flag = None if stream in (None, "") else str(stream).lower() in ("1", "true", "yes", "on")
+    task = transcribe_url_async.delay(url, job_id, effective_lang, do_diarize, model_size, stream_flag)
     return {"job_id": job_id, "task_id": task.id, "status": "processing"}
 
 
@@ -218,68 +657,78 @@ async def transcribe_url(url: str = Form(...), language: str = Form("ko"), model
     if language_code not in ALLOWED_LANGUAGE_CODES:
         raise HTTPException(status_code=400, detail="지원하지 않는 언어 코드입니다 (ko,en,ja,zh,es,fr)")
     effective_lang = None if language_code == "auto" else language_code
+    return await run_sync_job(transcribe_url_job, url, effective_lang, model)
 
+
+def transcribe_url_job(url: str, effective_lang: str | None, model: str | None) -> dict:
     job_id = str(uuid.uuid4())
 
-    # 다운로드
+    def cached_response(cached: dict, title: str) -> dict:
+        write_meta(job_id, {"job_id": job_id, "original_filename": title, "source_url": url})
+        return {
+            "job_id": job_id,
+            "text": cached["text"],
+            "txt_file": cached["txt_file"],
+            "srt_file": cached["srt_file"],
+            "language": cached.get("language"),
+            "audio_mp3": cached["audio_mp3"],
+            "original_filename": title,
+            "source_url": url,
+            "cached": True,
+        }
+
+    # 동기 경로는 화자 분리를 하지 않으므로 diarize=False 결과로 캐시 조회
+    source_id = canonical_media_key(url)
+    cached = lookup_cached_result(source_id, job_id, effective_lang, False, model, alias=True, output_dir=OUTPUT_FOLDER)
+    if cached:
+        return cached_response(cached, cached.get("original_filename") or url)
+
+    # 다운로드 (디스크 여유가 부족하면 먼저 오래된 파일 축출, 다른 곳에서 정리 중이면 대기 없이 진행)
+    relieve_disk_pressure()
     ok, dl = download_media_via_ytdlp(url.strip(), job_id, UPLOAD_FOLDER)
     if not ok:
         raise HTTPException(status_code=400, detail=str(dl.get("error", "다운로드 실패")))
     video_path = dl.get("path")
-    original_title = str(dl.get("title") or os.path.basename(video_path))
-
-    # 메타 저장
-    try:
-        meta_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.json")
-        with open(meta_path, "w", encoding="utf-8") as mf:
-            json.dump({"job_id": job_id, "original_filename": original_title, "source_url": url}, mf, ensure_ascii=False)
-    except Exception:
-        pass
-
-    # 오디오 추출
-    audio_path = os.path.join(UPLOAD_FOLDER, f"{job_id}.wav")
-    success, result = extract_audio(video_path, audio_path)
-    if not success:
-        raise HTTPException(status_code=500, detail=result)
-
-    # MP3 생성 (출력 폴더)
-    mp3_out = os.path.join(OUTPUT_FOLDER, f"{job_id}.mp3")
-    try:
-        os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-        ok2, _ = convert_wav_to_mp3(audio_path, mp3_out)
-        if not ok2:
-            mp3_out = None
-    except Exception:
-        mp3_out = None
-
-    # 모델 선택 및 전사
-    model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
-    svc = transcription_service if model_size == os.getenv("WHISPER_MODEL_SIZE", "base") else TranscriptionService(model_size=model_size)
-    transcription_result = svc.transcribe(audio_path, effective_lang)
-    if not transcription_result.get("success"):
-        raise HTTPException(status_code=500, detail=transcription_result.get("error", "전사 실패"))
-
-    output_txt = os.path.join(OUTPUT_FOLDER, f"{job_id}.txt")
-    output_srt = os.path.join(OUTPUT_FOLDER, f"{job_id}.srt")
-    transcription_service.save_transcription(transcription_result, output_txt)
-    transcription_service.create_srt(transcription_result["segments"], output_srt)
-
     try:
-        os.remove(video_path)
-        os.remove(audio_path)
-    except Exception:
-        pass
-
-    return {
-        "job_id": job_id,
-        "text": transcription_result["text"],
-        "txt_file": f"outputs/{job_id}.txt",
-        "srt_file": f"outputs/{job_id}.srt",
-        "language": transcription_result["language"],
-        "audio_mp3": f"outputs/{job_id}.mp3" if mp3_out and os.path.exists(mp3_out) else None,
-        "original_filename": original_title,
-        "source_url": url,
-    }
+        original_title = str(dl.get("title") or os.path.basename(video_path))
+
+        # 메타 저장
+        write_meta(job_id, {"job_id": job_id, "original_filename": original_title, "source_url": url})
+
+        # 오디오 추출
+        success, audio = load_audio_pcm(video_path)
+        if not success:
+            raise HTTPException(status_code=500, detail=audio)
+
+        audio_id = hash_audio(audio)
+        cached = lookup_cached_result(audio_id, job_id, effective_lang, False, model, output_dir=OUTPUT_FOLDER)
+        if cached:
+            return cached_response(cached, original_title)
+
+        # 모델 선택 후 전사/MP3 동시 실행
+        svc = get_transcription_service(model)
+        stages = process_audio(svc, audio, job_id, effective_lang, False, OUTPUT_FOLDER)
+        if not stages.get("success"):
+            raise HTTPException(status_code=500, detail=stages.get("error", "전사 실패"))
+        transcription_result = stages["transcription"]
+        mp3_out = stages["mp3_path"]
+
+        store_cached_result(audio_id, job_id, effective_lang, False, model, transcription_result, None,
+                            source_ids=[source_id], original_filename=original_title, output_dir=OUTPUT_FOLDER)
+
+        return {
+            "job_id": job_id,
+            "text": transcription_result["text"],
+            "txt_file": f"outputs/{job_id}.txt",
+            "srt_file": f"outputs/{job_id}.srt",
+            "language": transcription_result["language"],
+            "audio_mp3": f"outputs/{job_id}.mp3" if mp3_out else None,
+            "original_filename": original_title,
+            "source_url": url,
+        }
+    finally:
+        # 실패/예외 경로에서도 다운로드 원본을 남기지 않음
+        discard_artifact(job_id, video_path)
 
 
 @app.post("/fetch-url-async")
@@ -288,11 +737,7 @@ async def fetch_url_async(url: str = Form(...)):
         raise HTTPException(status_code=400, detail="유효한 URL이 아닙니다")
     job_id = str(uuid.uuid4())
     # 초기 메타
-    try:
-        with open(os.path.join(OUTPUT_FOLDER, f"{job_id}.json"), "w", encoding="utf-8") as mf:
-            json.dump({"job_id": job_id, "source_url": url}, mf, ensure_ascii=False)
-    except Exception:
-        pass
+    write_meta(job_id, {"job_id": job_id, "source_url": url, "status": "downloading"})
     task = download_url_async.delay(url, job_id)
     return {"job_id": job_id, "task_id": task.id, "status": "processing"}
 
@@ -308,25 +753,94 @@ async def transcribe_downloaded_async(job_id: str = Form(...), language: str = F
     do_diarize = str(diarize or "").lower() in ("1", "true", "yes", "on")
     model_size = (model or os.getenv("WHISPER_MODEL_SIZE", "base")).strip()
 
-    # 업로드 폴더에서 해당 job_id로 시작하는 파일 검색
-    try:
-        candidates = [
-            os.path.join(UPLOAD_FOLDER, f) for f in os.listdir(UPLOAD_FOLDER)
-            if f.startswith(f"{job_id}_")
-        ]
-    except Exception:
-        candidates = []
-    if not candidates:
+    # 산출물 매니페스트에서 원본 위치 조회 (업로드 폴더 나열 없음)
+    video_path = source_path(job_id)
+    if not video_path:
         raise HTTPException(status_code=404, detail="다운로드된 미디어를 찾을 수 없습니다")
-    candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    video_path = candidates[0]
 
+    record_job(job_id, status="queued", language=effective_lang, model=model_size, diarize=do_diarize)
     task = transcribe_video_async.delay(video_path, effective_lang, do_diarize, model_size)
     return {"job_id": job_id, "task_id": task.id, "status": "processing"}
 
+@app.get("/jobs")
+def list_jobs(limit: int = 50, cursor: str | None = None, status: str | None = None):
+    """작업 목록 (최신순, 키셋 페이지네이션: 응답의 next_cursor를 다음 요청 cursor로 전달)."""
+    try:
+        return get_job_store().list_jobs(limit=limit, cursor=cursor, status=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, segments: int = 1):
+    store = get_job_store()
+    job = store.get_job(job_id)
+    if job is None:
+        # 저장소 도입 이전 작업: 메타 JSON만 있는 경우
+        meta = load_job_meta(job_id, OUTPUT_FOLDER)
+        if not meta:
+            raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+        return {**meta, "job_id": job_id, "legacy": True}
+    if segments:
+        job["segments"] = store.get_segments(job_id)
+    return job
+
+
+@app.get("/search")
+def search_transcriptions(q: str = "", limit: int = 20, offset: int = 0):
+    """전사 전문 검색 (한국어 바이그램 색인). 구간 적중은 start/end 포함, 편집된 텍스트 적중은 source="text".
+    다음 페이지는 응답의 next_offset을 offset으로 넘긴다 (없으면 null)."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="검색어를 입력하세요")
+    return get_job_store().search(q, limit=limit, offset=offset)
+
+
+@app.get("/models/stats")
+def get_model_stats():
+    """API 프로세스의 모델 풀 상태(상주 모델, 적중/미스, 로딩 시간), 배칭 서버, 화자 분리 파이프라인 통계."""
+    from tasks.batch_inference import batch_server_stats
+    from tasks.diarization import diarization_stats
+    return {
+        **get_model_pool().stats(),
+        "batch_servers": batch_server_stats(),
+        "diarization": diarization_stats(),
+        "sync_executor": get_sync_executor().stats(),
+        "segment_cache": get_segment_cache().stats(),
+    }
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """결과 캐시 적중률/용량."""
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/storage/report")
+def get_storage_report():
+    """보존 정리 dry-run: TTL 만료/고아/용량 초과로 지워질 파일과 현재 사용량 (아무것도 지우지 않음)."""
+    return sweep_storage(dry_run=True)
+
+
+@app.post("/storage/sweep")
+def run_storage_sweep():
+    """보존 정리를 워커에 즉시 요청 (주기 실행과 같은 태스크, 이미 정리 중이면 건너뜀)."""
+    try:
+        task = storage_lifecycle_sweep.delay()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"작업 큐 연결 실패: {e}")
+    return {"task_id": task.id}
+
+
 @app.get("/status/{task_id}")
 def get_task_status(task_id: str):
     task = celery_app.AsyncResult(task_id)
+    return task_status_payload(task)
+
+
+def task_status_payload(task):
     if task.state == "PENDING":
         return {"state": task.state, "progress": 0}
     if task.state == "PROGRESS":
@@ -337,12 +851,118 @@ def get_task_status(task_id: str):
     return {"state": task.state, "error": str(task.info)}
 
 
+def bulk_status_response(task_ids, known: dict | None, if_none_match: str | None):
+    try:
+        max_ids = int(os.getenv("STATUS_MAX_IDS", "1000"))
+    except Exception:
+        max_ids = 1000
+    ids = [str(t).strip() for t in (task_ids or []) if str(t).strip()]
+    if not ids:
+        raise HTTPException(status_code=400, detail="task_ids를 지정하세요")
+    if len(ids) > max_ids:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {max_ids}개까지 조회할 수 있습니다")
+    payload = bulk_status(ids, known if isinstance(known, dict) else None)
+    etag = f'"{payload["etag"]}"'
+    # 요청한 전체 작업 상태가 그대로면 본문 없이 304
+    if if_none_match and if_none_match.strip() == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(payload, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@app.get("/status")
+def get_bulk_status(request: Request, ids: str = ""):
+    """여러 작업 상태 (ids=a,b,c). If-None-Match로 변경 없을 때 304."""
+    return bulk_status_response(ids.split(","), None, request.headers.get("if-none-match"))
+
+
+@app.post("/status")
+def post_bulk_status(request: Request, payload: dict = Body(...)):
+    """
+    본문: {"task_ids": [...], "known": {task_id: etag}}
+    known의 etag와 같은 작업은 tasks에서 빠지고 unchanged에만 나열된다.
+    """
+    return bulk_status_response(payload.get("task_ids"), payload.get("known"), request.headers.get("if-none-match"))
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/events/{task_id}")
+async def stream_task_events(task_id: str):
+    """
+    작업 진행 상황 SSE 스트림 (progress / segment / done 이벤트).
+    채널을 먼저 구독한 뒤 Redis에 남은 백로그(마지막 진행률, 누적 구간)를 보내므로
+    늦게 접속해도 빠지는 이벤트가 없다. done 이벤트에는 /status와 같은 최종 상태를 담는다.
+    """
+    import redis.asyncio as aioredis
+
+    try:
+        heartbeat = float(os.getenv("SSE_HEARTBEAT_SEC", "15"))
+    except Exception:
+        heartbeat = 15.0
+
+    async def final_status():
+        payload = await run_in_threadpool(lambda: task_status_payload(celery_app.AsyncResult(task_id)))
+        return {"type": "done", **payload}
+
+    async def generate():
+        client = aioredis.from_url(REDIS_URL)
+        pubsub = client.pubsub()
+        sent_ids = set()
+        try:
+            await pubsub.subscribe(channel_name(task_id))
+            last = await client.get(last_key(task_id))
+            if last:
+                yield sse_event("progress", json.loads(last))
+            for raw in await client.lrange(segments_key(task_id), 0, -1):
+                event = json.loads(raw)
+                sent_ids.add(event.get("segment", {}).get("id"))
+                yield sse_event("segment", event)
+
+            # 이미 끝난 작업이면 최종 상태만 보내고 종료
+            status = await final_status()
+            if status.get("state") in ("SUCCESS", "FAILURE", "REVOKED"):
+                yield sse_event("done", status)
+                return
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                if message is None:
+                    yield ": ping\n\n"
+                    continue
+                event = json.loads(message["data"])
+                kind = event.get("type", "progress")
+                if kind == "segment":
+                    seg_id = event.get("segment", {}).get("id")
+                    if seg_id in sent_ids:
+                        continue
+                    sent_ids.add(seg_id)
+                if kind == "done":
+                    yield sse_event("done", await final_status())
+                    return
+                yield sse_event(kind, event)
+        finally:
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # 전사 결과 삭제 (txt/srt 파일 제거)
 @app.delete("/transcription/{job_id}")
 def delete_transcription(job_id: str):
     targets = [
-        os.path.join(OUTPUT_FOLDER, f"{job_id}.txt"),
-        os.path.join(OUTPUT_FOLDER, f"{job_id}.srt"),
+        resolve_output(OUTPUT_FOLDER, job_id, "txt"),
+        resolve_output(OUTPUT_FOLDER, job_id, "srt"),
     ]
     deleted = []
     for path in targets:
@@ -353,6 +973,13 @@ def delete_transcription(job_id: str):
         except Exception:
             # 한 파일 실패해도 나머지는 시도
             pass
+    try:
+        if get_job_store().delete_job(job_id):
+            deleted.append("job")
+    except Exception:
+        pass
+    get_segment_cache().invalidate(job_id)
+    get_export_cache().invalidate(job_id)
     return {"job_id": job_id, "deleted": deleted}
 
 
@@ -361,10 +988,19 @@ def delete_transcription(job_id: str):
 def update_transcript_text(job_id: str, text: str = Body(..., embed=True)):
     if not isinstance(text, str):
         raise HTTPException(status_code=400, detail="잘못된 본문")
-    txt_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.txt")
+    txt_path = resolve_output(OUTPUT_FOLDER, job_id, "txt")
     try:
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(text)
+        # 임시 파일 + 교체: 기존 파일이 다른 경로와 링크돼 있어도 그쪽 내용은 바뀌지 않음
+        tmp_path = f"{txt_path}.tmp-{uuid.uuid4().hex}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, txt_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        get_job_store().update_text(job_id, text)
+        record_artifact(job_id, "txt", txt_path, "edit")
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -373,359 +1009,281 @@ def update_transcript_text(job_id: str, text: str = Body(..., embed=True)):
 @app.get("/export/audio/{job_id}")
 def export_audio(job_id: str):
     """MP3 전용 다운로드. outputs/{job_id}.mp3만 허용. 파일명은 원본 이름 기반."""
-    mp3_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.mp3")
+    mp3_path = resolve_output(OUTPUT_FOLDER, job_id, "mp3")
     if os.path.exists(mp3_path):
         download_name = f"{job_id}.mp3"
         # 메타에서 원본 파일명 읽어서 mp3 확장자로 교체
         try:
-            meta_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.json")
-            if os.path.exists(meta_path):
-                with open(meta_path, "r", encoding="utf-8") as mf:
-                    meta = json.load(mf)
-                orig = os.path.basename(str(meta.get("original_filename", "")))
-                base = os.path.splitext(orig)[0].strip() or job_id
-                download_name = base + ".mp3"
+            meta = load_job_meta(job_id, OUTPUT_FOLDER)
+            orig = os.path.basename(str(meta.get("original_filename") or ""))
+            base = os.path.splitext(orig)[0].strip() or job_id
+            download_name = base + ".mp3"
         except Exception:
             download_name = f"{job_id}.mp3"
+        touch_artifact(job_id, "mp3")
         return FileResponse(mp3_path, media_type="audio/mpeg", filename=download_name)
     raise HTTPException(status_code=404, detail="오디오 파일이 없습니다")
 
 
-# SRT 파서 (간단, 화자 라벨 인식)
-def parse_srt_entries(job_id: str):
-    srt_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.srt")
-    if not os.path.exists(srt_path):
-        return []
-    with open(srt_path, "r", encoding="utf-8") as f:
-        data = f.read()
-    blocks = re.split(r"\n\s*\n", data.strip())
-    entries = []
-    for blk in blocks:
-        lines = [ln for ln in blk.splitlines() if ln.strip()]
-        if len(lines) < 2:
-            continue
-        # 첫 줄이 번호일 수 있음
-        if re.match(r"^\d+$", lines[0].strip()):
-            lines = lines[1:]
-        time_line = lines[0]
-        m = re.match(r"(\d{2}:\d{2}:\d{2}),\d{3}\s*-->\s*(\d{2}:\d{2}:\d{2}),\d{3}", time_line)
-        if not m:
-            # 밀리초 포함 매치
-            m = re.match(r"(\d{2}:\d{2}:\d{2}),\d{1,3}\s*-->\s*(\d{2}:\d{2}:\d{2}),\d{1,3}", time_line)
-        if not m:
-            continue
-        start_ts, end_ts = m.group(1), m.group(2)
-        text = " ".join(lines[1:]).strip()
-        # 화자 라벨 추출: [화자 N] / [SPEAKER_1] / '화자 N:' / 'SPEAKER 1:' 지원
-        speaker = None
-        msp = re.match(r"^\[(?:\s*화자\s*(\d+)|\s*SPEAKER[_\s]*(\d+))\]\s*(.*)$", text, flags=re.IGNORECASE)
-        if msp:
-            speaker = msp.group(1) or msp.group(2)
-            text = msp.group(3).strip()
-        else:
-            msp2 = re.match(r"^(?:\s*화자\s*(\d+)|\s*SPEAKER[_\s]*(\d+))\s*:\s*(.*)$", text, flags=re.IGNORECASE)
-            if msp2:
-                speaker = msp2.group(1) or msp2.group(2)
-                text = msp2.group(3).strip()
-        ent = {"start": start_ts, "end": end_ts, "text": text}
-        if speaker:
-            try:
-                ent["speaker"] = int(speaker)
-            except Exception:
-                pass
-        entries.append(ent)
-    return entries
+def export_version(job_id: str) -> str:
+    """렌더 캐시 키용 전사 버전: 작업 저장소 version, 없으면(이전 작업) txt/srt mtime."""
+    try:
+        state = get_job_store().segment_state(job_id)
+        if state:
+            return f"v{state[0]}"
+    except Exception:
+        pass
+    parts = []
+    for ext in ("txt", "srt"):
+        try:
+            parts.append(str(os.stat(resolve_output(OUTPUT_FOLDER, job_id, ext)).st_mtime_ns))
+        except OSError:
+            parts.append("0")
+    return "m" + "-".join(parts)
 
-# 내보내기: DOCX (타임스탬프 옵션)
-@app.get("/export/docx/{job_id}")
-def export_docx(job_id: str, ts: int = 0, spk: int = 0):
-    txt_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.txt")
+
+def rendered_export(job_id: str, fmt: str, ts: int, spk: int, render) -> str:
+    """DOCX/PDF 공통: 타임스탬프/화자 옵션이면 구간 목록, 아니면 TXT 줄로 렌더링 후 캐시 파일 경로 반환."""
+    txt_path = resolve_output(OUTPUT_FOLDER, job_id, "txt")
     if not os.path.exists(txt_path):
         raise HTTPException(status_code=404, detail="TXT 파일을 찾을 수 없습니다")
-    try:
-        from docx import Document  # type: ignore
-    except Exception:
-        raise HTTPException(status_code=500, detail="DOCX 모듈이 설치되어 있지 않습니다")
 
-    with open(txt_path, "r", encoding="utf-8") as f:
-        plain = f.read()
+    def build(path: str) -> None:
+        lines = None
+        if ts or spk:
+            first, entries = peek(iter_export_entries(job_id))
+            if first is not None:
+                lines = (export_line(e, ts, spk) for e in entries)
+        if lines is None:
+            # 줄 단위로 읽어 렌더러에 넘김 (파일 전체 문자열을 따로 만들지 않음)
+            with open(txt_path, "r", encoding="utf-8") as f:
+                render((line.rstrip("\r\n") for line in f), path)
+            return
+        render(lines, path)
 
-    doc = Document()
-    if ts or spk:
-        entries = parse_srt_entries(job_id)
-        if entries:
-            for e in entries:
-                parts = []
-                if ts and e.get("start"):
-                    parts.append(f"[{e['start']}]")
-                if spk and e.get("speaker"):
-                    parts.append(f"[화자 {e['speaker']}]")
-                prefix = (" ".join(parts) + " ") if parts else ""
-                doc.add_paragraph(prefix + e["text"])
-        else:
-            for line in plain.splitlines():
-                doc.add_paragraph(line)
-    else:
-        for line in plain.splitlines():
-            doc.add_paragraph(line)
+    try:
+        return get_export_cache().get_or_render(job_id, fmt, ts, spk, export_version(job_id), build)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    headers = {"Content-Disposition": f"attachment; filename=transcript_{job_id}.docx"}
-    return StreamingResponse(buffer, media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", headers=headers)
 
+# 내보내기: DOCX (타임스탬프 옵션)
+@app.get("/export/docx/{job_id}")
+def export_docx(job_id: str, ts: int = 0, spk: int = 0):
+    path = rendered_export(job_id, "docx", ts, spk, render_docx)
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        filename=f"transcript_{job_id}.docx",
+    )
 
-# 내보내기: PDF (타임스탬프 옵션)
+
+# 내보내기: PDF (타임스탬프 옵션, 폰트는 프로세스당 한 번 등록)
 @app.get("/export/pdf/{job_id}")
 def export_pdf(job_id: str, ts: int = 0, spk: int = 0):
-    txt_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.txt")
-    if not os.path.exists(txt_path):
-        raise HTTPException(status_code=404, detail="TXT 파일을 찾을 수 없습니다")
-    try:
-        from reportlab.lib.pagesizes import A4  # type: ignore
-        from reportlab.lib.units import mm  # type: ignore
-        from reportlab.pdfbase import pdfmetrics  # type: ignore
-        from reportlab.pdfbase.ttfonts import TTFont  # type: ignore
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer  # type: ignore
-        from reportlab.lib.styles import ParagraphStyle  # type: ignore
-    except Exception:
-        raise HTTPException(status_code=500, detail="PDF 모듈이 설치되어 있지 않습니다")
+    path = rendered_export(job_id, "pdf", ts, spk, render_pdf)
+    return FileResponse(path, media_type="application/pdf", filename=f"transcript_{job_id}.pdf")
 
-    import html as htmlmod
 
-    with open(txt_path, "r", encoding="utf-8") as f:
-        plain = f.read()
+# 스트리밍 내보내기: 문서를 통째로 만들지 않고 배치 단위로 인코딩해 바로 전송
+EXPORT_STREAM_BATCH = 256
 
-    # 폰트 선택 (기존 로직 유지)
-    def resolve_font() -> tuple[str | None, int | None]:
-        env_path = os.getenv("PDF_FONT_PATH")
-        env_index = os.getenv("PDF_FONT_INDEX")
-        try:
-            env_index_int = int(env_index) if env_index is not None else None
-        except Exception:
-            env_index_int = None
-        if env_path and os.path.exists(env_path):
-            return env_path, env_index_int
-        candidates: list[tuple[str, int | None]] = [
-            ("/usr/share/fonts/opentype/noto/NotoSerifCJKkr-Regular.otf", None),
-            ("/usr/share/fonts/opentype/noto/NotoSansCJKkr-Regular.otf", None),
-            ("/usr/share/fonts/opentype/noto/NotoSerifCJKsc-Regular.otf", None),
-            ("/usr/share/fonts/opentype/noto/NotoSansCJKsc-Regular.otf", None),
-            ("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", 0),
-            (r"C:\\Windows\\Fonts\\malgun.ttf", None),
-            (r"C:\\Windows\\Fonts\\msyh.ttc", 0),
-            (r"C:\\Windows\\Fonts\\meiryo.ttc", 0),
-            ("/Library/Fonts/Apple SD Gothic Neo.ttf", None),
-            ("/System/Library/Fonts/AppleSDGothicNeo.ttf", None),
-        ]
-        for path, idx in candidates:
-            if os.path.exists(path):
-                return path, idx
-        return None, None
 
-    def resolve_fallback_font() -> tuple[str | None, int | None]:
-        f_path = os.getenv("PDF_FONT_FALLBACK_PATH")
-        f_idx = os.getenv("PDF_FONT_FALLBACK_INDEX")
-        try:
-            f_idx_int = int(f_idx) if f_idx is not None else None
-        except Exception:
-            f_idx_int = None
-        if f_path and os.path.exists(f_path):
-            return f_path, f_idx_int
-        win_candidates: list[tuple[str, int | None]] = [
-            (r"C:\\Windows\\Fonts\\simsunb.ttf", None),
-            (r"C:\\Windows\\Fonts\\simsun.ttc", 1),
-        ]
-        for path, idx in win_candidates:
-            if os.path.exists(path):
-                return path, idx
-        return None, None
+def iter_export_entries(job_id: str):
+    return get_segment_cache().iter_entries(job_id, OUTPUT_FOLDER)
 
-    font_name = "Helvetica"
-    font_path, font_index = resolve_font()
-    if font_path:
-        try:
-            if font_index is not None:
-                pdfmetrics.registerFont(TTFont("EmbeddedCJK", font_path, subfontIndex=font_index))
-            else:
-                pdfmetrics.registerFont(TTFont("EmbeddedCJK", font_path))
-            font_name = "EmbeddedCJK"
-        except Exception:
-            font_name = "Helvetica"
 
-    fallback_name = None
-    f_path, f_index = resolve_fallback_font()
-    if f_path:
-        try:
-            if f_index is not None:
-                pdfmetrics.registerFont(TTFont("EmbeddedCJKFallback", f_path, subfontIndex=f_index))
-            else:
-                pdfmetrics.registerFont(TTFont("EmbeddedCJKFallback", f_path))
-            fallback_name = "EmbeddedCJKFallback"
-        except Exception:
-            fallback_name = None
-
-    buffer = BytesIO()
-    x_margin = 20 * mm
-    y_margin = 20 * mm
-
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=x_margin,
-        rightMargin=x_margin,
-        topMargin=y_margin,
-        bottomMargin=y_margin,
-    )
+def iter_file_text(path: str, chunk_size: int = 64 * 1024):
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk.encode("utf-8")
 
-    style = ParagraphStyle(
-        name="Body",
-        fontName=font_name,
-        fontSize=11,
-        leading=14,
-        wordWrap="CJK",
-    )
 
-    def inject_fallback_runs(s: str) -> str:
-        if not fallback_name:
-            return htmlmod.escape(s)
-        def needs_fb(code: int) -> bool:
-            return (
-                (0x3400 <= code <= 0x4DBF) or
-                (0x4E00 <= code <= 0x9FFF) or
-                (0xF900 <= code <= 0xFAFF) or
-                (0x20000 <= code <= 0x2A6DF) or
-                (0x2A700 <= code <= 0x2B73F) or
-                (0x2B740 <= code <= 0x2B81F) or
-                (0x2B820 <= code <= 0x2CEAF) or
-                (0x2CEB0 <= code <= 0x2EBEF) or
-                (0x30000 <= code <= 0x3134F)
-            )
-        out = []
-        using_fb = False
-        buf = []
-        def flush():
-            if not buf:
-                return
-            seg = htmlmod.escape("".join(buf))
-            if using_fb:
-                out.append(f"<font name=\"{fallback_name}\">" + seg + "</font>")
-            else:
-                out.append(seg)
-            buf.clear()
-        for ch in s:
-            code = ord(ch)
-            need_fb = needs_fb(code)
-            if need_fb != using_fb:
-                flush()
-                using_fb = need_fb
-            buf.append(ch)
-        flush()
-        return "".join(out)
-
-    # 라인 원본: 타임스탬프/화자 옵션이면 SRT 사용
-    lines = None
-    if ts or spk:
-        entries = parse_srt_entries(job_id)
-        if entries:
-            def make_line(e: dict) -> str:
-                parts = []
-                if ts and e.get("start"):
-                    parts.append(f"[{e['start']}]")
-                if spk and e.get("speaker"):
-                    parts.append(f"[화자 {e['speaker']}]")
-                prefix = (" ".join(parts) + " ") if parts else ""
-                return prefix + e["text"]
-            lines = [make_line(e) for e in entries]
-    if lines is None:
-        lines = plain.splitlines()
-
-    story = []
+def iter_batched_lines(lines, sep: str = "\n"):
+    # 줄 사이에만 구분자 (기존 "\n".join 결과와 동일), EXPORT_STREAM_BATCH줄씩 묶어 전송
+    buf = []
+    first = True
     for line in lines:
-        if not str(line).strip():
-            story.append(Spacer(1, 6))
-        else:
-            safe = inject_fallback_runs(str(line)).replace("\t", "&emsp;&emsp;")
-            story.append(Paragraph(safe, style))
+        buf.append(line if first else sep + line)
+        first = False
+        if len(buf) >= EXPORT_STREAM_BATCH:
+            yield "".join(buf).encode("utf-8")
+            buf = []
+    if buf:
+        yield "".join(buf).encode("utf-8")
 
-    doc.build(story)
-    buffer.seek(0)
-    headers = {"Content-Disposition": f"attachment; filename=transcript_{job_id}.pdf"}
-    return StreamingResponse(buffer, media_type="application/pdf", headers=headers)
+
+def peek(iterator):
+    """(첫 항목|None, 첫 항목을 포함한 반복자). 스트리밍 전에 404 여부를 판단할 때 사용."""
+    iterator = iter(iterator)
+    for first in iterator:
+        return first, itertools.chain([first], iterator)
+    return None, iter(())
 
 
 # 내보내기: TXT (타임스탬프 옵션)
-@app.get("/export/txt/{job_id}")
-def export_txt(job_id: str, ts: int = 0, spk: int = 0):
-    txt_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.txt")
+def txt_export_chunks(job_id: str, ts: int = 0, spk: int = 0):
+    txt_path = resolve_output(OUTPUT_FOLDER, job_id, "txt")
     if not os.path.exists(txt_path):
         raise HTTPException(status_code=404, detail="TXT 파일을 찾을 수 없습니다")
     if ts or spk:
-        entries = parse_srt_entries(job_id)
-        if entries:
-            lines = []
-            for e in entries:
-                parts = []
-                if ts and e.get("start"):
-                    parts.append(f"[{e['start']}]")
-                if spk and e.get("speaker"):
-                    parts.append(f"[화자 {e['speaker']}]")
-                prefix = (" ".join(parts) + " ") if parts else ""
-                lines.append(prefix + e["text"])
-            out = "\n".join(lines)
-        else:
-            with open(txt_path, "r", encoding="utf-8") as f:
-                out = f.read()
-    else:
-        with open(txt_path, "r", encoding="utf-8") as f:
-            out = f.read()
-    buffer = BytesIO(out.encode("utf-8"))
+        first, entries = peek(iter_export_entries(job_id))
+        if first is not None:
+            return iter_batched_lines(export_line(e, ts, spk) for e in entries)
+    return iter_file_text(txt_path)
+
+
+@app.get("/export/txt/{job_id}")
+def export_txt(job_id: str, ts: int = 0, spk: int = 0):
     headers = {"Content-Disposition": f"attachment; filename=transcript_{job_id}.txt"}
-    return StreamingResponse(buffer, media_type="text/plain; charset=utf-8", headers=headers)
+    return StreamingResponse(txt_export_chunks(job_id, ts, spk), media_type="text/plain; charset=utf-8", headers=headers)
 
 
 # 내보내기: CSV (start,end,text)
-@app.get("/export/csv/{job_id}")
-def export_csv(job_id: str, spk: int = 0):
-    entries = parse_srt_entries(job_id)
-    if not entries:
+def csv_export_chunks(job_id: str, spk: int = 0):
+    first, entries = peek(iter_export_entries(job_id))
+    if first is None:
         raise HTTPException(status_code=404, detail="SRT 파일을 찾을 수 없습니다")
-    buffer = BytesIO()
-    writer = csv.writer(buffer, lineterminator='\n')
-    header = ["start", "end"]
-    if spk:
-        header.append("speaker")
-    header.append("text")
-    writer.writerow(header)
-    for e in entries:
-        row = [e["start"], e["end"]]
+
+    def generate():
+        # csv.writer는 텍스트 버퍼에 쓰고, 배치마다 비워서 UTF-8로 전송
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        header = ["start", "end"]
         if spk:
-            row.append(e.get("speaker", ""))
-        row.append(e["text"])
-        writer.writerow(row)
-    buffer.seek(0)
+            header.append("speaker")
+        header.append("text")
+        writer.writerow(header)
+        for i, e in enumerate(entries, start=1):
+            row = [e["start"], e["end"]]
+            if spk:
+                row.append(e.get("speaker", ""))
+            row.append(e["text"])
+            writer.writerow(row)
+            if i % EXPORT_STREAM_BATCH == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    return generate()
+
+
+@app.get("/export/csv/{job_id}")
+def export_csv(job_id: str, spk: int = 0):
     headers = {"Content-Disposition": f"attachment; filename=transcript_{job_id}.csv"}
-    return StreamingResponse(buffer, media_type="text/csv; charset=utf-8", headers=headers)
+    return StreamingResponse(csv_export_chunks(job_id, spk), media_type="text/csv; charset=utf-8", headers=headers)
 
 
-# 내보내기: VTT (SRT 변환)
-@app.get("/export/vtt/{job_id}")
-def export_vtt(job_id: str):
-    srt_path = os.path.join(OUTPUT_FOLDER, f"{job_id}.srt")
+# 내보내기: VTT (SRT 변환, 한 줄씩 읽어 변환)
+def vtt_export_chunks(job_id: str):
+    srt_path = resolve_output(OUTPUT_FOLDER, job_id, "srt")
     if not os.path.exists(srt_path):
         raise HTTPException(status_code=404, detail="SRT 파일을 찾을 수 없습니다")
-    with open(srt_path, "r", encoding="utf-8") as f:
-        srt_text = f.read()
-    # 번호 라인 제거, 콤마를 점으로
-    lines = []
-    for line in srt_text.splitlines():
-        if re.match(r"^\d+$", line.strip()):
-            continue
-        line = re.sub(r"(\d{2}:\d{2}:\d{2}),(\d{1,3})\s*-->\s*(\d{2}:\d{2}:\d{2}),(\d{1,3})",
-                      lambda m: f"{m.group(1)}.{m.group(2).zfill(3)} --> {m.group(3)}.{m.group(4).zfill(3)}", line)
-        lines.append(line)
-    vtt = "WEBVTT\n\n" + "\n".join(lines)
-    buffer = BytesIO(vtt.encode("utf-8"))
+
+    def vtt_lines():
+        # 번호 라인 제거, 콤마를 점으로
+        with open(srt_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if re.match(r"^\d+$", line.strip()):
+                    continue
+                yield re.sub(r"(\d{2}:\d{2}:\d{2}),(\d{1,3})\s*-->\s*(\d{2}:\d{2}:\d{2}),(\d{1,3})",
+                             lambda m: f"{m.group(1)}.{m.group(2).zfill(3)} --> {m.group(3)}.{m.group(4).zfill(3)}", line)
+
+    def generate():
+        yield "WEBVTT\n\n".encode("utf-8")
+        yield from iter_batched_lines(vtt_lines())
+
+    return generate()
+
+
+@app.get("/export/vtt/{job_id}")
+def export_vtt(job_id: str):
     headers = {"Content-Disposition": f"attachment; filename=transcript_{job_id}.vtt"}
-    return StreamingResponse(buffer, media_type="text/vtt; charset=utf-8", headers=headers)
\ No newline at end of file
+    return StreamingResponse(vtt_export_chunks(job_id), media_type="text/vtt; charset=utf-8", headers=headers)
+
+
+# 묶음 내보내기: 여러 작업 × 여러 형식을 한 요청의 스트리밍 ZIP으로
+BUNDLE_FORMATS = ("pdf", "docx", "txt", "csv", "srt", "vtt")
+
+
+def bundle_member(job_id: str, fmt: str, ts: int, spk: int):
+    """render(임시 디렉터리) → 파일 경로. PDF/DOCX는 렌더 캐시 파일, SRT는 원본, 나머지는 임시 파일."""
+    def render(tmp: str) -> str:
+        if fmt in ("pdf", "docx"):
+            return rendered_export(job_id, fmt, ts, spk, render_pdf if fmt == "pdf" else render_docx)
+        if fmt == "srt":
+            path = resolve_output(OUTPUT_FOLDER, job_id, "srt")
+            if not os.path.exists(path):
+                raise HTTPException(status_code=404, detail="SRT 파일을 찾을 수 없습니다")
+            return path
+        if fmt == "txt":
+            chunks = txt_export_chunks(job_id, ts, spk)
+        elif fmt == "csv":
+            chunks = csv_export_chunks(job_id, spk)
+        else:
+            chunks = vtt_export_chunks(job_id)
+        return spool_chunks(chunks, os.path.join(tmp, f"{uuid.uuid4().hex}.{fmt}"))
+    return render
+
+
+@app.post("/export/bundle")
+async def export_bundle(request: Request):
+    """
+    본문: {"job_ids": [...], "formats": ["pdf","txt",...], "ts": 0|1, "spk": 0|1}
+    또는 같은 필드의 폼(job_ids/formats 반복) — 브라우저가 폼 제출로 ZIP을 바로 내려받을 수 있게 (메모리에 모으지 않음)
+    ZIP 구조: 작업 1개면 transcript_{id}.{fmt}, 여러 개면 {id}/transcript_{id}.{fmt}
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            payload = await request.json()
+        except Exception:
+            raise HTTPException(status_code=400, detail="잘못된 본문")
+        if not isinstance(payload, dict):
+            raise HTTPException(status_code=400, detail="잘못된 본문")
+    else:
+        form = await request.form()
+        payload = {
+            "job_ids": form.getlist("job_ids"),
+            "formats": form.getlist("formats"),
+            "ts": str(form.get("ts") or "").lower() in ("1", "true", "yes", "on"),
+            "spk": str(form.get("spk") or "").lower() in ("1", "true", "yes", "on"),
+        }
+    job_ids = payload.get("job_ids") or []
+    formats = payload.get("formats") or []
+    if not isinstance(job_ids, list) or not isinstance(formats, list) or not job_ids or not formats:
+        raise HTTPException(status_code=400, detail="job_ids와 formats를 지정하세요")
+    try:
+        max_jobs = int(os.getenv("BUNDLE_MAX_JOBS", "500"))
+    except Exception:
+        max_jobs = 500
+    if len(job_ids) > max_jobs:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {max_jobs}개 작업까지 내보낼 수 있습니다")
+    bad = [f for f in formats if f not in BUNDLE_FORMATS]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식: {', '.join(map(str, bad))}")
+    ts = 1 if payload.get("ts") else 0
+    spk = 1 if payload.get("spk") else 0
+
+    ids = list(dict.fromkeys(os.path.basename(str(j).strip()) for j in job_ids if str(j).strip()))
+    ids = [j for j in ids if j]
+    if not ids:
+        raise HTTPException(status_code=400, detail="job_ids와 formats를 지정하세요")
+    members = []
+    for job_id in ids:
+        for fmt in dict.fromkeys(formats):
+            name = f"transcript_{job_id}.{fmt}"
+            arcname = name if len(ids) == 1 else f"{job_id}/{name}"
+            members.append((arcname, bundle_member(job_id, fmt, ts, spk), fmt not in ("pdf", "docx")))
+    try:
+        workers = max(1, int(os.getenv("BUNDLE_WORKERS", "4")))
+    except Exception:
+        workers = 4
+    filename = f"transcript_{ids[0]}.zip" if len(ids) == 1 else f"transcripts_{len(ids)}.zip"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    return StreamingResponse(stream_zip(members, workers=workers), media_type="application/zip", headers=headers)
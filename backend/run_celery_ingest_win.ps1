@@ -0,0 +1,6 @@
+$ErrorActionPreference = "Stop"
+Set-Location $PSScriptRoot
+# 재생목록/채널 수집 전용 워커 (celery_app.INGEST_QUEUE). 전사는 run_celery_win.ps1 워커가 처리
+$queue = $env:CELERY_INGEST_QUEUE
+if (-not $queue) { $queue = "ingest" }
+celery -A celery_app.celery_app worker -P solo -Q $queue -n "ingest@%h" -l info
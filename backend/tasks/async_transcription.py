@@ -1,89 +1,160 @@
 from celery_app import celery_app
-from tasks.video_processing import extract_audio, convert_wav_to_mp3
-from tasks.transcription import TranscriptionService
-from tasks.url_download import download_media_via_ytdlp
+from tasks.video_processing import load_audio_pcm
+from tasks.job_stages import process_audio
+from tasks.model_pool import get_transcription_service
+from tasks.url_download import download_media_via_ytdlp, canonical_media_key
+from tasks.playlist_ingest import expand_playlist, run_downloads
+from tasks.url_stream import PcmStream, resolve_audio_stream, stream_cache_mode, stream_mode_enabled, transcribe_stream
+from tasks.result_cache import get_result_cache, hash_audio, make_key, transcription_params
+from utils.artifacts import describe, discard_artifact, output_file, record_artifacts
+from utils.lifecycle import claim_sweep_slot, relieve_disk_pressure, sweep_storage
+from utils.progress import ProgressReporter
+from utils.job_store import get_job_store, record_job, record_result
+from celery.signals import task_postrun, worker_process_init
 import os
-import json
+import threading
+import uuid
 
 
-import os
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # backend
 UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-transcription_service = TranscriptionService(model_size=os.getenv("WHISPER_MODEL_SIZE", "base"))
+# 기본 모델은 워커 시작 시 풀에 미리 적재 (모듈 전역에 잡아 두지 않음: 풀 축출 시 메모리가 풀려야 함)
+get_transcription_service(os.getenv("WHISPER_MODEL_SIZE", "base"))
 
 
-@celery_app.task(bind=True)
-def transcribe_video_async(self, video_path: str, language: str = "ko", diarize: bool = False, model_size: str | None = None):
+@worker_process_init.connect
+def _preload_diarization(**_kwargs):
+    # DIARIZATION_PRELOAD=1 이면 워커 프로세스마다 pyannote 파이프라인을 미리 구성
+    if os.getenv("DIARIZATION_PRELOAD", "false").lower() not in ("1", "true", "yes"):
+        return
+    try:
+        from tasks.diarization import preload_diarization_pipeline
+        preload_diarization_pipeline()
+    except Exception:
+        pass
+
+
+def lookup_cached_result(content_id: str, job_id: str, language: str | None, diarize: bool, model_size: str | None,
+                         alias: bool = False, output_dir: str = OUTPUT_DIR, mode: str | None = None) -> dict | None:
+    """
+    결과 캐시 조회. 적중하면 txt/srt/mp3를 outputs/{job_id}.* 로 즉시 배치하고 작업 결과 dict 반환.
+    alias=True: 업로드 원본 해시/정규화 URL 등 원본 식별자, False: 디코딩 오디오 해시.
+    mode: 스트리밍 전사처럼 전체 디코딩과 다른 경로의 결과를 찾을 때 (transcription_params 참고).
+    """
+    cache = get_result_cache()
+    if cache is None or not content_id:
+        return None
+    key = make_key(content_id, transcription_params(model_size, language, diarize, mode))
+    found = cache.resolve(alias=key) if alias else cache.resolve(key=key)
+    if not found:
+        return None
+    cached = cache.materialize(found, job_id, output_dir)
+    if cached is None:
+        return None
+    record_artifacts(job_id, [describe(ext, output_file(output_dir, job_id, ext), "cache")
+                              for ext in cached.get("artifacts", [])])
+    cues = cached.get("cues")
+    if cues is None:
+        # 큐가 없는 이전 캐시 엔트리: 구간/화자 턴으로 다시 계산
+        try:
+            from tasks.diarization import numbered_cues
+            cues = numbered_cues(cached.get("segments", []), cached.get("speakers"))
+        except Exception:
+            cues = []
+    record_result(job_id, cached.get("text", ""), cues, language=cached.get("language"),
+                  model=model_size, diarize=bool(diarize), cached=True)
+    return {
+        "success": True,
+        "job_id": job_id,
+        "text": cached.get("text", ""),
+        "txt_file": f"outputs/{job_id}.txt",
+        "srt_file": f"outputs/{job_id}.srt",
+        "audio_mp3": f"outputs/{job_id}.mp3" if "mp3" in cached.get("artifacts", []) else None,
+        "language": cached.get("language"),
+        "speakers": cached.get("speakers"),
+        "diarize_requested": bool(diarize),
+        "original_filename": cached.get("original_filename"),
+        "cached": True,
+    }
+
+
+def store_cached_result(audio_id: str, job_id: str, language: str | None, diarize: bool, model_size: str | None,
+                        transcription_result: dict, speakers, source_ids: list | None = None,
+                        original_filename: str | None = None, output_dir: str = OUTPUT_DIR,
+                        cues: list | None = None, mode: str | None = None) -> None:
+    """완료된 산출물을 결과 캐시에 저장하고 원본 식별자(업로드 해시/URL)를 별칭으로 연결."""
+    cache = get_result_cache()
+    if cache is None:
+        return
     try:
-        self.update_state(state="PROGRESS", meta={"progress": 10})
+        params = transcription_params(model_size, language, diarize, mode)
+        payload = {
+            "text": transcription_result.get("text", ""),
+            "language": transcription_result.get("language"),
+            "segments": transcription_result.get("segments", []),
+            "speakers": speakers,
+            "cues": cues,
+            "original_filename": original_filename,
+        }
+        aliases = [make_key(sid, params) for sid in (source_ids or []) if sid]
+        cache.store(make_key(audio_id, params), job_id, output_dir, payload, aliases=aliases)
+    except Exception as e:
+        print(f"결과 캐시 저장 실패: {e}")
 
-        audio_path = os.path.splitext(video_path)[0] + ".wav"
-        success, result = extract_audio(video_path, audio_path)
-        if not success:
-            return {"success": False, "error": result}
 
-        self.update_state(state="PROGRESS", meta={"progress": 30})
+@celery_app.task(bind=True)
+def transcribe_video_async(self, video_path: str, language: str = "ko", diarize: bool = False, model_size: str | None = None,
+                           source_hash: str | None = None, original_filename: str | None = None,
+                           source_id: str | None = None):
+    job_id = os.path.basename(video_path).split("_")[0]
+    try:
+        # video_path는 {job_id}_{original} 형태 (스트리밍 수집은 추출된 WAV라 원본 이름을 따로 받음)
+        original_filename = original_filename or os.path.basename(video_path).split("_", 1)[-1]
+        record_job(job_id, status="processing", language=language, model=model_size, diarize=diarize)
+        reporter = ProgressReporter(self, job_id=job_id)
+        reporter.progress(10)
+
+        # 원본을 한 번만 디코딩해 메모리 버퍼로 공유 (중간 WAV 없음)
+        success, audio = load_audio_pcm(video_path)
+        if not success:
+            return {"success": False, "error": audio}
 
-        # 요청 모델과 기본 모델 비교하여 인스턴스 선택
-        env_default = os.getenv("WHISPER_MODEL_SIZE", "base").strip()
-        use_model = (model_size or env_default).strip()
-        svc = transcription_service if use_model == env_default else TranscriptionService(model_size=use_model)
+        # 같은 오디오 + 같은 파라미터의 결과가 있으면 전사/화자 분리 생략
+        audio_id = hash_audio(audio)
+        cached = lookup_cached_result(audio_id, job_id, language, diarize, model_size)
+        if cached:
+            return cached
 
-        transcription_result = svc.transcribe(audio_path, language)
-        if not transcription_result.get("success"):
-            return {"success": False, "error": transcription_result.get("error", "전사 실패")}
+        reporter.progress(30)
 
-        # (선택) 화자 분리: pyannote.audio 설치 여부에 따라 안전하게 건너뜀
-        speakers = None
-        if diarize:
-            try:
-                from tasks.diarization import diarize_audio
-                speakers = diarize_audio(audio_path)
-            except Exception:
-                speakers = None
+        # 요청 모델은 프로세스 모델 풀에서 재사용 (없으면 1회 로딩)
+        svc = get_transcription_service(model_size)
 
-        self.update_state(state="PROGRESS", meta={"progress": 90})
+        # 전사/화자 분리/MP3를 동시에 실행하고 화자 태그 SRT에서만 합류
+        stages = process_audio(svc, audio, job_id, language, diarize, OUTPUT_DIR,
+                               progress_cb=reporter.audio, segment_cb=reporter.segment)
+        if not stages.get("success"):
+            return {"success": False, "error": stages.get("error", "전사 실패")}
+        transcription_result = stages["transcription"]
+        speakers = stages["speakers"]
+        mp3_path = stages["mp3_path"]
 
-        job_id = os.path.basename(video_path).split("_")[0]
-        output_txt = os.path.join(OUTPUT_DIR, f"{job_id}.txt")
-        output_srt = os.path.join(OUTPUT_DIR, f"{job_id}.srt")
-        svc.save_transcription(transcription_result, output_txt)
-        # 화자 분리가 있으면 SRT에 화자 태그를 프리픽스
-        if speakers:
-            try:
-                from tasks.diarization import write_srt_with_speakers
-                write_srt_with_speakers(transcription_result["segments"], speakers, output_srt)
-            except Exception:
-                svc.create_srt(transcription_result["segments"], output_srt)
-        else:
-            svc.create_srt(transcription_result["segments"], output_srt)
+        reporter.progress(90, timings=stages["timings"])
 
-        # 메타 파일 보강: 업로드 시 저장이 실패한 경우 대비
+        # 메타 보강: 업로드 시 기록이 실패했거나 원본 이름이 없는 경우 대비
         try:
-            meta_path = os.path.join(OUTPUT_DIR, f"{job_id}.json")
-            if not os.path.exists(meta_path):
-                # video_path는 {job_id}_{original} 형태
-                original_filename = os.path.basename(video_path).split("_", 1)[1] if "_" in os.path.basename(video_path) else os.path.basename(video_path)
-                with open(meta_path, "w", encoding="utf-8") as mf:
-                    json.dump({"job_id": job_id, "original_filename": original_filename}, mf, ensure_ascii=False)
+            job = get_job_store().get_job(job_id, with_text=False)
+            if not job or not job.get("original_filename"):
+                record_job(job_id, original_filename=original_filename)
         except Exception:
             pass
 
-        # MP3 생성 (출력 폴더, 절대경로)
-        try:
-            mp3_path = os.path.join(OUTPUT_DIR, f"{job_id}.mp3")
-            ok, _ = convert_wav_to_mp3(audio_path, mp3_path)
-        except Exception:
-            mp3_path = None
-
-        try:
-            os.remove(video_path)
-            os.remove(audio_path)
-        except Exception:
-            pass
+        store_cached_result(audio_id, job_id, language, diarize, model_size, transcription_result, speakers,
+                            source_ids=[f"upload:{source_hash}" if source_hash else None, source_id],
+                            original_filename=original_filename, cues=stages["cues"])
 
         return {
             "success": True,
@@ -91,20 +162,143 @@ def transcribe_video_async(self, video_path: str, language: str = "ko", diarize:
             "text": transcription_result["text"],
             "txt_file": f"outputs/{job_id}.txt",
             "srt_file": f"outputs/{job_id}.srt",
-            "audio_mp3": f"outputs/{job_id}.mp3" if mp3_path and os.path.exists(mp3_path) else None,
+            "audio_mp3": f"outputs/{job_id}.mp3" if mp3_path else None,
             "speakers": speakers,
             "diarize_requested": bool(diarize),
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
+    finally:
+        # 성공/실패/캐시 적중 모두 원본 정리 (워커가 죽어 여기까지 못 오면 보존 정리의 고아/TTL 단계가 처리)
+        discard_artifact(job_id, video_path)
+
+
+@task_postrun.connect
+def _publish_done(sender=None, task_id=None, args=None, kwargs=None, retval=None, state=None, **_kwargs):
+    # 전사 작업 종료(성공/실패/캐시 적중 포함)를 실시간 구독자에게 알림
+    if sender not in (transcribe_video_async, transcribe_url_async):
+        return
+    ok = isinstance(retval, dict) and bool(retval.get("success"))
+    error = None if ok else (retval.get("error") if isinstance(retval, dict) else str(retval))
+    ProgressReporter(task_id=task_id).done(ok, error)
+    # 실패 상태 기록 (성공 결과는 저장 단계에서 이미 기록됨)
+    if not ok:
+        job_id = _job_id_from_call(sender, args, kwargs)
+        if job_id:
+            record_job(job_id, status="failed", error=error)
+
+
+def _job_id_from_call(sender, args, kwargs) -> str | None:
+    args = list(args or [])
+    kwargs = kwargs or {}
+    if sender is transcribe_video_async:
+        video_path = kwargs.get("video_path") or (args[0] if args else None)
+        return os.path.basename(video_path).split("_")[0] if video_path else None
+    return kwargs.get("job_id") or (args[1] if len(args) > 1 else None)
+
+
+def transcribe_url_streaming(task, url: str, job_id: str, language: str | None, diarize: bool,
+                             model_size: str | None, source_id: str) -> dict | None:
+    """
+    스트리밍 URL 모드: 오디오 스트림을 받는 즉시 PCM으로 디코딩하고 30초 창 단위로 바로 전사.
+    전사가 끝나면 모인 PCM 버퍼로 화자 분리/MP3/txt/srt/색인 단계를 이어서 수행한다.
+    직접 받을 수 있는 HTTP 오디오 포맷이 없거나 첫 구간 전에 실패하면 None (기존 다운로드 경로로 폴백).
+    """
+    ok, src = resolve_audio_stream(url)
+    if not ok:
+        print(f"스트리밍 모드 불가, 다운로드 후 전사로 진행: {src.get('error')}")
+        return None
+    try:
+        max_mb = os.getenv("YTDLP_MAX_MB")
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else None
+    except Exception:
+        max_bytes = None
+    if max_bytes and src.get("filesize") and src["filesize"] > max_bytes:
+        return {"success": False, "error": "파일이 너무 큽니다"}
+
+    original_title = str(src.get("title") or url)
+    record_job(job_id, original_filename=original_title, source_url=url, streamed=True)
+    # 진행률 10~85%: 다운로드/전사 위치, 이후 후처리 단계
+    reporter = ProgressReporter(task, job_id=job_id, start_pct=10, end_pct=85)
+    reporter.progress(10)
+    svc = get_transcription_service(model_size)
+    emitted = []
+
+    def on_segment(seg):
+        emitted.append(seg.get("id"))
+        reporter.segment(seg)
+
+    stream = PcmStream(src["stream_url"], src.get("headers") or {}, total_bytes=src.get("filesize"),
+                       chunk_size=src.get("chunk_size"), max_bytes=max_bytes).start()
+    try:
+        transcription = transcribe_stream(svc, stream, language, progress_cb=reporter.stream,
+                                          segment_cb=on_segment, total_sec=src.get("duration"))
+    except Exception as e:
+        if emitted:
+            return {"success": False, "error": str(e)}
+        print(f"스트리밍 전사 실패, 다운로드 후 전사로 진행: {e}")
+        return None
+    finally:
+        stream.close()
+
+    audio = stream.audio()
+    stages = process_audio(svc, audio, job_id, language, diarize, OUTPUT_DIR, transcription=transcription)
+    if not stages.get("success"):
+        return {"success": False, "error": stages.get("error", "전사 실패")}
+    speakers = stages["speakers"]
+    mp3_path = stages["mp3_path"]
+    reporter.progress(90, timings=stages["timings"])
+
+    # 창 단위 전사 결과라 전체 디코딩 결과와 다른 키로 저장 (이후 일반 요청이 이 결과를 받지 않도록)
+    store_cached_result(hash_audio(audio), job_id, language, diarize, model_size, transcription, speakers,
+                        source_ids=[source_id], original_filename=original_title, cues=stages["cues"],
+                        mode=stream_cache_mode())
+    return {
+        "success": True,
+        "job_id": job_id,
+        "text": transcription["text"],
+        "txt_file": f"outputs/{job_id}.txt",
+        "srt_file": f"outputs/{job_id}.srt",
+        "audio_mp3": f"outputs/{job_id}.mp3" if mp3_path else None,
+        "speakers": speakers,
+        "diarize_requested": bool(diarize),
+        "original_filename": original_title,
+        "source_url": url,
+        "streamed": True,
+    }
 
 
 # URL 비동기 전사
 @celery_app.task(bind=True)
-def transcribe_url_async(self, url: str, job_id: str, language: str = "ko", diarize: bool = False, model_size: str | None = None):
+def transcribe_url_async(self, url: str, job_id: str, language: str = "ko", diarize: bool = False, model_size: str | None = None,
+                         stream: bool | None = None):
+    video_path = None
     try:
-        # 1) 다운로드 진행
-        self.update_state(state="PROGRESS", meta={"progress": 5})
+        record_job(job_id, status="processing", source_url=url, language=language, model=model_size, diarize=diarize)
+        reporter = ProgressReporter(self, job_id=job_id)
+        # 0) 같은 링크(정규화 URL/영상 id)의 결과가 있으면 다운로드부터 생략
+        #    스트리밍 요청은 전체 디코딩 결과가 없으면 이전 스트리밍 결과도 사용
+        use_stream = stream_mode_enabled() if stream is None else bool(stream)
+        source_id = canonical_media_key(url)
+        cached = lookup_cached_result(source_id, job_id, language, diarize, model_size, alias=True)
+        if not cached and use_stream:
+            cached = lookup_cached_result(source_id, job_id, language, diarize, model_size, alias=True,
+                                          mode=stream_cache_mode())
+        if cached:
+            cached["original_filename"] = cached.get("original_filename") or url
+            cached["source_url"] = url
+            record_job(job_id, original_filename=cached["original_filename"], source_url=url)
+            return cached
+
+        # 스트리밍 모드: 다운로드와 디코딩/전사를 겹쳐 첫 구간을 바로 내보냄 (불가하면 아래 경로로 폴백)
+        if use_stream:
+            streamed = transcribe_url_streaming(self, url, job_id, language, diarize, model_size, source_id)
+            if streamed is not None:
+                return streamed
+
+        # 1) 다운로드 진행 (디스크 여유가 부족하면 먼저 오래된 파일 축출, 정리 중인 곳이 있으면 대기 없이 진행)
+        reporter.progress(5)
+        relieve_disk_pressure(UPLOAD_DIR)
         ok, dl = download_media_via_ytdlp(url, job_id, UPLOAD_DIR)
         if not ok:
             return {"success": False, "error": dl.get("error", "다운로드 실패")}
@@ -112,77 +306,42 @@ def transcribe_url_async(self, url: str, job_id: str, language: str = "ko", diar
         original_title = str(dl.get("title") or os.path.basename(video_path))
 
         # 메타 보강
-        try:
-            meta_path = os.path.join(OUTPUT_DIR, f"{job_id}.json")
-            payload = {"job_id": job_id, "original_filename": original_title, "source_url": url}
-            if os.path.exists(meta_path):
-                # 기존 메타와 병합
-                try:
-                    with open(meta_path, "r", encoding="utf-8") as mf:
-                        prev = json.load(mf)
-                    prev.update(payload)
-                    payload = prev
-                except Exception:
-                    pass
-            with open(meta_path, "w", encoding="utf-8") as mf:
-                json.dump(payload, mf, ensure_ascii=False)
-        except Exception:
-            pass
+        record_job(job_id, original_filename=original_title, source_url=url)
 
         # 2) 오디오 추출
-        self.update_state(state="PROGRESS", meta={"progress": 15})
-        audio_path = os.path.join(UPLOAD_DIR, f"{job_id}.wav")
-        success, result = extract_audio(video_path, audio_path)
+        reporter.progress(15)
+        success, audio = load_audio_pcm(video_path)
         if not success:
-            return {"success": False, "error": result}
-
-        self.update_state(state="PROGRESS", meta={"progress": 30})
-
-        # 3) 모델 선택 후 전사
-        env_default = os.getenv("WHISPER_MODEL_SIZE", "base").strip()
-        use_model = (model_size or env_default).strip()
-        svc = transcription_service if use_model == env_default else TranscriptionService(model_size=use_model)
-        transcription_result = svc.transcribe(audio_path, language)
-        if not transcription_result.get("success"):
-            return {"success": False, "error": transcription_result.get("error", "전사 실패")}
-
-        # 4) 화자 분리(선택)
-        speakers = None
-        if diarize:
-            try:
-                from tasks.diarization import diarize_audio
-                speakers = diarize_audio(audio_path)
-            except Exception:
-                speakers = None
-
-        self.update_state(state="PROGRESS", meta={"progress": 90})
-
-        # 5) 결과 저장
-        output_txt = os.path.join(OUTPUT_DIR, f"{job_id}.txt")
-        output_srt = os.path.join(OUTPUT_DIR, f"{job_id}.srt")
-        svc.save_transcription(transcription_result, output_txt)
-        if speakers:
-            try:
-                from tasks.diarization import write_srt_with_speakers
-                write_srt_with_speakers(transcription_result["segments"], speakers, output_srt)
-            except Exception:
-                svc.create_srt(transcription_result["segments"], output_srt)
-        else:
-            svc.create_srt(transcription_result["segments"], output_srt)
-
-        # 6) MP3 생성
-        try:
-            mp3_path = os.path.join(OUTPUT_DIR, f"{job_id}.mp3")
-            ok2, _ = convert_wav_to_mp3(audio_path, mp3_path)
-        except Exception:
-            mp3_path = None
-
-        # 7) 정리
-        try:
-            os.remove(video_path)
-            os.remove(audio_path)
-        except Exception:
-            pass
+            return {"success": False, "error": audio}
+
+        # 다른 링크/업로드로 들어온 같은 오디오면 전사 생략
+        audio_id = hash_audio(audio)
+        cached = lookup_cached_result(audio_id, job_id, language, diarize, model_size)
+        if cached:
+            cache = get_result_cache()
+            if cache is not None:
+                params = transcription_params(model_size, language, diarize)
+                cache.add_alias(make_key(source_id, params), make_key(audio_id, params))
+            cached.update({"original_filename": original_title, "source_url": url})
+            return cached
+
+        reporter.progress(30)
+
+        # 3) 모델 선택 (프로세스 모델 풀)
+        svc = get_transcription_service(model_size)
+        # 4) 전사/화자 분리/MP3 동시 실행 후 결과 저장
+        stages = process_audio(svc, audio, job_id, language, diarize, OUTPUT_DIR,
+                               progress_cb=reporter.audio, segment_cb=reporter.segment)
+        if not stages.get("success"):
+            return {"success": False, "error": stages.get("error", "전사 실패")}
+        transcription_result = stages["transcription"]
+        speakers = stages["speakers"]
+        mp3_path = stages["mp3_path"]
+
+        reporter.progress(90, timings=stages["timings"])
+
+        store_cached_result(audio_id, job_id, language, diarize, model_size, transcription_result, speakers,
+                            source_ids=[source_id], original_filename=original_title, cues=stages["cues"])
 
         return {
             "success": True,
@@ -190,7 +349,7 @@ def transcribe_url_async(self, url: str, job_id: str, language: str = "ko", diar
             "text": transcription_result["text"],
             "txt_file": f"outputs/{job_id}.txt",
             "srt_file": f"outputs/{job_id}.srt",
-            "audio_mp3": f"outputs/{job_id}.mp3" if mp3_path and os.path.exists(mp3_path) else None,
+            "audio_mp3": f"outputs/{job_id}.mp3" if mp3_path else None,
             "speakers": speakers,
             "diarize_requested": bool(diarize),
             "original_filename": original_title,
@@ -198,6 +357,9 @@ def transcribe_url_async(self, url: str, job_id: str, language: str = "ko", diar
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
+    finally:
+        # 5) 정리: 성공/실패 모두 다운로드 원본 삭제
+        discard_artifact(job_id, video_path)
 
 
 # URL 다운로드만 수행 (전사 X)
@@ -214,6 +376,7 @@ def download_url_async(self, url: str, job_id: str):
             except Exception:
                 pass
 
+        relieve_disk_pressure(UPLOAD_DIR)
         ok, dl = download_media_via_ytdlp(url, job_id, UPLOAD_DIR, progress_cb=progress_cb)
         if not ok:
             return {"success": False, "error": dl.get("error", "다운로드 실패")}
@@ -221,13 +384,7 @@ def download_url_async(self, url: str, job_id: str):
         original_title = str(dl.get("title") or os.path.basename(video_path))
 
         # 메타 저장
-        try:
-            meta_path = os.path.join(OUTPUT_DIR, f"{job_id}.json")
-            payload = {"job_id": job_id, "original_filename": original_title, "source_url": url}
-            with open(meta_path, "w", encoding="utf-8") as mf:
-                json.dump(payload, mf, ensure_ascii=False)
-        except Exception:
-            pass
+        record_job(job_id, status="downloaded", original_filename=original_title, source_url=url)
 
         # 파일 크기
         try:
@@ -246,3 +403,95 @@ def download_url_async(self, url: str, job_id: str):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+
+# 재생목록/채널 수집: 항목을 펼쳐 제한된 동시성으로 다운로드하고, 끝난 항목부터 전사 큐에 투입
+@celery_app.task(bind=True)
+def ingest_playlist_async(self, url: str, batch_id: str, language: str | None = "ko", diarize: bool = False,
+                          model_size: str | None = None, limit: int | None = None):
+    store = get_job_store()
+    try:
+        store.upsert_batch(batch_id, status="expanding")
+        self.update_state(state="PROGRESS", meta={"progress": 1, "stage": "expanding"})
+        ok, pl = expand_playlist(url, limit)
+        if not ok:
+            store.upsert_batch(batch_id, status="failed", error=pl.get("error"))
+            return {"success": False, "error": pl.get("error", "재생목록 확장 실패")}
+
+        items = []
+        for entry in pl["entries"]:
+            job_id = str(uuid.uuid4())
+            items.append({"job_id": job_id, "task_id": None, "kind": "url", "source": entry["url"]})
+            record_job(job_id, status="queued", original_filename=entry.get("title") or entry["url"],
+                       source_url=entry["url"], language=language, model=model_size, diarize=diarize, batch_id=batch_id)
+        store.save_batch(batch_id, items)
+        store.upsert_batch(batch_id, title=pl.get("title"), entry_count=len(items), status="downloading")
+
+        counts = {"queued": 0, "cached": 0, "failed": 0}
+        lock = threading.Lock()
+
+        def fetch(pos: int, ratelimit: int | None) -> str:
+            item = items[pos]
+            job_id, entry_url = item["job_id"], item["source"]
+            source_id = canonical_media_key(entry_url)
+            cached = lookup_cached_result(source_id, job_id, language, diarize, model_size, alias=True)
+            if cached:
+                record_job(job_id, source_url=entry_url)
+                return "cached"
+            record_job(job_id, status="downloading")
+            relieve_disk_pressure(UPLOAD_DIR)
+            ok, dl = download_media_via_ytdlp(entry_url, job_id, UPLOAD_DIR, ratelimit=ratelimit)
+            if not ok:
+                raise RuntimeError(dl.get("error", "다운로드 실패"))
+            title = str(dl.get("title") or os.path.basename(dl["path"]))
+            record_job(job_id, status="queued", original_filename=title)
+            # 묶음 전체를 기다리지 않고 다운로드가 끝난 항목부터 바로 전사
+            task = transcribe_video_async.apply_async(
+                args=(dl["path"], language, diarize, model_size, None, title), kwargs={"source_id": source_id}
+            )
+            store.set_batch_task(batch_id, pos, task.id)
+            return "queued"
+
+        def on_result(pos: int, result, error) -> None:
+            # 항목 실패는 기록만 하고 나머지는 계속
+            if error is not None:
+                record_job(items[pos]["job_id"], status="failed", error=str(error))
+            with lock:
+                counts["failed" if error is not None else result] += 1
+                finished = sum(counts.values())
+                meta = {"progress": int(finished * 100 / len(items)), "stage": "downloading",
+                        "total": len(items), **counts}
+            try:
+                self.update_state(state="PROGRESS", meta=meta)
+            except Exception:
+                pass
+
+        run_downloads([it["source"] for it in items], fetch, on_result)
+        store.upsert_batch(batch_id, status="completed")
+        return {"success": True, "batch_id": batch_id, "title": pl.get("title"), "total": len(items), **counts}
+    except Exception as e:
+        try:
+            store.upsert_batch(batch_id, status="failed", error=str(e))
+        except Exception:
+            pass
+        return {"success": False, "error": str(e)}
+
+
+# 저장소 보존 정리: celery beat 주기 실행 + 전사 작업 종료 시 차례가 된 한 워커에서만 투입
+@celery_app.task
+def storage_lifecycle_sweep():
+    report = sweep_storage(dry_run=False)
+    if not report.get("skipped"):
+        print(f"보존 정리: 만료 {report['expired']['count']}, 고아 {report['orphans']['count']}, "
+              f"축출 {report['evicted']['count']}, {report['freed_bytes'] // (1024 * 1024)}MB 확보")
+    return {k: v for k, v in report.items() if k not in ("expired", "evicted", "orphans")}
+
+
+@task_postrun.connect
+def _schedule_sweep(sender=None, **_kwargs):
+    if sender not in (transcribe_video_async, transcribe_url_async, download_url_async, ingest_playlist_async):
+        return
+    try:
+        if claim_sweep_slot():
+            storage_lifecycle_sweep.delay()
+    except Exception:
+        pass
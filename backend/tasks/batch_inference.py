@@ -0,0 +1,264 @@
+"""
+작업 간 마이크로 배칭 Whisper 추론 서버.
+
+같은 모델을 쓰는 동시 작업들이 30초 멜 윈도를 제출하면, 서버 스레드가 최대
+WHISPER_BATCH_MAX_SIZE개 또는 WHISPER_BATCH_MAX_LATENCY_MS 만큼 모아 인코더와
+빔 서치 디코딩을 한 번의 배치(whisper.decode)로 수행하고 작업별 결과를 돌려준다.
+워커가 스레드 풀(celery -P threads -c N)로 돌 때 N개 작업이 가중치 한 벌을 공유한다.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+import numpy as np
+import whisper
+
+from tasks.long_form import SAMPLE_RATE, FRAMES_PER_SECOND, find_split_points
+
+# 윈도 길이: 무음 탐색 여유(±5초)를 두어 30초를 넘지 않게 자른다
+_WINDOW_TARGET_SEC = 24.0
+_WINDOW_SEARCH_SEC = 5.0
+_TIME_PRECISION = 0.02  # 타임스탬프 토큰 해상도(초)
+
+
+def batching_enabled() -> bool:
+    return os.getenv("WHISPER_BATCH_SERVER", "false").lower() in ("1", "true", "yes")
+
+
+class _Request:
+    __slots__ = ("mel", "options_key", "future")
+
+    def __init__(self, mel, options_key: Tuple, future: Future):
+        self.mel = mel
+        self.options_key = options_key
+        self.future = future
+
+
+class BatchInferenceServer:
+    def __init__(self, svc, max_batch: int = 8, max_latency_ms: float = 50.0):
+        self.svc = svc
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max(0.0, max_latency_ms) / 1000.0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._stats = {"batches": 0, "items": 0, "max_batch_seen": 0, "decode_seconds": 0.0}
+        self._thread = threading.Thread(target=self._loop, name=f"whisper-batch-{svc.model_size}", daemon=True)
+        self._thread.start()
+
+    def submit(self, mel, language: str | None) -> Future:
+        """(n_mels, 3000) 멜 윈도 하나를 제출. Future는 whisper DecodingResult로 완료."""
+        fut: Future = Future()
+        self._queue.put(_Request(mel, (language,), fut))
+        return fut
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            groups: Dict[Tuple, List[_Request]] = {}
+            for req in batch:
+                groups.setdefault(req.options_key, []).append(req)
+            for key, items in groups.items():
+                self._run(key, items)
+
+    def _decoding_options(self, language: str | None) -> "whisper.DecodingOptions":
+        svc = self.svc
+        kwargs: Dict[str, Any] = {
+            "task": "transcribe",
+            "language": language,
+            "temperature": svc.temperature,
+            "fp16": svc.fp16,
+            "without_timestamps": False,
+        }
+        # whisper.transcribe와 동일하게 온도 0이면 beam_size, 그 외에는 best_of만 사용
+        if svc.temperature == 0:
+            kwargs["beam_size"] = svc.beam_size
+        else:
+            kwargs["best_of"] = svc.best_of
+        return whisper.DecodingOptions(**kwargs)
+
+    def _run(self, key: Tuple, items: List[_Request]) -> None:
+        import torch  # type: ignore
+        started = time.perf_counter()
+        try:
+            mel = torch.stack([req.mel for req in items]).to(self.svc.model.device)
+            with self.svc.lock:
+                results = whisper.decode(self.svc.model, mel, self._decoding_options(key[0]))
+            for req, res in zip(items, results):
+                req.future.set_result(res)
+        except Exception as e:
+            for req in items:
+                if not req.future.done():
+                    req.future.set_exception(e)
+        finally:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(items))
+            self._stats["decode_seconds"] += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._stats["batches"]
+        return {
+            "model": self.svc.model_size,
+            "queued": self._queue.qsize(),
+            "batches": batches,
+            "items": self._stats["items"],
+            "avg_batch": round(self._stats["items"] / batches, 2) if batches else None,
+            "max_batch_seen": self._stats["max_batch_seen"],
+            "decode_seconds": round(self._stats["decode_seconds"], 3),
+        }
+
+
+_servers: Dict[int, BatchInferenceServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_batch_server(svc) -> BatchInferenceServer:
+    """모델 인스턴스당 하나의 배칭 서버."""
+    with _servers_lock:
+        server = _servers.get(id(svc))
+        if server is None or server.svc is not svc:
+            try:
+                max_batch = int(os.getenv("WHISPER_BATCH_MAX_SIZE", "8"))
+            except Exception:
+                max_batch = 8
+            try:
+                max_latency_ms = float(os.getenv("WHISPER_BATCH_MAX_LATENCY_MS", "50"))
+            except Exception:
+                max_latency_ms = 50.0
+            server = BatchInferenceServer(svc, max_batch=max_batch, max_latency_ms=max_latency_ms)
+            _servers[id(svc)] = server
+        return server
+
+
+def batch_server_stats() -> List[Dict[str, Any]]:
+    with _servers_lock:
+        return [s.stats() for s in _servers.values()]
+
+
+def split_windows(audio: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+    """30초 이하 윈도로 무음 경계에서 자른 (시작 샘플, 조각) 목록."""
+    points = find_split_points(audio, target_sec=_WINDOW_TARGET_SEC, search_sec=_WINDOW_SEARCH_SEC)
+    bounds = [0] + points + [len(audio)]
+    return [(bounds[i], audio[bounds[i]:bounds[i + 1]]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+
+
+def _segments_from_tokens(tokenizer, tokens: List[int], offset_sec: float, window_sec: float) -> List[Tuple[float, float, List[int]]]:
+    """타임스탬프 토큰 쌍으로 윈도 내부 구간을 나눈다."""
+    ts_begin = tokenizer.timestamp_begin
+    out: List[Tuple[float, float, List[int]]] = []
+    current: List[int] = []
+    start = None
+    for tok in tokens:
+        if tok >= ts_begin:
+            t = (tok - ts_begin) * _TIME_PRECISION
+            if start is not None and current:
+                out.append((offset_sec + start, offset_sec + min(t, window_sec), current))
+                current = []
+                start = None
+            else:
+                start = t
+        elif tok < tokenizer.eot:
+            current.append(tok)
+    if current:
+        out.append((offset_sec + (start or 0.0), offset_sec + window_sec, current))
+    return out
+
+
+def transcribe_batched(svc, audio: np.ndarray, lang_arg: str | None,
+                       progress_cb: Optional[Callable[[float, float], None]] = None,
+                       segment_cb: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    오디오를 30초 이하 윈도로 나눠 배칭 서버에 모두 제출하고 결과를 구간으로 조립한다.
+    압축률/로그확률 기준을 넘긴 윈도는 온도 폴백이 있는 일반 전사로 다시 처리.
+    윈도가 끝날 때마다 새 구간과 디코딩 위치를 콜백으로 보낸다.
+    """
+    total_sec = len(audio) / float(SAMPLE_RATE)
+    server = get_batch_server(svc)
+    n_mels = svc.model.dims.n_mels
+    windows = split_windows(audio)
+    futures = []
+    for offset, chunk in windows:
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), n_mels)
+        futures.append((offset / float(SAMPLE_RATE), len(chunk) / float(SAMPLE_RATE), chunk, server.submit(mel, lang_arg)))
+
+    options = svc.options
+    segments: List[Dict[str, Any]] = []
+    texts: List[str] = []
+    detected: Dict[str, int] = {}
+    for offset_sec, window_sec, chunk, fut in futures:
+        emitted = len(segments)
+        _append_window(svc, fut.result(), lang_arg, offset_sec, window_sec, chunk, options, segments, texts, detected)
+        if segment_cb is not None:
+            for seg in segments[emitted:]:
+                try:
+                    segment_cb(seg)
+                except Exception:
+                    pass
+        if progress_cb is not None:
+            progress_cb(offset_sec + window_sec, total_sec)
+    language = lang_arg or (max(detected, key=detected.get) if detected else None)
+    result: Dict[str, Any] = {"text": "".join(texts), "segments": segments}
+    if language:
+        result["language"] = language
+    return result
+
+
+def _append_window(svc, res, lang_arg: str | None, offset_sec: float, window_sec: float, chunk: np.ndarray,
+                   options: Dict[str, Any], segments: List[Dict[str, Any]], texts: List[str],
+                   detected: Dict[str, int]) -> None:
+    """윈도 하나의 DecodingResult를 전역 구간 목록에 추가."""
+    language = lang_arg or res.language
+    detected[language] = detected.get(language, 0) + 1
+    # 무음 윈도 건너뛰기 (whisper.transcribe와 같은 기준)
+    if res.no_speech_prob > options["no_speech_threshold"] and res.avg_logprob < -1.0:
+        return
+    if res.compression_ratio > options["compression_ratio_threshold"] or res.avg_logprob < -1.0:
+        fallback = svc.decode(chunk, language)
+        for seg in fallback.get("segments", []):
+            segments.append({
+                **seg,
+                "id": len(segments),
+                "seek": int(round(offset_sec * FRAMES_PER_SECOND)),
+                "start": float(seg["start"]) + offset_sec,
+                "end": float(seg["end"]) + offset_sec,
+            })
+        texts.append(fallback.get("text", ""))
+        return
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        svc.model.is_multilingual,
+        num_languages=svc.model.num_languages,
+        language=language,
+        task="transcribe",
+    )
+    for start, end, toks in _segments_from_tokens(tokenizer, res.tokens, offset_sec, window_sec):
+        text = tokenizer.decode(toks)
+        if not text.strip():
+            continue
+        segments.append({
+            "id": len(segments),
+            "seek": int(round(offset_sec * FRAMES_PER_SECOND)),
+            "start": start,
+            "end": end,
+            "text": text,
+            "tokens": toks,
+            "temperature": res.temperature,
+            "avg_logprob": res.avg_logprob,
+            "compression_ratio": res.compression_ratio,
+            "no_speech_prob": res.no_speech_prob,
+        })
+        texts.append(text)
@@ -1,5 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import heapq
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv  # type: ignore
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/
@@ -11,35 +15,127 @@ except Exception:
     pass
 
 
-def diarize_audio(audio_path: str) -> List[Dict[str, Any]]:
+# 프로세스당 한 번만 구성하는 pyannote 파이프라인 (작업 간 공유)
+_pipeline = None
+_pipeline_lock = threading.Lock()
+# 파이프라인 내부 상태(모델 훅/캐시)를 보호하기 위해 실행은 직렬화
+_run_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "loaded": False,
+    "load_seconds": None,
+    "runs": 0,
+    "failures": 0,
+    "run_seconds_total": 0.0,
+    "last_run_seconds": None,
+    "audio_seconds_total": 0.0,
+    "threads": None,
+}
+
+
+def _thread_budget() -> int | None:
+    try:
+        n = int(os.getenv("DIARIZATION_THREADS", "0"))
+        return n if n > 0 else None
+    except Exception:
+        return None
+
+
+def _apply_thread_budget() -> None:
+    # 호출 스레드(화자 분리 스테이지)의 torch 연산 스레드 수 제한: Whisper와 코어 경합 방지
+    n = _thread_budget()
+    if n is None:
+        return
+    try:
+        import torch  # type: ignore
+        torch.set_num_threads(n)
+        _stats["threads"] = n
+    except Exception:
+        pass
+
+
+def get_diarization_pipeline():
+    """프로세스 전역 파이프라인. 최초 1회만 from_pretrained (동시 요청은 로딩 락으로 합류)."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                from pyannote.audio import Pipeline  # type: ignore
+                started = time.perf_counter()
+                model_name = os.getenv("DIARIZATION_MODEL", "pyannote/speaker-diarization")
+                # Hugging Face 토큰 사용(필요 시)
+                token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
+                if token:
+                    pipeline = Pipeline.from_pretrained(model_name, token=token)
+                else:
+                    pipeline = Pipeline.from_pretrained(model_name)
+                _stats["load_seconds"] = round(time.perf_counter() - started, 3)
+                _stats["loaded"] = True
+                _pipeline = pipeline
+    return _pipeline
+
+
+def preload_diarization_pipeline() -> bool:
+    """워커 시작 시 예열용. 실패해도 첫 작업에서 다시 시도."""
+    try:
+        _apply_thread_budget()
+        get_diarization_pipeline()
+        return True
+    except Exception as e:
+        print(f"화자 분리 파이프라인 예열 실패: {e}")
+        return False
+
+
+def diarization_stats() -> Dict[str, Any]:
+    out = dict(_stats)
+    out["run_seconds_total"] = round(out["run_seconds_total"], 3)
+    out["audio_seconds_total"] = round(out["audio_seconds_total"], 1)
+    runs = out["runs"]
+    out["avg_run_seconds"] = round(out["run_seconds_total"] / runs, 3) if runs else None
+    # 실시간 배속(처리 시간 / 오디오 길이)
+    out["real_time_factor"] = round(out["run_seconds_total"] / out["audio_seconds_total"], 4) if out["audio_seconds_total"] else None
+    return out
+
+
+def diarize_audio(audio, sample_rate: int = 16000) -> List[Dict[str, Any]]:
     """
     화자 분리 실행 (pyannote.audio 가용 시).
+    audio: 16kHz 모노 float32 배열(공유 디코딩 버퍼) 또는 오디오 파일 경로.
     설치가 없거나 실패하면 예외를 던져 호출부에서 안전하게 무시.
     반환 형식 예시: [{"start": 0.0, "end": 3.2, "speaker": "SPEAKER_1"}, ...]
     """
+    pipeline = get_diarization_pipeline()
+    _apply_thread_budget()
+
+    started = time.perf_counter()
+    audio_sec = 0.0
     try:
-        from pyannote.audio import Pipeline  # type: ignore
-    except Exception as e:
-        raise e
-
-    # Hugging Face 토큰 사용(필요 시)
-    token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
-    if token:
-        pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization", token=token)
-    else:
-        pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization")
-    # 기본: 파일 경로로 수행. 실패 시 파형 직접 주입으로 폴백.
-    try:
-        diarization = pipeline(audio_path)
+        with _run_lock:
+            if not isinstance(audio, str):
+                # 메모리 버퍼 직접 주입: 파일 재디코딩 없음
+                import torch  # type: ignore
+                waveform = torch.from_numpy(audio).unsqueeze(0)  # (channels, samples)
+                audio_sec = len(audio) / float(sample_rate)
+                diarization = pipeline({"waveform": waveform, "sample_rate": int(sample_rate)})
+            else:
+                # 파일 경로로 수행. 실패 시 파형 직접 주입으로 폴백.
+                try:
+                    diarization = pipeline(audio)
+                except Exception:
+                    import soundfile as sf  # type: ignore
+                    import torch  # type: ignore
+                    data, sr = sf.read(audio, dtype="float32", always_2d=True)
+                    waveform = torch.from_numpy(data.T)  # (channels, samples)
+                    audio_sec = len(data) / float(sr)
+                    diarization = pipeline({"waveform": waveform, "sample_rate": int(sr)})
     except Exception:
-        try:
-            import soundfile as sf  # type: ignore
-            import torch  # type: ignore
-            data, sr = sf.read(audio_path, dtype="float32", always_2d=True)
-            waveform = torch.from_numpy(data.T)  # (channels, samples)
-            diarization = pipeline({"waveform": waveform, "sample_rate": int(sr)})
-        except Exception as e:
-            raise e
+        _stats["failures"] += 1
+        raise
+    elapsed = time.perf_counter() - started
+    _stats["runs"] += 1
+    _stats["run_seconds_total"] += elapsed
+    _stats["last_run_seconds"] = round(elapsed, 3)
+    _stats["audio_seconds_total"] += audio_sec
+
     segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
         segments.append({
@@ -50,18 +146,139 @@ def diarize_audio(audio_path: str) -> List[Dict[str, Any]]:
     return segments
 
 
-def write_srt_with_speakers(whisper_segments: list, spk_segments: List[Dict[str, Any]], output_path: str) -> bool:
+def assign_speakers(intervals: List[Tuple[float, float]], spk_segments: List[Dict[str, Any]]) -> List[str | None]:
+    """
+    각 구간 [start, end]에 가장 많이 겹치는 화자 라벨 (겹침이 없으면 None).
+    동률이면 원래 순서상 앞선 화자 턴을 택해 단순 전수 비교와 같은 결과를 낸다.
+    구간과 턴을 시작 시각으로 정렬한 뒤 스윕: 구간 끝보다 먼저 시작한 턴만 활성 집합에
+    넣고, 현재 구간 시작 이전에 끝난 턴은 힙으로 제거하므로 O((n + m) log m + 겹침 수).
+    """
+    turns = sorted(
+        ((float(t["start"]), float(t["end"]), i, t["speaker"]) for i, t in enumerate(spk_segments)),
+        key=lambda t: t[0],
+    )
+    order = sorted(range(len(intervals)), key=lambda k: intervals[k][0])
+    labels: List[str | None] = [None] * len(intervals)
+    active: Dict[int, Tuple[float, float, str]] = {}
+    ends: List[Tuple[float, int]] = []
+    nxt = 0
+    for k in order:
+        start, end = intervals[k]
+        # 구간 끝 이전에 시작한 턴 활성화
+        while nxt < len(turns) and turns[nxt][0] < end:
+            t_start, t_end, idx, speaker = turns[nxt]
+            active[idx] = (t_start, t_end, speaker)
+            heapq.heappush(ends, (t_end, idx))
+            nxt += 1
+        # 구간 시작 이전에 끝난 턴은 이후 구간과도 겹칠 수 없으므로 제거 (시작 시각 오름차순)
+        while ends and ends[0][0] <= start:
+            _, idx = heapq.heappop(ends)
+            active.pop(idx, None)
+        best = None
+        best_idx = None
+        best_overlap = 0.0
+        for idx, (t_start, t_end, speaker) in active.items():
+            ov = max(0.0, min(end, t_end) - max(start, t_start))
+            if ov > best_overlap or (ov == best_overlap and ov > 0.0 and idx < best_idx):
+                best_overlap = ov
+                best = speaker
+                best_idx = idx
+        labels[k] = best
+    return labels
+
+
+def word_level_enabled() -> bool:
+    return os.getenv("DIARIZATION_WORD_LEVEL", "false").lower() in ("1", "true", "yes")
+
+
+def split_on_speaker_change_enabled() -> bool:
+    return os.getenv("DIARIZATION_SPLIT_ON_CHANGE", "false").lower() in ("1", "true", "yes")
+
+
+def speaker_cues(whisper_segments: list, spk_segments: List[Dict[str, Any]],
+                 word_level: bool | None = None, split_on_change: bool | None = None) -> List[Dict[str, Any]]:
+    """
+    SRT 큐 목록 [{"start", "end", "text", "speaker"}].
+    기본: 세그먼트 단위로 가장 겹치는 화자.
+    word_level: 단어 타임스탬프가 있는 세그먼트는 단어마다 화자를 정하고
+      발화 시간이 가장 긴 화자로 세그먼트를 표기 (겹침 없는 단어는 앞 단어 화자를 이어받음).
+    split_on_change: 단어 단위 화자가 바뀌는 지점에서 큐를 나눈다.
+    """
+    if word_level is None:
+        word_level = word_level_enabled()
+    if split_on_change is None:
+        split_on_change = split_on_speaker_change_enabled()
+
+    seg_labels = assign_speakers([(float(s["start"]), float(s["end"])) for s in whisper_segments], spk_segments)
+    word_labels: List[str | None] = []
+    word_index: List[Tuple[int, int]] = []
+    if word_level:
+        intervals = []
+        for si, seg in enumerate(whisper_segments):
+            for wi, w in enumerate(seg.get("words") or []):
+                intervals.append((float(w.get("start", seg["start"])), float(w.get("end", seg["end"]))))
+                word_index.append((si, wi))
+        word_labels = assign_speakers(intervals, spk_segments)
+    by_segment: Dict[int, List[str | None]] = {}
+    for (si, _wi), label in zip(word_index, word_labels):
+        by_segment.setdefault(si, []).append(label)
+
+    cues: List[Dict[str, Any]] = []
+    for si, seg in enumerate(whisper_segments):
+        st = float(seg["start"])
+        ed = float(seg["end"])
+        fallback = seg_labels[si] or "SPEAKER_1"
+        labels = by_segment.get(si)
+        if not labels:
+            cues.append({"start": st, "end": ed, "text": str(seg.get("text", "")).strip(), "speaker": fallback})
+            continue
+        words = seg["words"]
+        # 겹침 없는 단어는 직전 단어(없으면 세그먼트) 화자로 채움
+        filled: List[str] = []
+        for label in labels:
+            filled.append(label or (filled[-1] if filled else fallback))
+        if split_on_change:
+            run_start = 0
+            for i in range(1, len(words) + 1):
+                if i == len(words) or filled[i] != filled[run_start]:
+                    run = words[run_start:i]
+                    text = "".join(str(w.get("word", "")) for w in run).strip()
+                    if text:
+                        cues.append({
+                            "start": float(run[0].get("start", st)),
+                            "end": float(run[-1].get("end", ed)),
+                            "text": text,
+                            "speaker": filled[run_start],
+                        })
+                    run_start = i
+        else:
+            durations: Dict[str, float] = {}
+            first_seen: Dict[str, int] = {}
+            for i, (w, label) in enumerate(zip(words, filled)):
+                dur = max(0.0, float(w.get("end", 0.0)) - float(w.get("start", 0.0)))
+                durations[label] = durations.get(label, 0.0) + dur
+                first_seen.setdefault(label, i)
+            speaker = max(durations, key=lambda lb: (durations[lb], -first_seen[lb]))
+            cues.append({"start": st, "end": ed, "text": str(seg.get("text", "")).strip(), "speaker": speaker})
+    return cues
+
+
+def numbered_cues(whisper_segments: list, spk_segments: List[Dict[str, Any]] | None = None,
+                  word_level: bool | None = None, split_on_change: bool | None = None) -> List[Dict[str, Any]]:
     """
-    Whisper 세그먼트와 화자 세그먼트를 단순 매칭하여 SRT 작성.
-    규칙: Whisper 세그먼트의 [start,end]에 가장 겹치는 화자 태그를 프리픽스.
+    저장/SRT용 큐 [{"start", "end", "text", "speaker"}]. speaker는 등장 순서 번호(1부터),
+    화자 정보가 없으면 None. 내부 라벨 'SPEAKER_1' / 'SPEAKER 1' / '1' 형태는 같은 화자로 정규화.
     """
-    # 내부 라벨 → 번호 매핑(등장 순서 기준). 최종 표기는 '화자 N'
+    if not spk_segments:
+        return [
+            {"start": float(s["start"]), "end": float(s["end"]), "text": str(s.get("text", "")).strip(), "speaker": None}
+            for s in whisper_segments
+        ]
     speaker_order: dict[str, int] = {}
+
     def get_index(label: str) -> int:
         base = str(label or "").strip()
-        # 'SPEAKER_1' / 'SPEAKER 1' / '1' 형태 모두 정규화
-        import re as _re
-        m = _re.search(r"(\d+)$", base.replace("_", " "))
+        m = re.search(r"(\d+)$", base.replace("_", " "))
         key = base
         if m:
             key = f"SPEAKER_{int(m.group(1))}"
@@ -69,37 +286,43 @@ def write_srt_with_speakers(whisper_segments: list, spk_segments: List[Dict[str,
             speaker_order[key] = len(speaker_order) + 1
         return speaker_order[key]
 
-    def pick_speaker(start: float, end: float) -> str:
-        best = None
-        best_overlap = 0.0
-        for s in spk_segments:
-            # 구간 겹침 길이
-            ov = max(0.0, min(end, s["end"]) - max(start, s["start"]))
-            if ov > best_overlap:
-                best_overlap = ov
-                best = s["speaker"]
-        return best or "SPEAKER_1"
+    cues = speaker_cues(whisper_segments, spk_segments, word_level=word_level, split_on_change=split_on_change)
+    for cue in cues:
+        cue["speaker"] = get_index(cue["speaker"])
+    return cues
+
 
-    def fmt_ts(seconds: float) -> str:
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        ms = int((seconds % 1) * 1000)
-        return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+def _fmt_srt_ts(seconds: float) -> str:
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    ms = int((seconds % 1) * 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
+
+def write_cues_srt(cues: List[Dict[str, Any]], output_path: str) -> bool:
+    """번호가 매겨진 큐를 '[화자 N] 텍스트' 형식 SRT로 기록."""
     try:
         with open(output_path, "w", encoding="utf-8") as f:
-            for i, seg in enumerate(whisper_segments, start=1):
-                st = float(seg["start"])  # type: ignore
-                ed = float(seg["end"])    # type: ignore
-                text = str(seg.get("text", "")).strip()
-                spk = pick_speaker(st, ed)
-                idx = get_index(spk)
+            for i, cue in enumerate(cues, start=1):
                 f.write(f"{i}\n")
-                f.write(f"{fmt_ts(st)} --> {fmt_ts(ed)}\n")
-                f.write(f"[화자 {idx}] {text}\n\n")
+                f.write(f"{_fmt_srt_ts(cue['start'])} --> {_fmt_srt_ts(cue['end'])}\n")
+                prefix = f"[화자 {cue['speaker']}] " if cue.get("speaker") else ""
+                f.write(f"{prefix}{cue['text']}\n\n")
         return True
     except Exception:
         return False
 
 
+def write_srt_with_speakers(whisper_segments: list, spk_segments: List[Dict[str, Any]], output_path: str,
+                            word_level: bool | None = None, split_on_change: bool | None = None) -> bool:
+    """
+    Whisper 세그먼트와 화자 세그먼트를 매칭하여 SRT 작성.
+    규칙: 세그먼트(또는 단어)의 [start,end]에 가장 겹치는 화자 태그를 프리픽스. 매칭은 speaker_cues 참고.
+    """
+    try:
+        cues = numbered_cues(whisper_segments, spk_segments or [{"start": 0.0, "end": 0.0, "speaker": "SPEAKER_1"}],
+                             word_level=word_level, split_on_change=split_on_change)
+    except Exception:
+        return False
+    return write_cues_srt(cues, output_path)
@@ -0,0 +1,169 @@
+"""
+작업 단위 스테이지 그래프.
+
+디코딩된 오디오 버퍼 하나에만 의존하는 단계(Whisper 전사, 화자 분리, MP3 인코딩)를
+스레드로 동시에 실행하고, 화자 태그 SRT처럼 여러 단계 결과가 필요한 단계만 합류시킨다.
+torch 연산과 ffmpeg 서브프로세스는 GIL을 놓으므로 작업 지연이 단계 합이 아니라
+가장 느린 단계 수준으로 줄어든다.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from tasks.video_processing import encode_mp3_from_pcm
+from utils.artifacts import describe, output_file, record_artifacts
+from utils.job_store import record_result
+
+
+class StageGraph:
+    """
+    이름 → (함수, 선행 단계) 그래프. 선행 단계가 모두 끝난 단계부터 제출한다.
+    각 함수는 지금까지의 결과 dict를 받아 값을 반환하며, 선행 단계가 실패하면
+    해당 단계는 실행하지 않고 같은 예외로 실패 처리한다.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = ()) -> "StageGraph":
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"알 수 없는 선행 단계: {dep}")
+        self._stages[name] = (fn, deps)
+        return self
+
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, BaseException], Dict[str, float]]:
+        results: Dict[str, Any] = {}
+        errors: Dict[str, BaseException] = {}
+        timings: Dict[str, float] = {}
+        pending = dict(self._stages)
+        running = {}
+
+        def timed(name: str, fn: Callable[[Dict[str, Any]], Any], snapshot: Dict[str, Any]) -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(snapshot)
+            finally:
+                timings[name] = round(time.perf_counter() - started, 3)
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self._stages)), thread_name_prefix="job-stage") as ex:
+            while pending or running:
+                for name, (fn, deps) in list(pending.items()):
+                    failed = next((d for d in deps if d in errors), None)
+                    if failed is not None:
+                        errors[name] = errors[failed]
+                        del pending[name]
+                    elif all(d in results for d in deps):
+                        running[ex.submit(timed, name, fn, dict(results))] = name
+                        del pending[name]
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        results[name] = fut.result()
+                    except Exception as e:
+                        errors[name] = e
+        return results, errors, timings
+
+
+def process_audio(svc, audio, job_id: str, language: Optional[str], diarize: bool, output_dir: str,
+                  progress_cb: Optional[Callable[[float, float], None]] = None,
+                  segment_cb: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  transcription: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    디코딩된 오디오로 전사/화자 분리/MP3를 동시에 수행하고 txt/srt/mp3를 output_dir의 팬아웃 위치에 기록.
+    텍스트와 화자 번호가 붙은 구간은 작업 저장소(utils.job_store)에도 기록한다.
+    transcription: 이미 끝난 전사 결과(스트리밍 URL 모드)가 있으면 전사 단계는 그 결과를 그대로 쓴다.
+    반환: {"success", "error", "transcription", "cues", "speakers", "mp3_path", "timings"}
+    """
+    output_txt = output_file(output_dir, job_id, "txt", create=True)
+    output_srt = output_file(output_dir, job_id, "srt")
+    output_mp3 = output_file(output_dir, job_id, "mp3")
+
+    def transcribe(_r):
+        if transcription is not None:
+            return transcription
+        result = svc.transcribe(audio, language, progress_cb=progress_cb, segment_cb=segment_cb)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "전사 실패"))
+        return result
+
+    def diarization(_r):
+        # pyannote.audio 미설치/실패 시 화자 정보 없이 진행
+        if not diarize:
+            return None
+        try:
+            from tasks.diarization import diarize_audio
+            return diarize_audio(audio)
+        except Exception:
+            return None
+
+    def mp3(_r):
+        try:
+            ok, _ = encode_mp3_from_pcm(audio, output_mp3)
+            return output_mp3 if ok and os.path.exists(output_mp3) else None
+        except Exception:
+            return None
+
+    def write_txt(r):
+        svc.save_transcription(r["transcribe"], output_txt)
+        return output_txt
+
+    def write_srt(r):
+        # 반환값: 저장소에 기록할 큐 목록 (화자 번호 포함)
+        segments = r["transcribe"]["segments"]
+        speakers = r["diarize"]
+        # 화자 분리가 있으면 SRT에 화자 태그를 프리픽스
+        if speakers:
+            try:
+                from tasks.diarization import numbered_cues, write_cues_srt
+                cues = numbered_cues(segments, speakers)
+                if write_cues_srt(cues, output_srt):
+                    return cues
+            except Exception:
+                pass
+        svc.create_srt(segments, output_srt)
+        return [
+            {"start": float(s["start"]), "end": float(s["end"]), "text": str(s.get("text", "")).strip(), "speaker": None}
+            for s in segments
+        ]
+
+    def index(r):
+        # 작업 저장소에 텍스트/구간을 한 트랜잭션으로 기록
+        result = r["transcribe"]
+        record_result(job_id, result.get("text", ""), r["srt"], language=result.get("language"),
+                      model=svc.model_size, diarize=bool(diarize))
+        return True
+
+    graph = (
+        StageGraph()
+        .add("transcribe", transcribe)
+        .add("diarize", diarization)
+        .add("mp3", mp3)
+        .add("txt", write_txt, deps=("transcribe",))
+        .add("srt", write_srt, deps=("transcribe", "diarize"))
+        .add("index", index, deps=("srt",))
+    )
+    results, errors, timings = graph.run()
+    # 결과물 매니페스트: 단계별 성공/실패를 한 트랜잭션으로
+    record_artifacts(job_id, [
+        describe(kind, path, stage, status="failed" if stage in errors else "ready")
+        for kind, path, stage in (("txt", output_txt, "txt"), ("srt", output_srt, "srt"), ("mp3", output_mp3, "mp3"))
+    ])
+    if "transcribe" in errors:
+        return {"success": False, "error": str(errors["transcribe"]), "timings": timings}
+    if errors:
+        name, err = next(iter(errors.items()))
+        return {"success": False, "error": f"{name} 단계 실패: {err}", "timings": timings}
+    return {
+        "success": True,
+        "transcription": results["transcribe"],
+        "cues": results["srt"],
+        "speakers": results.get("diarize"),
+        "mp3_path": results.get("mp3"),
+        "timings": timings,
+    }
@@ -0,0 +1,277 @@
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Tuple, Dict, Any, Callable, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Whisper seek 단위: 멜 프레임(10ms)
+FRAMES_PER_SECOND = 100
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def longform_workers() -> int:
+    try:
+        return max(0, int(os.getenv("WHISPER_LONGFORM_WORKERS", "0")))
+    except Exception:
+        return 0
+
+
+def progress_chunk_sec() -> Optional[float]:
+    """
+    단일 프로세스 전사의 조각 길이(초, WHISPER_PROGRESS_CHUNK_SEC, 기본 120초). 조각마다 구간/진행률을
+    바로 내보내므로 실시간 표시는 기본으로 켜진다. 0 이하면 None → 한 번에 디코딩.
+    진행 콜백 유무와 무관하게 정해지므로 동기/비동기 경로의 결과가 같다 (결과 캐시 키에도 포함).
+    """
+    value = _env_float("WHISPER_PROGRESS_CHUNK_SEC", 120.0)
+    return value if value > 0 else None
+
+
+def should_use_long_form(audio) -> bool:
+    """WHISPER_LONGFORM_WORKERS > 1 이고 길이가 WHISPER_LONGFORM_MIN_SEC 이상이면 병렬 모드."""
+    if longform_workers() < 2:
+        return False
+    duration = len(audio) / float(SAMPLE_RATE)
+    return duration >= _env_float("WHISPER_LONGFORM_MIN_SEC", 1200.0)
+
+
+def _frame_energy(audio: np.ndarray, frame: int) -> np.ndarray:
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    # einsum으로 제곱 임시 배열 없이 프레임별 RMS 계산
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame)
+
+
+def find_split_points(
+    audio: np.ndarray,
+    target_sec: float = 180.0,
+    search_sec: float = 15.0,
+    frame_ms: int = 30,
+    smooth_ms: int = 300,
+) -> List[int]:
+    """
+    target_sec 간격 근처(±search_sec)에서 가장 조용한 지점을 골라 샘플 인덱스 목록 반환.
+    발화 중간을 자르지 않도록 짧은 이동 평균으로 무음 구간을 찾는다.
+    """
+    frame = int(SAMPLE_RATE * frame_ms / 1000)
+    energy = _frame_energy(audio, frame)
+    if len(energy) == 0:
+        return []
+    k = max(1, int(smooth_ms / frame_ms))
+    if k > 1 and len(energy) > k:
+        energy = np.convolve(energy, np.ones(k, dtype=np.float32) / k, mode="same")
+
+    frames_per_sec = 1000.0 / frame_ms
+    target = max(1, int(target_sec * frames_per_sec))
+    search = max(1, int(search_sec * frames_per_sec))
+    total = len(energy)
+
+    points: List[int] = []
+    pos = target
+    # 마지막 조각이 너무 짧아지지 않도록 절반 길이 이상 남을 때만 자름
+    while pos + target // 2 < total:
+        lo = max(1, pos - search)
+        hi = min(total - 1, pos + search)
+        if hi <= lo:
+            break
+        best = lo + int(np.argmin(energy[lo:hi]))
+        points.append(best * frame)
+        pos = best + target
+    return points
+
+
+def split_on_silence(audio: np.ndarray, target_sec: float) -> List[Tuple[int, np.ndarray]]:
+    """(시작 샘플 오프셋, 조각) 목록."""
+    bounds = [0] + find_split_points(audio, target_sec=target_sec) + [len(audio)]
+    return [(bounds[i], audio[bounds[i]:bounds[i + 1]]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+
+
+def _shift_segment(seg: Dict[str, Any], offset_sec: float, new_id: int) -> Dict[str, Any]:
+    out = dict(seg)
+    out["id"] = new_id
+    out["start"] = float(seg.get("start", 0.0)) + offset_sec
+    out["end"] = float(seg.get("end", 0.0)) + offset_sec
+    out["seek"] = int(seg.get("seek", 0)) + int(round(offset_sec * FRAMES_PER_SECOND))
+    if seg.get("words"):
+        out["words"] = [
+            {**w, "start": float(w.get("start", 0.0)) + offset_sec, "end": float(w.get("end", 0.0)) + offset_sec}
+            for w in seg["words"]
+        ]
+    return out
+
+
+def merge_chunk_results(parts: List[Tuple[float, Dict[str, Any]]]) -> Dict[str, Any]:
+    """조각별 Whisper 결과를 전역 타임스탬프/연속 id로 합쳐 단일 결과로 만든다."""
+    segments: List[Dict[str, Any]] = []
+    texts: List[str] = []
+    languages: Counter = Counter()
+    for offset_sec, res in sorted(parts, key=lambda p: p[0]):
+        for seg in res.get("segments", []):
+            segments.append(_shift_segment(seg, offset_sec, len(segments)))
+        texts.append(res.get("text", ""))
+        if res.get("language"):
+            languages[res["language"]] += len(res.get("segments", [])) or 1
+    merged: Dict[str, Any] = {"text": "".join(texts), "segments": segments}
+    if languages:
+        merged["language"] = languages.most_common(1)[0][0]
+    return merged
+
+
+# ---- 워커 프로세스 측: 프로세스마다 자체 모델 보유 ----
+_worker_service = None
+
+
+def _init_worker(model_size: str, threads: int) -> None:
+    global _worker_service
+    try:
+        import torch  # type: ignore
+        torch.set_num_threads(max(1, threads))
+    except Exception:
+        pass
+    from tasks.model_pool import get_transcription_service
+    _worker_service = get_transcription_service(model_size)
+
+
+def _transcribe_chunk(chunk: np.ndarray, lang_arg: str | None) -> Dict[str, Any]:
+    result = _worker_service.decode(chunk, lang_arg)
+    return {"text": result.get("text", ""), "segments": result.get("segments", []), "language": result.get("language")}
+
+
+_executors: Dict[Tuple[str, int], ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(model_size: str, workers: int) -> ProcessPoolExecutor:
+    # 모델 크기별 풀을 재사용해 워커의 모델 로딩 비용을 작업 간에 분산
+    key = (model_size, workers)
+    with _executors_lock:
+        ex = _executors.get(key)
+        if ex is None:
+            import multiprocessing as mp
+            threads = max(1, (os.cpu_count() or workers) // workers)
+            ex = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_size, threads),
+            )
+            _executors[key] = ex
+        return ex
+
+
+def _drop_executor(model_size: str, workers: int) -> None:
+    with _executors_lock:
+        ex = _executors.pop((model_size, workers), None)
+    if ex is not None:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+def _emit_segments(res: Dict[str, Any], offset_sec: float, first_id: int,
+                   segment_cb: Optional[Callable[[Dict[str, Any]], None]]) -> int:
+    # 병합 결과와 같은 전역 id/타임스탬프로 구간을 즉시 내보낸다
+    next_id = first_id
+    for seg in res.get("segments", []):
+        if segment_cb is not None:
+            try:
+                segment_cb(_shift_segment(seg, offset_sec, next_id))
+            except Exception:
+                pass
+        next_id += 1
+    return next_id
+
+
+def transcribe_sequential(svc, audio: np.ndarray, lang_arg: str | None,
+                          progress_cb: Optional[Callable[[float, float], None]] = None,
+                          segment_cb: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    조각 단위 단일 프로세스 경로: progress_chunk_sec() 단위로
+    무음 경계에서 잘라 순서대로 전사하며, 조각마다 구간/디코딩 위치를 콜백으로 보낸다.
+    이전 문맥 조건화가 켜져 있으면 직전 조각 텍스트를 initial_prompt로 이어 준다.
+    """
+    total_sec = len(audio) / float(SAMPLE_RATE)
+    chunks = split_on_silence(audio, progress_chunk_sec() or 120.0)
+    condition = svc.options.get("condition_on_previous_text", False)
+    parts: List[Tuple[float, Dict[str, Any]]] = []
+    next_id = 0
+    prompt = None
+    for offset, chunk in chunks:
+        offset_sec = offset / float(SAMPLE_RATE)
+        res = svc.decode(chunk, lang_arg, initial_prompt=prompt)
+        # 첫 조각에서 감지된 언어로 이후 조각을 고정
+        if lang_arg is None and res.get("language"):
+            lang_arg = res["language"]
+        parts.append((offset_sec, res))
+        next_id = _emit_segments(res, offset_sec, next_id, segment_cb)
+        if progress_cb is not None:
+            progress_cb((offset + len(chunk)) / float(SAMPLE_RATE), total_sec)
+        if condition:
+            prompt = res.get("text", "")[-224:] or None
+    return merge_chunk_results(parts)
+
+
+def transcribe_single(svc, audio: np.ndarray, lang_arg: str | None,
+                      progress_cb: Optional[Callable[[float, float], None]] = None,
+                      segment_cb: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    단일 프로세스 전사. 기본은 조각 단위(transcribe_sequential)로 진행을 보고하고,
+    조각 전사를 끈 경우(WHISPER_PROGRESS_CHUNK_SEC=0)에만 한 번에 디코딩한 뒤 구간/진행률을 한꺼번에 보낸다.
+    """
+    if progress_chunk_sec():
+        return transcribe_sequential(svc, audio, lang_arg, progress_cb, segment_cb)
+    res = svc.decode(audio, lang_arg)
+    _emit_segments(res, 0.0, 0, segment_cb)
+    if progress_cb is not None:
+        total_sec = len(audio) / float(SAMPLE_RATE)
+        progress_cb(total_sec, total_sec)
+    return res
+
+
+def transcribe_long_form(svc, audio: np.ndarray, lang_arg: str | None,
+                         progress_cb: Optional[Callable[[float, float], None]] = None,
+                         segment_cb: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    무음 경계로 자른 조각을 프로세스 풀에서 동시에 전사하고 병합한다.
+    완료된 조각의 길이 합을 진행률로 보내고, 앞선 조각이 모두 끝난 구간부터 순서대로 내보낸다.
+    풀 생성/실행이 불가능한 환경(예: 데몬 프로세스)에서는 단일 프로세스 경로로 폴백.
+    """
+    workers = longform_workers()
+    total_sec = len(audio) / float(SAMPLE_RATE)
+    chunks = split_on_silence(audio, _env_float("WHISPER_LONGFORM_CHUNK_SEC", 180.0))
+    if len(chunks) < 2:
+        return transcribe_single(svc, audio, lang_arg, progress_cb, segment_cb)
+    try:
+        ex = _get_executor(svc.model_size, workers)
+        futures = {ex.submit(_transcribe_chunk, chunk, lang_arg): i for i, (_, chunk) in enumerate(chunks)}
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        decoded_sec = 0.0
+        flushed = 0
+        next_id = 0
+        for fut in as_completed(futures):
+            i = futures[fut]
+            results[i] = fut.result()
+            decoded_sec += len(chunks[i][1]) / float(SAMPLE_RATE)
+            if progress_cb is not None:
+                progress_cb(decoded_sec, total_sec)
+            while flushed < len(chunks) and results[flushed] is not None:
+                next_id = _emit_segments(results[flushed], chunks[flushed][0] / float(SAMPLE_RATE), next_id, segment_cb)
+                flushed += 1
+        parts = [(chunks[i][0] / float(SAMPLE_RATE), results[i]) for i in range(len(chunks))]
+    except (BrokenProcessPool, AssertionError, OSError) as e:
+        print(f"병렬 전사 불가, 단일 전사로 진행: {e}")
+        _drop_executor(svc.model_size, workers)
+        return transcribe_single(svc, audio, lang_arg, progress_cb, segment_cb)
+    merged = merge_chunk_results(parts)
+    if lang_arg:
+        merged["language"] = lang_arg
+    return merged
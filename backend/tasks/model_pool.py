@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any
+
+from tasks.transcription import TranscriptionService, resolve_model_size
+
+try:
+    import torch
+except Exception:
+    torch = None
+
+
+# 모델 크기별 대략적인 가중치 메모리(MB, fp32 기준). 로딩 전 예산 확보용 추정치
+_ESTIMATED_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3060,
+    "large": 6170,
+    "large-v1": 6170,
+    "large-v2": 6170,
+    "large-v3": 6170,
+    "turbo": 3240,
+    "large-v3-turbo": 3240,
+}
+
+
+def _model_bytes(svc: TranscriptionService) -> int:
+    """로딩된 모델의 실제 파라미터/버퍼 메모리(바이트)."""
+    try:
+        model = svc.model
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return int(total)
+    except Exception:
+        return int(_ESTIMATED_MB.get(svc.model_size, 1000) * 1024 * 1024)
+
+
+class ModelPool:
+    """
+    프로세스 단위 Whisper 모델 레지스트리.
+    - 여러 크기를 메모리 예산 안에서 상주시키고 LRU로 축출
+    - 같은 크기는 동시 요청이 와도 한 번만 로딩 (크기별 로딩 락)
+    - 적중/미스/로딩 시간 통계 제공
+    """
+
+    def __init__(self, max_bytes: int | None = None, max_models: int | None = None):
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[str, TranscriptionService]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._loading_locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "load_seconds_total": 0.0,
+            "loads": {},  # model_size -> {"count", "last_seconds"}
+        }
+
+    def get(self, model_size: str | None = None) -> TranscriptionService:
+        key = resolve_model_size(model_size)
+        with self._lock:
+            svc = self._models.get(key)
+            if svc is not None:
+                self._models.move_to_end(key)
+                self._stats["hits"] += 1
+                return svc
+            load_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        # 크기별 락: 동일 모델 동시 요청은 첫 요청의 로딩 결과를 공유
+        with load_lock:
+            with self._lock:
+                svc = self._models.get(key)
+                if svc is not None:
+                    self._models.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return svc
+                self._stats["misses"] += 1
+                # 로딩 전 추정치로 미리 자리 확보 (피크 메모리 초과 방지)
+                self._evict_locked(int(_ESTIMATED_MB.get(key, 0) * 1024 * 1024))
+
+            started = time.perf_counter()
+            svc = TranscriptionService(model_size=key)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                size = _model_bytes(svc)
+                self._evict_locked(size)
+                self._models[key] = svc
+                self._sizes[key] = size
+                self._stats["load_seconds_total"] += elapsed
+                entry = self._stats["loads"].setdefault(key, {"count": 0, "last_seconds": 0.0})
+                entry["count"] += 1
+                entry["last_seconds"] = round(elapsed, 3)
+            return svc
+
+    def _evict_locked(self, incoming_bytes: int) -> None:
+        # 예산/개수 한도를 넘지 않도록 가장 오래 사용되지 않은 모델부터 축출
+        evicted = False
+        while self._models:
+            over_count = self.max_models is not None and len(self._models) + 1 > self.max_models
+            over_bytes = (
+                self.max_bytes is not None
+                and sum(self._sizes.values()) + incoming_bytes > self.max_bytes
+            )
+            if not (over_count or over_bytes):
+                break
+            old_key, _ = self._models.popitem(last=False)
+            self._sizes.pop(old_key, None)
+            self._stats["evictions"] += 1
+            evicted = True
+        # 사용 중인 요청이 참조를 쥐고 있으면 그 요청이 끝난 뒤 해제됨
+        if evicted and torch is not None:
+            try:
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._stats["hits"]
+            misses = self._stats["misses"]
+            return {
+                "resident": list(self._models.keys()),
+                "resident_mb": round(sum(self._sizes.values()) / (1024 * 1024), 1),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 1) if self.max_bytes else None,
+                "max_models": self.max_models,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if (hits + misses) else None,
+                "evictions": self._stats["evictions"],
+                "load_seconds_total": round(self._stats["load_seconds_total"], 3),
+                "loads": {k: dict(v) for k, v in self._stats["loads"].items()},
+            }
+
+
+def _env_int(name: str) -> int | None:
+    raw = os.getenv(name)
+    if not raw:
+        return None
+    try:
+        value = int(float(raw))
+        return value if value > 0 else None
+    except Exception:
+        return None
+
+
+_pool: ModelPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """프로세스 전역 모델 풀 (WHISPER_POOL_MAX_MB, WHISPER_POOL_MAX_MODELS로 조정)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                max_mb = _env_int("WHISPER_POOL_MAX_MB")
+                _pool = ModelPool(
+                    max_bytes=max_mb * 1024 * 1024 if max_mb else None,
+                    max_models=_env_int("WHISPER_POOL_MAX_MODELS") or 3,
+                )
+    return _pool
+
+
+def get_transcription_service(model_size: str | None = None) -> TranscriptionService:
+    return get_model_pool().get(model_size)
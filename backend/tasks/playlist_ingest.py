@@ -0,0 +1,173 @@
+"""
+재생목록/채널 수집.
+
+yt-dlp extract_flat으로 항목 링크만 빠르게 펼친 뒤, 호스트별 동시 다운로드 수와 전체 대역폭 상한을
+지키며 내려받는다. 다운로드가 끝난 항목은 묶음 전체를 기다리지 않고 호출 측 콜백에서 바로 전사 큐에 넣는다.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from tasks.url_download import canonical_media_key
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def playlist_max_entries() -> int:
+    return max(1, _env_int("PLAYLIST_MAX_ENTRIES", 200))
+
+
+def _entry_url(entry: Dict[str, Any]) -> Optional[str]:
+    for k in ("webpage_url", "url"):
+        v = entry.get(k)
+        if isinstance(v, str) and re.match(r"^https?://", v):
+            return v
+    # 일부 추출기는 flat 항목에 id만 준다
+    if entry.get("ie_key") == "Youtube" and entry.get("id"):
+        return f"https://www.youtube.com/watch?v={entry['id']}"
+    return None
+
+
+def _is_nested(entry: Dict[str, Any]) -> bool:
+    # 채널 루트는 탭(동영상/쇼츠/라이브) 목록, 재생목록 모음은 재생목록 목록으로 펼쳐진다
+    ie_key = str(entry.get("ie_key") or "")
+    return entry.get("_type") == "playlist" or ie_key.endswith("Tab") or "playlist" in ie_key.lower()
+
+
+def expand_playlist(url: str, limit: Optional[int] = None) -> Tuple[bool, Dict[str, Any]]:
+    """
+    재생목록/채널 URL → 항목 목록 (다운로드/포맷 해석 없이 링크만).
+    단일 미디어 링크면 항목 하나. 중첩 목록(채널 탭 등)은 두 단계까지 펼치고 같은 미디어는 한 번만 넣는다.
+    반환: (True, {"title", "entries": [{"url", "title"}]}) 또는 (False, {"error"})
+    """
+    try:
+        from yt_dlp import YoutubeDL  # type: ignore
+    except Exception as e:
+        return False, {"error": f"yt-dlp 미설치 또는 로드 실패: {e}"}
+
+    limit = min(limit or playlist_max_entries(), playlist_max_entries())
+    ydl_opts: Dict[str, Any] = {
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+        "playlistend": limit,
+        "quiet": True,
+        "no_warnings": True,
+        "socket_timeout": _env_int("YTDLP_SOCKET_TIMEOUT", 30),
+    }
+    if os.getenv("YTDLP_PROXY"):
+        ydl_opts["proxy"] = os.getenv("YTDLP_PROXY")
+    cookies = os.getenv("YTDLP_COOKIES_FILE")
+    if cookies and os.path.exists(cookies):
+        ydl_opts["cookiefile"] = cookies
+
+    entries: List[Dict[str, Any]] = []
+    seen = set()
+    try:
+        with YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+
+            def walk(node: Dict[str, Any], depth: int) -> None:
+                for entry in node.get("entries") or []:
+                    if len(entries) >= limit:
+                        return
+                    if not entry:
+                        continue
+                    entry_url = _entry_url(entry)
+                    if _is_nested(entry) and depth < 2:
+                        if entry.get("entries") is None and entry_url:
+                            entry = ydl.extract_info(entry_url, download=False)
+                        walk(entry, depth + 1)
+                        continue
+                    if not entry_url:
+                        continue
+                    key = canonical_media_key(entry_url)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    entries.append({"url": entry_url, "title": entry.get("title")})
+
+            if info.get("entries") is None:
+                entries.append({"url": info.get("webpage_url") or url, "title": info.get("title")})
+            else:
+                walk(info, 0)
+    except Exception as e:
+        return False, {"error": str(e)}
+    if not entries:
+        return False, {"error": "가져올 항목이 없습니다"}
+    return True, {"title": info.get("title"), "entries": entries}
+
+
+def host_key(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return "youtube.com" if host == "youtu.be" else host
+
+
+class HostLimiter:
+    """호스트별 동시 다운로드 수 제한 (같은 사이트에 연결을 몰아 차단/스로틀되지 않도록)."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._sems: Dict[str, threading.BoundedSemaphore] = {}
+
+    def get(self, url: str) -> threading.BoundedSemaphore:
+        key = host_key(url)
+        with self._lock:
+            sem = self._sems.get(key)
+            if sem is None:
+                sem = self._sems[key] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+
+def download_plan(urls: List[str]) -> Dict[str, Optional[int]]:
+    """
+    동시 다운로드 수와 다운로드당 속도 상한.
+    PLAYLIST_DOWNLOAD_WORKERS(기본 4) 전체 동시 수, PLAYLIST_PER_HOST(기본 2) 호스트별 동시 수,
+    PLAYLIST_BANDWIDTH_KBPS(기본 0=무제한) 전체 대역폭을 실제로 동시에 돌 수 있는 다운로드 수로 나눠 yt-dlp ratelimit로 준다.
+    """
+    workers = max(1, _env_int("PLAYLIST_DOWNLOAD_WORKERS", 4))
+    per_host = max(1, _env_int("PLAYLIST_PER_HOST", 2))
+    hosts = len({host_key(u) for u in urls}) or 1
+    active = max(1, min(workers, per_host * hosts, len(urls)))
+    cap_kbps = _env_int("PLAYLIST_BANDWIDTH_KBPS", 0)
+    ratelimit = int(cap_kbps * 1024 / active) if cap_kbps > 0 else None
+    return {"workers": active, "per_host": per_host, "ratelimit": ratelimit}
+
+
+def run_downloads(urls: List[str], fetch: Callable[[int, Optional[int]], Any],
+                  on_result: Optional[Callable[[int, Any, Optional[BaseException]], None]] = None) -> None:
+    """
+    fetch(pos, ratelimit)를 호스트 제한 안에서 병렬 실행하고, 끝나는 순서대로 on_result(pos, 결과, 예외) 호출.
+    한 항목의 실패는 나머지에 영향을 주지 않는다.
+    """
+    plan = download_plan(urls)
+    limiter = HostLimiter(plan["per_host"])
+
+    def run(pos: int) -> Any:
+        with limiter.get(urls[pos]):
+            return fetch(pos, plan["ratelimit"])
+
+    with ThreadPoolExecutor(max_workers=plan["workers"], thread_name_prefix="ingest") as ex:
+        futures = {ex.submit(run, pos): pos for pos in range(len(urls))}
+        for fut in as_completed(futures):
+            pos = futures[fut]
+            try:
+                result, error = fut.result(), None
+            except Exception as e:
+                result, error = None, e
+            if on_result is not None:
+                try:
+                    on_result(pos, result, error)
+                except Exception:
+                    pass
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+from tasks.transcription import resolve_model_size, load_decoding_options
+from tasks.long_form import progress_chunk_sec
+from utils.artifacts import output_file, resolve_output
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/
+
+# 캐시 엔트리에 보관하는 산출물: (캐시 내 파일명, outputs 확장자)
+_ARTIFACTS = [("transcript.txt", "txt"), ("transcript.srt", "srt"), ("audio.mp3", "mp3")]
+
+
+def hash_audio(audio) -> str:
+    """디코딩된 16kHz PCM 버퍼의 내용 해시 (컨테이너/메타데이터가 달라도 같은 소리면 동일)."""
+    h = hashlib.sha256()
+    h.update(memoryview(audio).cast("B"))
+    return "audio:" + h.hexdigest()
+
+
+def transcription_params(model_size: Optional[str], language: Optional[str], diarize: bool,
+                         mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    결과에 영향을 주는 모델/언어/디코딩 파라미터 (캐시 키 구성 요소, 모델 로딩 불필요).
+    mode: 전체 디코딩과 결과가 다른 경로(예: URL 스트리밍 창 전사)의 구분값. 전체 디코딩 결과와 키가 섞이지 않는다.
+    """
+    params: Dict[str, Any] = {
+        "model": resolve_model_size(model_size),
+        "language": (language or "auto").lower(),
+        "diarize": bool(diarize),
+        # 조각 단위 디코딩은 한 번에 디코딩한 결과와 다르므로 키에 포함
+        "chunk_sec": progress_chunk_sec(),
+    }
+    if mode:
+        params["mode"] = mode
+    params.update(load_decoding_options())
+    return params
+
+
+def make_key(content_id: str, params: Dict[str, Any]) -> str:
+    raw = json.dumps({"content": content_id, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _copy_out(src: str, dst: str) -> None:
+    """작업 위치로 독립 사본을 만든다 (하드링크 시 작업 편집이 캐시/형제 작업에 번짐)."""
+    tmp = f"{dst}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class ResultCache:
+    """
+    내용 주소 기반 전사 결과 캐시.
+    - 엔트리 키: 디코딩 오디오 해시 + 파라미터
+    - 별칭(alias): 업로드 원본 해시, 정규화 URL/영상 id + 파라미터 → 엔트리 키
+    - 총 용량(max_bytes) 초과 시 최근 사용 시각 기준 LRU 축출
+    인덱스는 SQLite라 API/워커 프로세스가 함께 사용할 수 있다.
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._db_path = os.path.join(root, "index.db")
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+                CREATE TABLE IF NOT EXISTS aliases (
+                    alias TEXT PRIMARY KEY,
+                    key TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_aliases_key ON aliases(key);
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _bump(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES(?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def resolve(self, key: Optional[str] = None, alias: Optional[str] = None) -> Optional[str]:
+        """
+        엔트리 키 또는 별칭으로 조회. 적중은 항상, 미스는 엔트리 키 조회에서만 기록
+        (별칭 미스 뒤에는 오디오 키 조회가 이어지므로 작업당 한 번만 집계).
+        """
+        with self._lock, self._connect() as conn:
+            found = None
+            if alias:
+                row = conn.execute("SELECT key FROM aliases WHERE alias = ?", (alias,)).fetchone()
+                if row:
+                    found = row[0]
+            elif key:
+                found = key
+            if found:
+                row = conn.execute("SELECT key FROM entries WHERE key = ?", (found,)).fetchone()
+                if row and os.path.isdir(self._entry_dir(found)):
+                    conn.execute(
+                        "UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                        (time.time(), found),
+                    )
+                    self._bump(conn, "hits")
+                    return found
+            if not alias:
+                self._bump(conn, "misses")
+            return None
+
+    def add_alias(self, alias: str, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO aliases(alias, key) VALUES(?, ?) ON CONFLICT(alias) DO UPDATE SET key = excluded.key",
+                (alias, key),
+            )
+
+    def materialize(self, key: str, job_id: str, output_dir: str) -> Optional[Dict[str, Any]]:
+        """캐시된 산출물을 outputs의 작업 위치(팬아웃)에 즉시 배치하고 결과 메타를 반환."""
+        entry = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry, "result.json"), "r", encoding="utf-8") as f:
+                result = json.load(f)
+            placed: List[str] = []
+            for name, ext in _ARTIFACTS:
+                src = os.path.join(entry, name)
+                if os.path.exists(src):
+                    _copy_out(src, output_file(output_dir, job_id, ext, create=True))
+                    placed.append(ext)
+            result["artifacts"] = placed
+            return result
+        except Exception:
+            return None
+
+    def store(self, key: str, job_id: str, output_dir: str, result: Dict[str, Any], aliases: Optional[List[str]] = None) -> bool:
+        """완료된 작업의 산출물을 캐시에 복사하고 별칭을 연결한다."""
+        entry = self._entry_dir(key)
+        tmp = entry + f".tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            with open(os.path.join(tmp, "result.json"), "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            for name, ext in _ARTIFACTS:
+                src = resolve_output(output_dir, job_id, ext)
+                if os.path.exists(src):
+                    shutil.copyfile(src, os.path.join(tmp, name))
+            size = sum(os.path.getsize(os.path.join(tmp, n)) for n in os.listdir(tmp))
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO entries(key, size_bytes, created_at, last_used) VALUES(?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET size_bytes = excluded.size_bytes, last_used = excluded.last_used",
+                (key, size, now, now),
+            )
+            for alias in aliases or []:
+                conn.execute(
+                    "INSERT INTO aliases(alias, key) VALUES(?, ?) ON CONFLICT(alias) DO UPDATE SET key = excluded.key",
+                    (alias, key),
+                )
+            self._evict_locked(conn)
+        return True
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> None:
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size_bytes FROM entries ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+            self._bump(conn, "evictions")
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM entries").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": count,
+            "size_mb": round(size / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1) if self.max_bytes else None,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if (hits + misses) else None,
+            "evictions": counters.get("evictions", 0),
+        }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """RESULT_CACHE_ENABLED=0 이면 None. 위치/용량은 RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB."""
+    global _cache
+    if os.getenv("RESULT_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    max_mb = float(os.getenv("RESULT_CACHE_MAX_MB", "2048"))
+                except Exception:
+                    max_mb = 2048.0
+                root = os.getenv("RESULT_CACHE_DIR") or os.path.join(BASE_DIR, "cache", "results")
+                try:
+                    _cache = ResultCache(root, int(max_mb * 1024 * 1024) if max_mb > 0 else None)
+                except Exception as e:
+                    print(f"결과 캐시 초기화 실패: {e}")
+                    return None
+    return _cache
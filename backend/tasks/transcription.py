@@ -1,15 +1,51 @@
 import whisper
 import os
+import threading
 try:
     import torch
 except Exception:
     torch = None
 
+# 강제 지정 가능한 언어 코드 (그 외는 자동 감지)
+ALLOWED_LANGUAGES = {"ko", "en", "ja", "zh", "es", "fr"}
+
+
+def resolve_model_size(model_size: str | None = None) -> str:
+    # 명시된 모델 크기 우선, 없으면 환경변수 → base
+    return (model_size or os.getenv("WHISPER_MODEL_SIZE") or "base").strip()
+
+
+def load_decoding_options() -> dict:
+    """전사 옵션 (환경변수 기반 튜닝). 모델 로딩 없이도 결과 캐시 키 계산에 사용."""
+    try:
+        beam_size = int(os.getenv("WHISPER_BEAM_SIZE", "3"))
+    except Exception:
+        beam_size = 3
+    try:
+        best_of = int(os.getenv("WHISPER_BEST_OF", "3"))
+    except Exception:
+        best_of = 3
+    try:
+        temperature = float(os.getenv("WHISPER_TEMPERATURE", "0.0"))
+    except Exception:
+        temperature = 0.0
+    return {
+        "beam_size": beam_size,
+        "best_of": best_of,
+        "temperature": temperature,
+        # 반복 억제/무음 처리 파라미터 (환경변수로 조절 가능)
+        "condition_on_previous_text": os.getenv("WHISPER_CONDITION_ON_PREV", "false").lower() in ("1", "true", "yes"),
+        "compression_ratio_threshold": float(os.getenv("WHISPER_COMPRESSION_RATIO", "2.4")),
+        "no_speech_threshold": float(os.getenv("WHISPER_NO_SPEECH", "0.6")),
+        # 단어 타임스탬프 (화자 분리 단어 단위 매칭용)
+        "word_timestamps": os.getenv("WHISPER_WORD_TIMESTAMPS", "false").lower() in ("1", "true", "yes"),
+    }
+
 
 class TranscriptionService:
-    def __init__(self, model_size: str = "base"):
-        env_model = os.getenv("WHISPER_MODEL_SIZE")
-        selected_model_size = (env_model or model_size).strip()
+    def __init__(self, model_size: str | None = None):
+        selected_model_size = resolve_model_size(model_size)
+        self.model_size = selected_model_size
 
         env_device = (os.getenv("WHISPER_DEVICE") or "").lower()
         if env_device in ("cpu", "cuda"):
@@ -19,19 +55,12 @@ class TranscriptionService:
 
         print(f"Whisper 모델 로딩 중... ({selected_model_size}, device={self.device})")
         self.model = whisper.load_model(selected_model_size, device=self.device)
-        # 전사 옵션 (환경변수 기반 튜닝)
-        try:
-            self.beam_size = int(os.getenv("WHISPER_BEAM_SIZE", "3"))
-        except Exception:
-            self.beam_size = 3
-        try:
-            self.best_of = int(os.getenv("WHISPER_BEST_OF", "3"))
-        except Exception:
-            self.best_of = 3
-        try:
-            self.temperature = float(os.getenv("WHISPER_TEMPERATURE", "0.0"))
-        except Exception:
-            self.temperature = 0.0
+        # Whisper 디코딩은 kv-cache 훅을 모델에 설치하므로 같은 모델의 동시 추론을 직렬화
+        self.lock = threading.RLock()
+        self.options = load_decoding_options()
+        self.beam_size = self.options["beam_size"]
+        self.best_of = self.options["best_of"]
+        self.temperature = self.options["temperature"]
         env_fp16 = os.getenv("WHISPER_FP16")
         if env_fp16 is None:
             self.fp16 = (self.device == "cuda")
@@ -39,46 +68,37 @@ class TranscriptionService:
             self.fp16 = env_fp16.lower() in ("1", "true", "yes")
         print("모델 로딩 완료!")
 
-    def transcribe(self, audio_path: str, language: str = "ko"):
+    def transcribe(self, audio, language: str = "ko", progress_cb=None, segment_cb=None):
+        """
+        audio: 16kHz 모노 float32 배열(load_audio_pcm 결과) 또는 파일 경로.
+        progress_cb(decoded_sec, total_sec) / segment_cb(segment): 실시간 진행 보고용 (선택).
+        """
         # 언어 코드 정규화: ko, en, ja, zh, es, fr만 강제, 그 외/빈값은 자동 감지(None)
-        allowed = {"ko", "en", "ja", "zh", "es", "fr"}
         lang = (language or "").lower().strip()
-        lang_arg = lang if lang in allowed else None
+        lang_arg = lang if lang in ALLOWED_LANGUAGES else None
+
+        # 경로가 오면 한 번만 디코딩해 언어 감지/전사에 재사용
+        if isinstance(audio, str):
+            try:
+                audio = whisper.load_audio(audio)
+            except Exception as e:
+                return {"success": False, "error": str(e)}
 
         # 자동 감지 개선: 사전 감지 + 허용 언어에 한해 확률 임계치로 고정
         if lang_arg is None:
-            try:
-                audio = whisper.load_audio(audio_path)
-                audio = whisper.pad_or_trim(audio)
-                mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
-                _, probs = self.model.detect_language(mel)
-                # 허용 언어에 한해 최대 확률 선택
-                best_lang = None
-                best_prob = 0.0
-                for k, p in probs.items():
-                    if k in allowed and float(p) > best_prob:
-                        best_lang, best_prob = k, float(p)
-                # 임계치 (환경변수 조정 가능)
-                threshold = float(os.getenv("WHISPER_LANG_THRESHOLD", "0.55"))
-                if best_lang and best_prob >= threshold:
-                    lang_arg = best_lang
-            except Exception:
-                pass
+            lang_arg = self.detect_language(audio)
         try:
-            result = self.model.transcribe(
-                audio_path,
-                language=lang_arg,  # None이면 Whisper 자동 감지
-                task="transcribe",
-                fp16=self.fp16,
-                beam_size=self.beam_size,
-                best_of=self.best_of,
-                temperature=self.temperature,
-                # 반복 억제/무음 처리 파라미터 (환경변수로 조절 가능)
-                condition_on_previous_text=os.getenv("WHISPER_CONDITION_ON_PREV", "false").lower() in ("1", "true", "yes"),
-                compression_ratio_threshold=float(os.getenv("WHISPER_COMPRESSION_RATIO", "2.4")),
-                no_speech_threshold=float(os.getenv("WHISPER_NO_SPEECH", "0.6")),
-                verbose=False,
-            )
+            # 배칭 서버 사용 시 30초 윈도를 다른 작업과 묶어 디코딩,
+            # 긴 미디어는 무음 경계로 잘라 프로세스 풀에서 병렬 전사
+            from tasks.batch_inference import batching_enabled, transcribe_batched
+            # (디코딩 방식은 설정으로만 정해진다: 진행 콜백 유무로 결과가 달라지면 결과 캐시가 섞임)
+            from tasks.long_form import should_use_long_form, transcribe_long_form, transcribe_single
+            if batching_enabled():
+                result = transcribe_batched(self, audio, lang_arg, progress_cb, segment_cb)
+            elif should_use_long_form(audio):
+                result = transcribe_long_form(self, audio, lang_arg, progress_cb, segment_cb)
+            else:
+                result = transcribe_single(self, audio, lang_arg, progress_cb, segment_cb)
             return {
                 "success": True,
                 "text": result.get("text", ""),
@@ -88,6 +108,46 @@ class TranscriptionService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def detect_language(self, audio) -> str | None:
+        """허용 언어 중 첫 30초 기준 최고 확률 언어(임계치 미만이면 None)."""
+        try:
+            clip = whisper.pad_or_trim(audio)
+            mel = whisper.log_mel_spectrogram(clip, self.model.dims.n_mels).to(self.model.device)
+            with self.lock:
+                _, probs = self.model.detect_language(mel)
+            # 허용 언어에 한해 최대 확률 선택
+            best_lang = None
+            best_prob = 0.0
+            for k, p in probs.items():
+                if k in ALLOWED_LANGUAGES and float(p) > best_prob:
+                    best_lang, best_prob = k, float(p)
+            # 임계치 (환경변수 조정 가능)
+            threshold = float(os.getenv("WHISPER_LANG_THRESHOLD", "0.55"))
+            if best_lang and best_prob >= threshold:
+                return best_lang
+        except Exception:
+            pass
+        return None
+
+    def decode(self, audio, lang_arg: str | None, initial_prompt: str | None = None) -> dict:
+        """Whisper 원시 전사 결과(dict). audio는 16kHz float32 배열 또는 파일 경로."""
+        with self.lock:
+            return self.model.transcribe(
+                audio,
+                language=lang_arg,  # None이면 Whisper 자동 감지
+                task="transcribe",
+                fp16=self.fp16,
+                beam_size=self.beam_size,
+                best_of=self.best_of,
+                temperature=self.temperature,
+                condition_on_previous_text=self.options["condition_on_previous_text"],
+                compression_ratio_threshold=self.options["compression_ratio_threshold"],
+                no_speech_threshold=self.options["no_speech_threshold"],
+                initial_prompt=initial_prompt,
+                word_timestamps=self.options["word_timestamps"],
+                verbose=False,
+            )
+
     def save_transcription(self, result: dict, output_path: str) -> bool:
         try:
             with open(output_path, "w", encoding="utf-8") as f:
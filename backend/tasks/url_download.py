@@ -1,6 +1,163 @@
+import copy
+import functools
+import json
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from typing import Tuple, Dict, Any, Optional, Callable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.artifacts import fanout_dir, record_artifact
+
+_YOUTUBE_ID_PATTERNS = [
+    r"(?:youtube\.com|youtube-nocookie\.com)/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/|v/)([A-Za-z0-9_-]{11})",
+    r"youtu\.be/([A-Za-z0-9_-]{11})",
+]
+_TRACKING_PARAMS = {"si", "feature", "fbclid", "gclid", "igshid", "ref", "ref_src"}
+
+
+@functools.lru_cache(maxsize=4096)
+def extractor_media_key(url: str) -> Optional[str]:
+    """
+    yt-dlp 추출기의 URL 패턴만으로(네트워크 없이) "추출기:영상id" 키를 구한다.
+    YoutubeDL과 같은 순서로 처음 맞는 추출기를 쓰며, 범용(Generic) 추출기/미설치 시 None.
+    추출기 클래스 로딩과 패턴 매칭이 느리므로 API 이벤트 루프에서는 스레드 풀로 호출한다.
+    YTDLP_EXTRACTOR_KEYS=0 이면 건너뛰고 URL 정규화만 쓴다.
+    """
+    if os.getenv("YTDLP_EXTRACTOR_KEYS", "1").lower() in ("0", "false", "no"):
+        return None
+    try:
+        from yt_dlp.extractor import gen_extractor_classes  # type: ignore
+    except Exception:
+        return None
+    for ie in gen_extractor_classes():
+        try:
+            if ie.ie_key() == "Generic" or not ie.suitable(url):
+                continue
+            video_id = ie.get_temp_id(url)
+            return f"{ie.ie_key().lower()}:{video_id}" if video_id else None
+        except Exception:
+            continue
+    return None
+
+
+def canonical_media_key(url: str) -> str:
+    """
+    같은 미디어를 가리키는 URL을 하나의 키로 정규화.
+    YouTube는 영상 id, 그 외 사이트는 yt-dlp 추출기의 영상 id,
+    둘 다 없으면 스킴/호스트 소문자화 + 프래그먼트/추적 파라미터 제거 + 쿼리 정렬.
+    """
+    raw = str(url or "").strip()
+    for pat in _YOUTUBE_ID_PATTERNS:
+        m = re.search(pat, raw)
+        if m:
+            return f"youtube:{m.group(1)}"
+    media_key = extractor_media_key(raw)
+    if media_key:
+        return media_key
+    parts = urlsplit(raw)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    return "url:" + urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+# ---- 추출 메타 TTL 캐시: 프로세스 내 LRU + (가능하면) Redis 공유 ----
+# 포맷 URL은 몇 시간 뒤 만료되므로 TTL은 짧게 (YTDLP_INFO_TTL_SEC, 기본 900초)
+
+def _info_ttl() -> int:
+    try:
+        return max(0, int(os.getenv("YTDLP_INFO_TTL_SEC", "900")))
+    except Exception:
+        return 900
+
+
+_info_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_info_lock = threading.Lock()
+_INFO_CACHE_MAX = 256
+_redis_client = None
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        with _info_lock:
+            if _redis_client is None:
+                import redis  # type: ignore
+                _redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _redis_client
+
+
+def _info_redis_key(key: str) -> str:
+    return f"ytdlp:info:{key}"
+
+
+def get_cached_info(key: str) -> Optional[Dict[str, Any]]:
+    ttl = _info_ttl()
+    if not ttl:
+        return None
+    now = time.time()
+    with _info_lock:
+        item = _info_cache.get(key)
+        if item is not None:
+            if item[0] > now:
+                _info_cache.move_to_end(key)
+                # process_ie_result가 info를 고치므로 캐시 원본 대신 복사본을 넘김
+                return copy.deepcopy(item[1])
+            _info_cache.pop(key, None)
+    try:
+        raw = _redis().get(_info_redis_key(key))
+        if raw:
+            info = json.loads(raw)
+            with _info_lock:
+                _info_cache[key] = (now + ttl, info)
+            return copy.deepcopy(info)
+    except Exception:
+        pass
+    return None
+
+
+def put_cached_info(key: str, info: Dict[str, Any]) -> None:
+    ttl = _info_ttl()
+    if not ttl or not isinstance(info, dict):
+        return
+    with _info_lock:
+        _info_cache[key] = (time.time() + ttl, info)
+        _info_cache.move_to_end(key)
+        while len(_info_cache) > _INFO_CACHE_MAX:
+            _info_cache.popitem(last=False)
+    try:
+        _redis().setex(_info_redis_key(key), ttl, json.dumps(info, ensure_ascii=False, default=str))
+    except Exception:
+        pass
+
+
+def invalidate_cached_info(key: str) -> None:
+    with _info_lock:
+        _info_cache.pop(key, None)
+    try:
+        _redis().delete(_info_redis_key(key))
+    except Exception:
+        pass
+
+
+def _estimated_size(info: Dict[str, Any]) -> Optional[float]:
+    # 단일 포맷이면 그 크기, 영상+음성 병합이면 요청 포맷 크기 합
+    size = info.get("filesize") or info.get("filesize_approx")
+    if size:
+        return size
+    parts = [f.get("filesize") or f.get("filesize_approx") for f in (info.get("requested_formats") or [])]
+    if parts and all(isinstance(p, (int, float)) for p in parts):
+        return sum(parts)
+    return None
 
 
 def download_media_via_ytdlp(
@@ -8,9 +165,16 @@ def download_media_via_ytdlp(
     job_id: str,
     output_dir: str,
     progress_cb: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+    ratelimit: Optional[int] = None,
+    ydl_factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
 ) -> Tuple[bool, Dict[str, Any]]:
     """주어진 URL의 미디어를 yt-dlp로 다운로드한다.
 
+    ratelimit: 다운로드 속도 상한(바이트/초). 재생목록 수집에서 전체 대역폭 상한을 나눠 준다.
+    ydl_factory: ydl_opts → YoutubeDL 호환 객체 (기본 YoutubeDL). 로컬 HTTP 대역 서버에 붙여
+      extract_info 호출 횟수를 세는 식으로 단일 추출/메타 캐시를 네트워크 없이 확인할 때 사용.
+      (로컬 서버의 미디어 파일 URL은 범용 추출기로 처리되고 키는 "url:..." 정규화 URL)
+
     반환값: (성공여부, 결과/오류)
       - 성공 시 결과: {
           'path': 다운로드된 파일 절대경로,
@@ -19,12 +183,15 @@ def download_media_via_ytdlp(
         }
       - 실패 시 결과: {'error': '메시지'}
     """
-    try:
-        from yt_dlp import YoutubeDL  # type: ignore
-    except Exception as e:
-        return False, {"error": f"yt-dlp 미설치 또는 로드 실패: {e}"}
+    if ydl_factory is None:
+        try:
+            from yt_dlp import YoutubeDL  # type: ignore
+        except Exception as e:
+            return False, {"error": f"yt-dlp 미설치 또는 로드 실패: {e}"}
+        ydl_factory = YoutubeDL
 
-    os.makedirs(output_dir, exist_ok=True)
+    # 작업별 팬아웃 디렉터리에 저장 (uploads/ 전체를 나열하지 않도록)
+    job_dir = fanout_dir(output_dir, job_id, create=True)
 
     # 환경 설정
     max_mb_env = os.getenv("YTDLP_MAX_MB")
@@ -40,7 +207,7 @@ def download_media_via_ytdlp(
     user_agent = os.getenv("YTDLP_USER_AGENT")
 
     # 제목이 없을 수 있으므로 파이프 폴백을 사용하고, 서식 지정자(s) 포함
-    outtmpl = os.path.join(output_dir, f"{job_id}_%(title|id|epoch)s.%(ext)s")
+    outtmpl = os.path.join(job_dir, f"{job_id}_%(title|id|epoch)s.%(ext)s")
     def _hook(d: Dict[str, Any]):
         if progress_cb is None:
             return
@@ -71,25 +238,35 @@ def download_media_via_ytdlp(
         ydl_opts["cookiefile"] = cookies
     if user_agent:
         ydl_opts["user_agent"] = user_agent
+    if ratelimit:
+        ydl_opts["ratelimit"] = int(ratelimit)
 
+    key = canonical_media_key(url)
     try:
-        # 1) 정보 추출 (선다운로드 없이)로 크기/제목 확인
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+        with ydl_factory(ydl_opts) as ydl:
+            # 1) 정보 추출은 한 번만: 캐시(같은 영상 id로 최근에 추출한 메타) 우선
+            info = get_cached_info(key)
+            from_cache = info is not None
+            if info is None:
+                info = ydl.extract_info(url, download=False)
+                put_cached_info(key, ydl.sanitize_info(info))
             title = info.get("title")
             # 파일 크기 제한 검사 (가능한 경우)
             if max_bytes:
-                sz = (
-                    info.get("filesize")
-                    or info.get("filesize_approx")
-                    or (info.get("requested_formats") or [{}])[0].get("filesize")
-                )
+                sz = _estimated_size(info)
                 if isinstance(sz, (int, float)) and sz > max_bytes:
                     return False, {"error": "파일이 너무 큽니다"}
 
-        # 2) 실제 다운로드
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
+            # 2) 같은 info로 실제 다운로드 (추출기/페이지 파싱 재실행 없음)
+            try:
+                info = ydl.process_ie_result(info, download=True)
+            except Exception:
+                if not from_cache:
+                    raise
+                # 캐시된 포맷 URL이 만료된 경우: 한 번만 새로 추출해 재시도
+                invalidate_cached_info(key)
+                info = ydl.extract_info(url, download=True)
+                put_cached_info(key, ydl.sanitize_info(info))
             # 파일 경로 계산: 요청된 다운로드 목록 우선 사용
             filepath = None
             try:
@@ -107,9 +284,9 @@ def download_media_via_ytdlp(
             if not filepath or not os.path.exists(filepath):
                 # outtmpl로 예상 파일명들 중 존재하는 것을 탐색
                 title = info.get("title") or "download"
-                # 확장자는 가변적이므로 폴더 내에서 job_id_ 로 시작하는 최신 파일 탐색
+                # 확장자는 가변적이므로 작업 팬아웃 디렉터리(파일 수십 개 이내)에서 job_id_ 로 시작하는 최신 파일 탐색
                 candidates = [
-                    os.path.join(output_dir, f) for f in os.listdir(output_dir)
+                    os.path.join(job_dir, f) for f in os.listdir(job_dir)
                     if f.startswith(f"{job_id}_")
                 ]
                 candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True)
@@ -117,6 +294,7 @@ def download_media_via_ytdlp(
                 if not filepath or not os.path.exists(filepath):
                     return False, {"error": "다운로드된 파일을 찾을 수 없습니다"}
                 ext = os.path.splitext(filepath)[1].lstrip(".")
+                record_artifact(job_id, "source", filepath, "download")
                 return True, {"path": filepath, "title": title, "ext": ext}
 
             ext = os.path.splitext(filepath)[1].lstrip(".")
@@ -126,6 +304,7 @@ def download_media_via_ytdlp(
                 t = re.sub(r"\s+", " ", str(t or "").strip())
                 return t[:120] if len(t) > 120 else t
             title = normalize_title(raw_title)
+            record_artifact(job_id, "source", filepath, "download")
             return True, {"path": filepath, "title": title, "ext": ext}
     except Exception as e:
         return False, {"error": str(e)}
@@ -0,0 +1,338 @@
+"""
+URL 스트리밍 전사: 다운로드가 끝나기를 기다리지 않고 받는 즉시 디코딩/전사한다.
+
+yt-dlp로 오디오 전용 포맷의 직접 URL만 얻은 뒤, HTTP 본문을 받는 대로 ffmpeg stdin에 흘려
+16kHz 모노 PCM을 만들고, 30초 창이 채워질 때마다 Whisper로 바로 전사한다.
+다운로드/디코딩/전사가 각자의 스레드에서 겹쳐 돌아가므로 긴 팟캐스트도 첫 구간이 수 초 안에 나온다.
+"""
+import os
+import subprocess
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import ffmpeg
+import numpy as np
+
+from tasks.long_form import SAMPLE_RATE, _emit_segments, _frame_energy, merge_chunk_results
+from tasks.url_download import canonical_media_key, get_cached_info, put_cached_info
+
+_READ_BYTES = 64 * 1024
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def stream_mode_enabled() -> bool:
+    """URL_STREAM_MODE=1 이면 URL 작업을 기본으로 스트리밍 모드로 처리."""
+    return os.getenv("URL_STREAM_MODE", "false").lower() in ("1", "true", "yes")
+
+
+def _is_http(fmt: Dict[str, Any]) -> bool:
+    return str(fmt.get("protocol") or "http").startswith("http") and bool(fmt.get("url"))
+
+
+def pick_stream_format(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    파이프로 바로 디먹스할 수 있는 HTTP(S) 포맷 선택: 오디오 전용 우선, webm/opus 우선(헤더가 앞에 있음),
+    같은 조건이면 비트레이트가 높은 것. 분할 스트림(HLS/DASH 매니페스트)만 있으면 None.
+    """
+    formats = [f for f in (info.get("formats") or []) if _is_http(f)]
+    if not formats:
+        return info if _is_http(info) else None
+    audio_only = [f for f in formats if f.get("vcodec") == "none" and f.get("acodec") not in (None, "none")]
+    with_audio = [f for f in formats if f.get("acodec") not in (None, "none")]
+    pool = audio_only or with_audio
+    if not pool:
+        return None
+    return max(pool, key=lambda f: (f.get("ext") == "webm", f.get("abr") or f.get("tbr") or 0))
+
+
+def resolve_audio_stream(url: str) -> Tuple[bool, Dict[str, Any]]:
+    """
+    다운로드 없이 정보만 추출(메타 캐시 공유)해 오디오 스트림의 직접 URL을 구한다.
+    반환: (True, {"stream_url", "headers", "title", "duration", "filesize", "chunk_size"}) 또는 (False, {"error"})
+    """
+    try:
+        from yt_dlp import YoutubeDL  # type: ignore
+    except Exception as e:
+        return False, {"error": f"yt-dlp 미설치 또는 로드 실패: {e}"}
+
+    ydl_opts: Dict[str, Any] = {
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": True,
+        "socket_timeout": int(os.getenv("YTDLP_SOCKET_TIMEOUT", "30")),
+    }
+    if os.getenv("YTDLP_PROXY"):
+        ydl_opts["proxy"] = os.getenv("YTDLP_PROXY")
+    cookies = os.getenv("YTDLP_COOKIES_FILE")
+    if cookies and os.path.exists(cookies):
+        ydl_opts["cookiefile"] = cookies
+    if os.getenv("YTDLP_USER_AGENT"):
+        ydl_opts["user_agent"] = os.getenv("YTDLP_USER_AGENT")
+
+    key = canonical_media_key(url)
+    try:
+        info = get_cached_info(key)
+        if info is None:
+            with YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+                info = ydl.sanitize_info(info)
+            put_cached_info(key, info)
+    except Exception as e:
+        return False, {"error": str(e)}
+    if info.get("_type") in ("playlist", "multi_video") or info.get("is_live"):
+        return False, {"error": "스트리밍 모드는 단일 VOD 미디어만 지원합니다"}
+    fmt = pick_stream_format(info)
+    if fmt is None:
+        return False, {"error": "HTTP로 직접 받을 수 있는 오디오 포맷이 없습니다"}
+    headers = dict(fmt.get("http_headers") or info.get("http_headers") or {})
+    if os.getenv("YTDLP_USER_AGENT"):
+        headers["User-Agent"] = os.getenv("YTDLP_USER_AGENT")
+    return True, {
+        "stream_url": fmt["url"],
+        "headers": headers,
+        "title": info.get("title"),
+        "duration": info.get("duration"),
+        "filesize": fmt.get("filesize") or fmt.get("filesize_approx"),
+        # YouTube 등은 큰 Range 요청을 스로틀하므로 yt-dlp가 쓰는 청크 크기로 나눠 받는다
+        "chunk_size": (fmt.get("downloader_options") or {}).get("http_chunk_size"),
+    }
+
+
+class PcmStream:
+    """
+    HTTP 본문 → ffmpeg stdin, ffmpeg stdout(s16le) → 내부 버퍼를 각각 스레드로 돌린다.
+    전사가 느려도 다운로드/디코딩은 멈추지 않으며, 소비 측은 wait_for로 필요한 샘플 수를 기다린다.
+    """
+
+    def __init__(self, stream_url: str, headers: Dict[str, str], total_bytes: Optional[int] = None,
+                 chunk_size: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.stream_url = stream_url
+        self.headers = headers
+        self.total_bytes = int(total_bytes) if total_bytes else None
+        self.chunk_size = int(chunk_size) if chunk_size else None
+        self.max_bytes = max_bytes
+        self.downloaded_bytes = 0
+        self.error: Optional[str] = None
+        self.finished = False
+        self._pcm = bytearray()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._proc: Optional[subprocess.Popen] = None
+        self._stderr = b""
+
+    # ---- 생산 측 ----
+
+    def start(self) -> "PcmStream":
+        args = (
+            ffmpeg.input("pipe:0")
+            .output("pipe:1", format="s16le", acodec="pcm_s16le", ac=1, ar=str(SAMPLE_RATE))
+            .global_args("-loglevel", "error")
+            .compile()
+        )
+        self._proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        for target, name in ((self._download, "stream-dl"), (self._read_pcm, "stream-pcm"),
+                             (self._drain_stderr, "stream-err")):
+            threading.Thread(target=target, name=name, daemon=True).start()
+        return self
+
+    def _opener(self):
+        proxy = os.getenv("YTDLP_PROXY")
+        if proxy:
+            return urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy, "https": proxy}))
+        return urllib.request.build_opener()
+
+    def _download(self) -> None:
+        timeout = _env_float("YTDLP_SOCKET_TIMEOUT", 30.0)
+        opener = self._opener()
+        try:
+            while not self._stop.is_set():
+                headers = dict(self.headers)
+                before = self.downloaded_bytes
+                ranged = bool(self.chunk_size and self.total_bytes)
+                if ranged:
+                    end = min(self.total_bytes, self.downloaded_bytes + self.chunk_size) - 1
+                    headers["Range"] = f"bytes={self.downloaded_bytes}-{end}"
+                req = urllib.request.Request(self.stream_url, headers=headers)
+                with opener.open(req, timeout=timeout) as resp:
+                    if self.total_bytes is None and not ranged:
+                        length = resp.headers.get("Content-Length")
+                        self.total_bytes = int(length) if length and length.isdigit() else None
+                    while not self._stop.is_set():
+                        data = resp.read(_READ_BYTES)
+                        if not data:
+                            break
+                        self.downloaded_bytes += len(data)
+                        if self.max_bytes and self.downloaded_bytes > self.max_bytes:
+                            raise RuntimeError("파일이 너무 큽니다")
+                        self._proc.stdin.write(data)
+                if not ranged or self.downloaded_bytes >= self.total_bytes or self.downloaded_bytes == before:
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg가 먼저 종료: 종료 코드/stderr로 원인 보고
+            pass
+        except Exception as e:
+            self.error = f"스트림 다운로드 실패: {e}"
+        finally:
+            try:
+                self._proc.stdin.close()
+            except Exception:
+                pass
+
+    def _read_pcm(self) -> None:
+        try:
+            while True:
+                data = self._proc.stdout.read1(_READ_BYTES)
+                if not data:
+                    break
+                with self._cond:
+                    self._pcm += data
+                    self._cond.notify_all()
+            code = self._proc.wait()
+            if code != 0 and self.error is None and not self._stop.is_set():
+                detail = self._stderr.decode("utf-8", errors="ignore").strip().splitlines()
+                self.error = f"스트림 디코딩 실패: {detail[-1] if detail else code}"
+        finally:
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    def _drain_stderr(self) -> None:
+        # stderr를 비워야 ffmpeg가 로그 출력에서 멈추지 않음
+        try:
+            self._stderr = self._proc.stderr.read()
+        except Exception:
+            pass
+
+    # ---- 소비 측 ----
+
+    @property
+    def samples(self) -> int:
+        return len(self._pcm) // 2
+
+    def wait_for(self, n_samples: int, timeout: float = 1.0) -> int:
+        """n_samples 이상 쌓이거나 스트림이 끝날 때까지(최대 timeout초) 대기, 현재 샘플 수 반환."""
+        with self._cond:
+            if self.samples < n_samples and not self.finished:
+                self._cond.wait(timeout)
+            return self.samples
+
+    def slice(self, start: int, end: int) -> np.ndarray:
+        with self._cond:
+            raw = bytes(self._pcm[start * 2:end * 2])
+        return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+    def audio(self) -> np.ndarray:
+        return self.slice(0, self.samples)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._proc is not None and self._proc.poll() is None:
+            try:
+                self._proc.kill()
+            except Exception:
+                pass
+
+
+def _quiet_cut(window: np.ndarray, search_sec: float, frame_ms: int = 30, smooth_ms: int = 300) -> int:
+    """창 끝에서 search_sec 이내의 가장 조용한 지점(샘플 인덱스). 발화 중간을 자르지 않기 위함."""
+    search = int(search_sec * SAMPLE_RATE)
+    if search <= 0 or len(window) <= search:
+        return len(window)
+    frame = int(SAMPLE_RATE * frame_ms / 1000)
+    tail = window[len(window) - search:]
+    energy = _frame_energy(tail, frame)
+    if len(energy) == 0:
+        return len(window)
+    k = max(1, int(smooth_ms / frame_ms))
+    if k > 1 and len(energy) > k:
+        energy = np.convolve(energy, np.ones(k, dtype=np.float32) / k, mode="same")
+    return len(window) - search + int(np.argmin(energy)) * frame
+
+
+def stream_cache_mode() -> str:
+    """스트리밍 전사 결과의 캐시 구분값 (창/무음 탐색 길이가 달라지면 결과도 달라짐)."""
+    return "stream:{:g}/{:g}".format(_env_float("WHISPER_STREAM_WINDOW_SEC", 30.0),
+                                     _env_float("WHISPER_STREAM_SEARCH_SEC", 5.0))
+
+
+def transcribe_stream(svc, stream: PcmStream, language: Optional[str],
+                      progress_cb: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      segment_cb: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      total_sec: Optional[float] = None) -> Dict[str, Any]:
+    """
+    WHISPER_STREAM_WINDOW_SEC(기본 30초, Whisper 입력 창 길이) 창이 채워지는 대로 순서대로 전사.
+    창 끝 WHISPER_STREAM_SEARCH_SEC 이내 무음 지점에서 자르고, 첫 창에서 정한 언어로 이후 창을 고정한다.
+    progress_cb(state): {"decoded_sec", "buffered_sec", "total_sec", "downloaded_bytes", "total_bytes"}
+    """
+    from tasks.transcription import ALLOWED_LANGUAGES
+
+    window = int(_env_float("WHISPER_STREAM_WINDOW_SEC", 30.0) * SAMPLE_RATE)
+    search_sec = _env_float("WHISPER_STREAM_SEARCH_SEC", 5.0)
+    lang = (language or "").lower().strip()
+    lang_arg = lang if lang in ALLOWED_LANGUAGES else None
+    condition = svc.options.get("condition_on_previous_text", False)
+
+    parts: List[Tuple[float, Dict[str, Any]]] = []
+    next_id = 0
+    prompt = None
+    pos = 0
+    last_report = 0.0
+
+    def report(force: bool = False) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if progress_cb is None or (not force and now - last_report < 1.0):
+            return
+        last_report = now
+        try:
+            progress_cb({
+                "decoded_sec": pos / float(SAMPLE_RATE),
+                "buffered_sec": stream.samples / float(SAMPLE_RATE),
+                "total_sec": total_sec,
+                "downloaded_bytes": stream.downloaded_bytes,
+                "total_bytes": stream.total_bytes,
+            })
+        except Exception:
+            pass
+
+    while True:
+        available = stream.wait_for(pos + window)
+        if stream.error:
+            raise RuntimeError(stream.error)
+        if available - pos < window and not stream.finished:
+            report()
+            continue
+        # 끝에 남은 0.2초 미만 꼬리는 버림 (빈 창 디코딩 방지)
+        if available - pos < int(0.2 * SAMPLE_RATE) and (parts or available <= pos):
+            break
+        chunk = stream.slice(pos, min(available, pos + window))
+        if len(chunk) == window and not (stream.finished and available - pos == window):
+            chunk = chunk[:_quiet_cut(chunk, search_sec)]
+        offset_sec = pos / float(SAMPLE_RATE)
+        # 첫 창: 언어 사전 감지 (확신이 낮으면 디코딩 결과의 언어로 고정)
+        if not parts and lang_arg is None:
+            lang_arg = svc.detect_language(chunk)
+        res = svc.decode(chunk, lang_arg, initial_prompt=prompt)
+        if lang_arg is None and res.get("language"):
+            lang_arg = res["language"]
+        parts.append((offset_sec, res))
+        next_id = _emit_segments(res, offset_sec, next_id, segment_cb)
+        pos += len(chunk)
+        if condition:
+            prompt = res.get("text", "")[-224:] or None
+        report(force=True)
+
+    if not parts:
+        raise RuntimeError("오디오 추출 실패: 오디오 스트림이 없습니다")
+    merged = merge_chunk_results(parts)
+    merged["language"] = lang_arg or merged.get("language") or "auto"
+    merged["success"] = True
+    return merged
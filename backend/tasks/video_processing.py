@@ -1,4 +1,12 @@
+import asyncio
+import hashlib
+import os
+import wave
+
 import ffmpeg
+import numpy as np
+
+SAMPLE_RATE = 16000
 
 
 def extract_audio(video_path: str, output_audio_path: str):
@@ -29,6 +37,133 @@ def convert_wav_to_mp3(wav_path: str, mp3_path: str):
         return False, f"MP3 변환 실패: {str(e)}"
 
 
+def load_audio_pcm(source_path: str, sample_rate: int = SAMPLE_RATE):
+    """
+    원본 미디어를 ffmpeg stdout 파이프로 한 번만 디코딩해 16kHz 모노 float32 배열로 반환.
+    임시 WAV를 쓰지 않으며, 이후 언어 감지/전사/화자 분리/MP3 인코딩이 이 버퍼를 공유한다.
+    """
+    try:
+        out, _ = (
+            ffmpeg.input(source_path, threads=0)
+            .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=str(sample_rate))
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        detail = (e.stderr or b"").decode("utf-8", errors="ignore").strip().splitlines()
+        return False, f"오디오 추출 실패: {detail[-1] if detail else str(e)}"
+    audio = np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+    if audio.size == 0:
+        return False, "오디오 추출 실패: 오디오 스트림이 없습니다"
+    return True, audio
+
+
+async def extract_audio_from_stream(chunks, output_audio_path: str, max_bytes: int, sample_rate: int = SAMPLE_RATE):
+    """
+    요청 본문 청크(async iterator)를 받는 즉시 ffmpeg stdin으로 흘려 16kHz 모노 WAV만 기록.
+    원본 동영상은 디스크에 쓰지 않으며, 받은 바이트의 sha256(결과 캐시 별칭용)을 함께 계산.
+    반환: (True, {"bytes", "sha256"}) 또는 (False, {"status", "error"})
+      413: max_bytes 초과 / 400: 본문 수신 중단 / 422: 파이프에서 디먹스 불가(moov atom 뒤쪽 MP4 등) 또는 오디오 없음
+    """
+    args = (
+        ffmpeg.input("pipe:0")
+        .output(output_audio_path, format="wav", acodec="pcm_s16le", ac=1, ar=str(sample_rate))
+        .overwrite_output()
+        .compile()
+    )
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # stderr를 동시에 비워야 ffmpeg가 로그 출력에서 멈추지 않음
+    stderr_task = asyncio.create_task(proc.stderr.read())
+    h = hashlib.sha256()
+    received = 0
+    failure = None
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            received += len(chunk)
+            if received > max_bytes:
+                failure = {"status": 413, "error": f"파일이 너무 큽니다 (최대 {max_bytes // (1024 * 1024)}MB)"}
+                break
+            h.update(chunk)
+            proc.stdin.write(chunk)
+            try:
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg가 먼저 종료: 아래에서 종료 코드/stderr로 원인 보고
+                break
+    except Exception:
+        failure = {"status": 400, "error": "업로드 본문 수신이 중단되었습니다"}
+    finally:
+        if failure is not None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        try:
+            proc.stdin.close()
+        except Exception:
+            pass
+        code = await proc.wait()
+        stderr = await stderr_task
+
+    if failure is None and code != 0:
+        detail = stderr.decode("utf-8", errors="ignore").strip().splitlines()
+        failure = {
+            "status": 422,
+            "error": "스트리밍으로 오디오를 추출할 수 없는 파일입니다 (예: moov atom이 끝에 있는 MP4). "
+                     f"일반 업로드를 사용하세요: {detail[-1] if detail else code}",
+        }
+    if failure is None and (not os.path.exists(output_audio_path) or os.path.getsize(output_audio_path) <= 44):
+        failure = {"status": 422, "error": "오디오 추출 실패: 오디오 스트림이 없습니다"}
+    if failure is not None:
+        try:
+            os.remove(output_audio_path)
+        except Exception:
+            pass
+        return False, failure
+    return True, {"bytes": received, "sha256": h.hexdigest()}
+
+
+def _to_pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+
+def write_wav(audio: np.ndarray, output_audio_path: str, sample_rate: int = SAMPLE_RATE):
+    """공유 버퍼를 16bit PCM WAV로 저장 (필요할 때만 호출)."""
+    try:
+        with wave.open(output_audio_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(_to_pcm16(audio))
+        return True, output_audio_path
+    except Exception as e:
+        return False, f"WAV 저장 실패: {str(e)}"
+
+
+def encode_mp3_from_pcm(audio: np.ndarray, mp3_path: str, sample_rate: int = SAMPLE_RATE):
+    """공유 버퍼를 ffmpeg stdin으로 넘겨 MP3 인코딩 (WAV 재디코딩 없음)."""
+    try:
+        stream = ffmpeg.input("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=str(sample_rate))
+        stream = ffmpeg.output(
+            stream,
+            mp3_path,
+            acodec="libmp3lame",
+            audio_bitrate="128k",
+            ac=1,
+            ar=str(sample_rate),
+        )
+        ffmpeg.run(stream, input=_to_pcm16(audio), overwrite_output=True, quiet=True)
+        return True, mp3_path
+    except ffmpeg.Error as e:
+        return False, f"MP3 변환 실패: {str(e)}"
+
+
 def get_video_duration(video_path: str):
     try:
         probe = ffmpeg.probe(video_path)
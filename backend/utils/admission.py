@@ -0,0 +1,117 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+class Saturated(Exception):
+    """실행기와 대기열이 모두 찬 상태. retry_after: 재시도까지 예상 대기(초)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    동기 전사 엔드포인트 전용 실행기.
+    - 무거운 작업(디코딩/전사/다운로드)을 이벤트 루프 밖 고정 크기 스레드 풀에서 실행
+    - 실행 중 + 대기 중 작업이 workers + queue_max를 넘으면 즉시 Saturated
+    - 최근 작업 시간의 지수 이동 평균으로 Retry-After를 추정
+    """
+
+    def __init__(self, workers: int, queue_max: int, initial_estimate_sec: float = 60.0, alpha: float = 0.2):
+        self.workers = max(1, workers)
+        self.queue_max = max(0, queue_max)
+        self.alpha = alpha
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sync-job")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._ema = float(initial_estimate_sec)
+        self._stats = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def retry_after(self) -> int:
+        # 앞선 작업이 모두 빠질 때까지의 대략적 시간 (workers개가 병렬로 처리)
+        with self._lock:
+            ahead = max(1, self._in_flight - self.workers + 1)
+            return max(1, int(math.ceil(self._ema * ahead / self.workers)))
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_max:
+                self._stats["rejected"] += 1
+                saturated = True
+            else:
+                self._in_flight += 1
+                self._stats["accepted"] += 1
+                saturated = False
+        if saturated:
+            raise Saturated(self.retry_after())
+
+    def _release(self, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            # 입력 오류 등으로 빨리 끝난 실패는 추정치에 반영하지 않음
+            if ok:
+                self._ema = self.alpha * elapsed + (1 - self.alpha) * self._ema
+            self._stats["completed" if ok else "failed"] += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """자리를 확보한 뒤 fn을 스레드 풀에서 실행하고 결과를 기다린다. 가득 차면 Saturated."""
+        self._acquire()
+
+        def call():
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._release(time.perf_counter() - started, ok)
+
+        # 클라이언트가 끊겨도 제출된 작업은 끝까지 수행되고 자리는 call()에서 반환됨
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_max": self.queue_max,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "avg_job_seconds": round(self._ema, 2),
+                **self._stats,
+            }
+
+
+_sync_executor: BoundedExecutor | None = None
+_sync_lock = threading.Lock()
+
+
+def get_sync_executor() -> BoundedExecutor:
+    """SYNC_WORKERS(기본 2), SYNC_QUEUE_MAX(기본 4), SYNC_JOB_ESTIMATE_SEC(초기 추정, 기본 60)."""
+    global _sync_executor
+    if _sync_executor is None:
+        with _sync_lock:
+            if _sync_executor is None:
+                try:
+                    estimate = float(os.getenv("SYNC_JOB_ESTIMATE_SEC", "60"))
+                except Exception:
+                    estimate = 60.0
+                _sync_executor = BoundedExecutor(
+                    workers=_env_int("SYNC_WORKERS", 2) or 1,
+                    queue_max=_env_int("SYNC_QUEUE_MAX", 4),
+                    initial_estimate_sec=estimate,
+                )
+    return _sync_executor
@@ -0,0 +1,222 @@
+"""
+작업 산출물 배치와 매니페스트.
+
+- 디렉터리: {root}/{h[0:2]}/{h[2:4]}/ (h = sha1(job_id)). 작업이 수백만 개여도 디렉터리 하나에는 수십 개 파일만 남는다.
+  outputs/{job_id}.{ext} 는 API에서 쓰는 논리 경로로 그대로 두고, 실제 파일만 팬아웃 위치에 둔다.
+- 매니페스트: 작업 저장소 artifacts 테이블. (job_id, kind) 기본 키 조회 한 번으로 원본/결과 파일을 찾으며,
+  디렉터리를 나열하지 않는다. 단계가 끝날 때 그 단계 산출물을 한 트랜잭션으로 기록한다.
+"""
+import hashlib
+import os
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from utils.job_store import get_job_store
+
+# 매니페스트 kind: 업로드/다운로드 원본, 스트리밍 업로드에서 추출한 WAV, 결과물
+OUTPUT_KINDS = ("txt", "srt", "mp3")
+
+_UUID_PREFIX = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(?:_|\.|$)")
+
+
+def _hash_max_bytes() -> int:
+    # 원본처럼 큰 파일은 이 크기까지만 sha256 계산 (기본 64MB, 0이면 계산 안 함)
+    try:
+        return int(float(os.getenv("ARTIFACT_HASH_MAX_MB", "64")) * 1024 * 1024)
+    except Exception:
+        return 64 * 1024 * 1024
+
+
+def fanout_dir(root: str, job_id: str, create: bool = False) -> str:
+    h = hashlib.sha1(job_id.encode("utf-8")).hexdigest()
+    path = os.path.join(root, h[:2], h[2:4])
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def output_file(root: str, job_id: str, ext: str, create: bool = False) -> str:
+    """결과물의 팬아웃 경로 (쓰기용). create=True면 상위 디렉터리 생성."""
+    job_id = os.path.basename(job_id)
+    return os.path.join(fanout_dir(root, job_id, create), f"{job_id}.{ext}")
+
+
+def resolve_output(root: str, job_id: str, ext: str) -> str:
+    """
+    결과물 읽기 경로: 팬아웃 위치, 없으면 이전 평면 배치(마이그레이션 전 파일).
+    둘 다 없으면 팬아웃 경로를 돌려준다 (호출 측의 exists 검사/404 처리 그대로).
+    """
+    path = output_file(root, job_id, ext)
+    if os.path.exists(path):
+        return path
+    legacy = os.path.join(root, f"{os.path.basename(job_id)}.{ext}")
+    return legacy if os.path.exists(legacy) else path
+
+
+def upload_file(root: str, job_id: str, name: str) -> str:
+    """업로드/다운로드 원본 경로 {fanout}/{job_id}_{name} (파일명 규칙은 기존과 동일)."""
+    return os.path.join(fanout_dir(root, job_id, create=True), f"{job_id}_{os.path.basename(name)}")
+
+
+def file_sha256(path: str, max_bytes: Optional[int] = None) -> Optional[str]:
+    limit = _hash_max_bytes() if max_bytes is None else max_bytes
+    try:
+        if limit <= 0 or os.path.getsize(path) > limit:
+            return None
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def describe(kind: str, path: Optional[str], stage: str, status: str = "ready",
+             sha256: Optional[str] = None) -> Dict[str, Any]:
+    """매니페스트 항목. 파일이 없으면 status는 failed."""
+    exists = bool(path) and os.path.exists(path)
+    if status == "ready" and not exists:
+        status = "failed"
+    return {
+        "kind": kind,
+        "path": os.path.abspath(path) if path else "",
+        "size": os.path.getsize(path) if exists else None,
+        "sha256": sha256 or (file_sha256(path) if exists and status == "ready" else None),
+        "stage": stage,
+        "status": status,
+    }
+
+
+def record_artifacts(job_id: str, entries: Iterable[Dict[str, Any]]) -> None:
+    """매니페스트 기록 (실패해도 작업은 계속)."""
+    entries = [e for e in entries if e and e.get("path")]
+    if not entries:
+        return
+    try:
+        get_job_store().put_artifacts(job_id, entries)
+    except Exception as e:
+        print(f"산출물 매니페스트 기록 실패: {e}")
+
+
+def record_artifact(job_id: str, kind: str, path: Optional[str], stage: str, sha256: Optional[str] = None) -> None:
+    record_artifacts(job_id, [describe(kind, path, stage, sha256=sha256)])
+
+
+def source_path(job_id: str) -> Optional[str]:
+    """매니페스트에서 작업의 원본(다운로드/업로드) 파일 경로. 없거나 이미 지워졌으면 None."""
+    try:
+        artifacts = get_job_store().get_artifacts(job_id)
+    except Exception:
+        return None
+    for kind in ("source", "wav"):
+        row = artifacts.get(kind)
+        if row and row["status"] == "ready" and os.path.exists(row["path"]):
+            return row["path"]
+    return None
+
+
+def discard_artifact(job_id: str, path: Optional[str]) -> None:
+    """중간 파일 삭제 + 매니페스트 상태를 deleted로."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except Exception:
+        pass
+    try:
+        get_job_store().mark_artifact_deleted(job_id, os.path.abspath(path))
+    except Exception:
+        pass
+
+
+def touch_artifact(job_id: str, kind: str) -> None:
+    """다운로드/재사용 시 마지막 접근 시각 기록 (보존 정리의 LRU 기준, 실패 무시)."""
+    try:
+        get_job_store().touch_artifact(job_id, kind)
+    except Exception:
+        pass
+
+
+# ---- 평면 배치(uploads/, outputs/, 내보내기 캐시) → 팬아웃 배치 마이그레이션 ----
+
+def _job_id_of(name: str) -> Optional[str]:
+    m = _UUID_PREFIX.match(name)
+    return m.group(1) if m else None
+
+
+def migrate_flat_layout(upload_root: str, output_root: str, export_root: Optional[str] = None,
+                        dry_run: bool = False) -> Dict[str, Any]:
+    """
+    이전 평면 배치의 파일을 팬아웃 위치로 옮기고 매니페스트를 채운다. 여러 번 실행해도 안전.
+    같은 파일시스템 안의 os.replace라 파일 내용은 복사하지 않는다.
+    반환: {"moved": n, "skipped": n, "errors": [...]} (dry_run이면 옮길 대상 수만 셈)
+    """
+    report: Dict[str, Any] = {"moved": 0, "skipped": 0, "errors": []}
+
+    def move(src: str, dst: str) -> bool:
+        if dry_run:
+            report["moved"] += 1
+            return False
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(src, dst)
+            report["moved"] += 1
+            return True
+        except Exception as e:
+            report["errors"].append(f"{src}: {e}")
+            return False
+
+    if os.path.isdir(output_root):
+        with os.scandir(output_root) as it:
+            for entry in it:
+                job_id = _job_id_of(entry.name) if entry.is_file() else None
+                ext = os.path.splitext(entry.name)[1].lstrip(".")
+                if not job_id or entry.name != f"{job_id}.{ext}":
+                    report["skipped"] += 1
+                    continue
+                dst = output_file(output_root, job_id, ext)
+                if move(entry.path, dst) and ext in OUTPUT_KINDS:
+                    record_artifact(job_id, ext, dst, "migrate")
+
+    if os.path.isdir(upload_root):
+        with os.scandir(upload_root) as it:
+            for entry in it:
+                job_id = _job_id_of(entry.name) if entry.is_file() else None
+                if not job_id or not entry.name.startswith(f"{job_id}_"):
+                    report["skipped"] += 1
+                    continue
+                dst = os.path.join(fanout_dir(upload_root, job_id), entry.name)
+                if move(entry.path, dst):
+                    kind = "wav" if entry.name.lower().endswith(".wav") else "source"
+                    record_artifact(job_id, kind, dst, "migrate")
+
+    if export_root and os.path.isdir(export_root):
+        with os.scandir(export_root) as it:
+            for entry in it:
+                job_id = _job_id_of(entry.name) if entry.is_dir() else None
+                if not job_id or entry.name != job_id:
+                    report["skipped"] += 1
+                    continue
+                dst = os.path.join(fanout_dir(export_root, job_id), job_id)
+                if os.path.exists(dst):
+                    report["skipped"] += 1
+                    continue
+                move(entry.path, dst)
+    return report
+
+
+if __name__ == "__main__":
+    # 사용: backend/ 에서 python -m utils.artifacts [--dry-run]
+    import argparse
+    import json
+
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="uploads/outputs 평면 배치를 팬아웃 배치로 옮기고 매니페스트 기록")
+    parser.add_argument("--uploads", default=os.path.join(base, "uploads"))
+    parser.add_argument("--outputs", default=os.path.join(base, "outputs"))
+    parser.add_argument("--exports", default=os.getenv("EXPORT_CACHE_DIR") or os.path.join(base, "cache", "exports"))
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    report = migrate_flat_layout(args.uploads, args.outputs, args.exports, dry_run=args.dry_run)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
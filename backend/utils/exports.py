@@ -0,0 +1,404 @@
+import html as htmlmod
+import io
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.artifacts import fanout_dir
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/
+
+
+class ExportUnavailable(Exception):
+    """DOCX/PDF 라이브러리가 설치되어 있지 않음."""
+
+
+def export_line(e: Dict[str, Any], ts: int, spk: int) -> str:
+    """구간 하나 → "[HH:MM:SS] [화자 N] 텍스트" (옵션에 따라 프리픽스 생략)."""
+    parts = []
+    if ts and e.get("start"):
+        parts.append(f"[{e['start']}]")
+    if spk and e.get("speaker"):
+        parts.append(f"[화자 {e['speaker']}]")
+    prefix = (" ".join(parts) + " ") if parts else ""
+    return prefix + e["text"]
+
+
+# ---- PDF 폰트: 경로 탐색과 TTF 등록(CJK TTC 로딩이 비쌈)은 프로세스당 한 번 ----
+
+def resolve_font() -> Tuple[Optional[str], Optional[int]]:
+    env_path = os.getenv("PDF_FONT_PATH")
+    env_index = os.getenv("PDF_FONT_INDEX")
+    try:
+        env_index_int = int(env_index) if env_index is not None else None
+    except Exception:
+        env_index_int = None
+    if env_path and os.path.exists(env_path):
+        return env_path, env_index_int
+    candidates: list[tuple[str, int | None]] = [
+        ("/usr/share/fonts/opentype/noto/NotoSerifCJKkr-Regular.otf", None),
+        ("/usr/share/fonts/opentype/noto/NotoSansCJKkr-Regular.otf", None),
+        ("/usr/share/fonts/opentype/noto/NotoSerifCJKsc-Regular.otf", None),
+        ("/usr/share/fonts/opentype/noto/NotoSansCJKsc-Regular.otf", None),
+        ("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", 0),
+        (r"C:\\Windows\\Fonts\\malgun.ttf", None),
+        (r"C:\\Windows\\Fonts\\msyh.ttc", 0),
+        (r"C:\\Windows\\Fonts\\meiryo.ttc", 0),
+        ("/Library/Fonts/Apple SD Gothic Neo.ttf", None),
+        ("/System/Library/Fonts/AppleSDGothicNeo.ttf", None),
+    ]
+    for path, idx in candidates:
+        if os.path.exists(path):
+            return path, idx
+    return None, None
+
+
+def resolve_fallback_font() -> Tuple[Optional[str], Optional[int]]:
+    f_path = os.getenv("PDF_FONT_FALLBACK_PATH")
+    f_idx = os.getenv("PDF_FONT_FALLBACK_INDEX")
+    try:
+        f_idx_int = int(f_idx) if f_idx is not None else None
+    except Exception:
+        f_idx_int = None
+    if f_path and os.path.exists(f_path):
+        return f_path, f_idx_int
+    win_candidates: list[tuple[str, int | None]] = [
+        (r"C:\\Windows\\Fonts\\simsunb.ttf", None),
+        (r"C:\\Windows\\Fonts\\simsun.ttc", 1),
+    ]
+    for path, idx in win_candidates:
+        if os.path.exists(path):
+            return path, idx
+    return None, None
+
+
+_pdf_fonts: Optional[Tuple[str, Optional[str]]] = None
+_pdf_fonts_lock = threading.Lock()
+
+
+def _register_font(name: str, path: str, index: Optional[int]) -> bool:
+    from reportlab.pdfbase import pdfmetrics  # type: ignore
+    from reportlab.pdfbase.ttfonts import TTFont  # type: ignore
+    try:
+        if index is not None:
+            pdfmetrics.registerFont(TTFont(name, path, subfontIndex=index))
+        else:
+            pdfmetrics.registerFont(TTFont(name, path))
+        return True
+    except Exception:
+        return False
+
+
+def get_pdf_fonts() -> Tuple[str, Optional[str]]:
+    """(본문 폰트 이름, 보조 폰트 이름|None). 최초 호출에서만 탐색/등록."""
+    global _pdf_fonts
+    if _pdf_fonts is None:
+        with _pdf_fonts_lock:
+            if _pdf_fonts is None:
+                font_name = "Helvetica"
+                font_path, font_index = resolve_font()
+                if font_path and _register_font("EmbeddedCJK", font_path, font_index):
+                    font_name = "EmbeddedCJK"
+                fallback_name = None
+                f_path, f_index = resolve_fallback_font()
+                if f_path and _register_font("EmbeddedCJKFallback", f_path, f_index):
+                    fallback_name = "EmbeddedCJKFallback"
+                _pdf_fonts = (font_name, fallback_name)
+    return _pdf_fonts
+
+
+def _needs_fallback(code: int) -> bool:
+    return (
+        (0x3400 <= code <= 0x4DBF) or
+        (0x4E00 <= code <= 0x9FFF) or
+        (0xF900 <= code <= 0xFAFF) or
+        (0x20000 <= code <= 0x2A6DF) or
+        (0x2A700 <= code <= 0x2B73F) or
+        (0x2B740 <= code <= 0x2B81F) or
+        (0x2B820 <= code <= 0x2CEAF) or
+        (0x2CEB0 <= code <= 0x2EBEF) or
+        (0x30000 <= code <= 0x3134F)
+    )
+
+
+def _inject_fallback_runs(s: str, fallback_name: Optional[str]) -> str:
+    if not fallback_name:
+        return htmlmod.escape(s)
+    out = []
+    using_fb = False
+    buf: List[str] = []
+
+    def flush():
+        if not buf:
+            return
+        seg = htmlmod.escape("".join(buf))
+        if using_fb:
+            out.append(f"<font name=\"{fallback_name}\">" + seg + "</font>")
+        else:
+            out.append(seg)
+        buf.clear()
+
+    for ch in s:
+        need_fb = _needs_fallback(ord(ch))
+        if need_fb != using_fb:
+            flush()
+            using_fb = need_fb
+        buf.append(ch)
+    flush()
+    return "".join(out)
+
+
+def render_pdf(lines: Iterable[str], path: str) -> None:
+    try:
+        from reportlab.lib.pagesizes import A4  # type: ignore
+        from reportlab.lib.units import mm  # type: ignore
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer  # type: ignore
+        from reportlab.lib.styles import ParagraphStyle  # type: ignore
+    except Exception:
+        raise ExportUnavailable("PDF 모듈이 설치되어 있지 않습니다")
+
+    font_name, fallback_name = get_pdf_fonts()
+    x_margin = 20 * mm
+    y_margin = 20 * mm
+    doc = SimpleDocTemplate(
+        path,
+        pagesize=A4,
+        leftMargin=x_margin,
+        rightMargin=x_margin,
+        topMargin=y_margin,
+        bottomMargin=y_margin,
+    )
+    style = ParagraphStyle(
+        name="Body",
+        fontName=font_name,
+        fontSize=11,
+        leading=14,
+        wordWrap="CJK",
+    )
+    story = []
+    for line in lines:
+        if not str(line).strip():
+            story.append(Spacer(1, 6))
+        else:
+            safe = _inject_fallback_runs(str(line), fallback_name).replace("\t", "&emsp;&emsp;")
+            story.append(Paragraph(safe, style))
+    doc.build(story)
+
+
+def render_docx(lines: Iterable[str], path: str) -> None:
+    try:
+        from docx import Document  # type: ignore
+    except Exception:
+        raise ExportUnavailable("DOCX 모듈이 설치되어 있지 않습니다")
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+class ExportCache:
+    """
+    렌더링된 내보내기 파일 캐시: {root}/{팬아웃}/{job_id}/{fmt}-ts{ts}-spk{spk}-{version}.{fmt}
+    version(작업 저장소 version 또는 원본 파일 mtime)이 키에 들어가므로 편집 후 요청은
+    자동으로 새로 렌더링되고, 그때 같은 작업의 이전 버전 파일을 지운다.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._rendering: Dict[str, threading.Lock] = {}
+
+    def _job_dir(self, job_id: str) -> str:
+        job_id = os.path.basename(job_id)
+        return os.path.join(fanout_dir(self.root, job_id), job_id)
+
+    def get_or_render(self, job_id: str, fmt: str, ts: int, spk: int, version: str,
+                      render: Callable[[str], None]) -> str:
+        job_dir = self._job_dir(job_id)
+        name = f"{fmt}-ts{int(bool(ts))}-spk{int(bool(spk))}-{version}.{fmt}"
+        path = os.path.join(job_dir, name)
+        if os.path.exists(path):
+            # 적중 시 mtime 갱신: 보존 정리(utils.lifecycle)의 TTL/LRU 기준
+            try:
+                os.utime(path)
+            except Exception:
+                pass
+            return path
+        # 같은 키의 동시 요청은 한 번만 렌더링
+        with self._lock:
+            key_lock = self._rendering.setdefault(path, threading.Lock())
+        with key_lock:
+            if not os.path.exists(path):
+                os.makedirs(job_dir, exist_ok=True)
+                tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+                try:
+                    render(tmp)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                self._purge_stale(job_dir, version)
+        with self._lock:
+            self._rendering.pop(path, None)
+        return path
+
+    @staticmethod
+    def _purge_stale(job_dir: str, version: str) -> None:
+        suffix = f"-{version}."
+        try:
+            for name in os.listdir(job_dir):
+                if suffix not in name and not name.endswith(".tmp"):
+                    os.remove(os.path.join(job_dir, name))
+        except Exception:
+            pass
+
+    def invalidate(self, job_id: str) -> None:
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+
+_export_cache: Optional[ExportCache] = None
+_export_cache_lock = threading.Lock()
+
+
+def get_export_cache() -> ExportCache:
+    """위치는 EXPORT_CACHE_DIR (기본 backend/cache/exports)."""
+    global _export_cache
+    if _export_cache is None:
+        with _export_cache_lock:
+            if _export_cache is None:
+                _export_cache = ExportCache(os.getenv("EXPORT_CACHE_DIR") or os.path.join(BASE_DIR, "cache", "exports"))
+    return _export_cache
+
+
+# ---- 묶음(ZIP) 내보내기: 멤버를 병렬 렌더링해 끝나는 순서대로 스트리밍 ZIP에 기록 ----
+
+class _BundleCancelled(Exception):
+    pass
+
+
+class _QueueWriter(io.RawIOBase):
+    """ZipFile 출력 → 크기 제한 큐. 소비(클라이언트 전송)가 느리면 put에서 대기해 메모리를 묶어 둔다."""
+
+    def __init__(self, q: "queue.Queue", cancelled: threading.Event, chunk_size: int = 64 * 1024):
+        self._q = q
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        if len(self._buf) >= self._chunk_size:
+            self.flush()
+        return len(b)
+
+    def flush(self) -> None:
+        if self._buf:
+            data = bytes(self._buf)
+            self._buf.clear()
+            _put(self._q, data, self._cancelled)
+
+
+def _put(q: "queue.Queue", item: Any, cancelled: threading.Event) -> None:
+    while True:
+        if cancelled.is_set():
+            raise _BundleCancelled()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def spool_chunks(chunks: Iterable[bytes], path: str) -> str:
+    """스트리밍 내보내기 바이트 청크를 임시 파일로 기록 (묶음 멤버용)."""
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path
+
+
+def stream_zip(members: List[Tuple[str, Callable[[str], str], bool]], workers: int = 4,
+               queue_chunks: int = 16) -> Iterator[bytes]:
+    """
+    members: (ZIP 내 경로, render(임시 디렉터리) → 파일 경로, 압축 여부)
+    - 최대 workers개를 병렬 렌더링(대기 중 제출은 workers*2개로 제한), 끝난 순서대로 ZIP에 기록
+    - ZIP은 탐색 불가 스트림에 데이터 디스크립터 방식으로 쓰므로 전체를 메모리/디스크에 모으지 않음
+    - 실패한 멤버는 건너뛰고 마지막에 _errors.txt로 기록
+    - 클라이언트가 끊기면(제너레이터 종료) 생산 스레드도 중단
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_chunks))
+    cancelled = threading.Event()
+
+    def produce():
+        errors: List[str] = []
+        try:
+            writer = _QueueWriter(q, cancelled)
+            with tempfile.TemporaryDirectory(prefix="bundle-") as tmp, \
+                    ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bundle") as ex:
+                with zipfile.ZipFile(writer, mode="w", allowZip64=True) as zf:
+                    pending: Dict[Any, Tuple[str, bool]] = {}
+                    it = iter(members)
+
+                    def fill():
+                        while len(pending) < max(1, workers) * 2 and not cancelled.is_set():
+                            member = next(it, None)
+                            if member is None:
+                                return
+                            arcname, render, compress = member
+                            pending[ex.submit(render, tmp)] = (arcname, compress)
+
+                    fill()
+                    while pending:
+                        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            arcname, compress = pending.pop(fut)
+                            try:
+                                path = fut.result()
+                            except Exception as e:
+                                errors.append(f"{arcname}: {getattr(e, 'detail', None) or e}")
+                                continue
+                            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+                            with open(path, "rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                                shutil.copyfileobj(src, dst, 1024 * 1024)
+                            # 임시 렌더 결과는 기록 즉시 삭제 (캐시 파일은 유지)
+                            if os.path.dirname(os.path.abspath(path)) == os.path.abspath(tmp):
+                                try:
+                                    os.remove(path)
+                                except Exception:
+                                    pass
+                        fill()
+                    if errors:
+                        zf.writestr("_errors.txt", "\n".join(errors) + "\n")
+                writer.flush()
+        except _BundleCancelled:
+            return
+        except Exception:
+            # 스트림 도중 실패: 응답은 잘린 ZIP으로 끝남
+            pass
+        finally:
+            try:
+                _put(q, None, cancelled)
+            except _BundleCancelled:
+                pass
+
+    threading.Thread(target=produce, name="bundle-writer", daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            yield item
+    finally:
+        cancelled.set()
@@ -0,0 +1,80 @@
+import html
+import re
+from typing import List, Optional
+
+# 한글/가나/한자 범위: 띄어쓰기와 무관하게 바이그램으로 색인
+_CJK = "\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_RUN_RE = re.compile(f"([{_CJK}]+)|([^{_CJK}]+)")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _cjk_terms(run: str) -> List[str]:
+    # "회의록" → "회의 의록 록": 겹치는 바이그램 + 마지막 글자 유니그램
+    # (한 글자 검색은 접두 검색 "회*"로 바이그램 첫 글자/마지막 유니그램 모두에 걸림)
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+
+
+def _token_terms(token: str) -> List[str]:
+    terms: List[str] = []
+    for cjk, other in _RUN_RE.findall(token):
+        if cjk:
+            terms.extend(_cjk_terms(cjk))
+        elif other:
+            terms.append(other)
+    return terms
+
+
+def fts_terms(text: str) -> str:
+    """
+    FTS5 색인용 그림자 컬럼 값. unicode61 토크나이저는 공백 기준이라 한국어 조사/복합어를
+    나누지 못하므로, CJK 구간을 바이그램으로 펼쳐 공백으로 이어 붙인다. 그 외 단어는 소문자 그대로.
+    """
+    out: List[str] = []
+    for token in _WORD_RE.findall((text or "").lower()):
+        out.extend(_token_terms(token))
+    return " ".join(out)
+
+
+def fts_query(query: str) -> Optional[str]:
+    """
+    검색어 → FTS5 MATCH 식. 단어마다 색인과 같은 방식으로 펼친 뒤 구(phrase)로 묶어
+    인접 바이그램만 맞도록 하고, 단어끼리는 AND. 한 글자 CJK 단어는 접두 검색.
+    """
+    parts: List[str] = []
+    for token in _WORD_RE.findall((query or "").lower()):
+        terms = _token_terms(token)
+        if not terms:
+            continue
+        if len(terms) == 1 and len(terms[0]) == 1 and _RUN_RE.match(terms[0]).group(1):
+            parts.append(f'"{terms[0]}"*')
+            continue
+        # 바이그램 뒤에 붙은 유니그램은 질의에서는 불필요 (구 일치를 과하게 제한)
+        if len(terms) > 1 and len(terms[-1]) == 1 and len(terms[-2]) == 2 and terms[-2][-1] == terms[-1]:
+            terms = terms[:-1]
+        parts.append('"' + " ".join(t.replace('"', '""') for t in terms) + '"')
+    return " AND ".join(parts) if parts else None
+
+
+def make_snippet(text: str, query: str, width: int = 40, mark: tuple = ("<mark>", "</mark>")) -> str:
+    """
+    원문에서 첫 일치 위치 주변을 잘라 강조 (색인 컬럼은 바이그램이라 FTS snippet()을 쓰지 않음).
+    원문은 사용자가 편집할 수 있으므로 조각마다 HTML 이스케이프한 뒤 강조 태그를 붙인다.
+    """
+    text = text or ""
+    lowered = text.lower()
+    words = sorted({w for w in _WORD_RE.findall((query or "").lower())}, key=len, reverse=True)
+    pos = -1
+    hit = ""
+    for w in words:
+        i = lowered.find(w)
+        if i != -1 and (pos == -1 or i < pos):
+            pos, hit = i, w
+    if pos == -1:
+        return html.escape(text[: width * 2]) + ("…" if len(text) > width * 2 else "")
+    start = max(0, pos - width)
+    end = min(len(text), pos + len(hit) + width)
+    out = (html.escape(text[start:pos]) + mark[0] + html.escape(text[pos:pos + len(hit)]) + mark[1]
+           + html.escape(text[pos + len(hit):end]))
+    return ("…" if start > 0 else "") + out + ("…" if end < len(text) else "")
@@ -0,0 +1,578 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.fts import fts_terms, fts_query, make_snippet
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/
+
+# jobs 테이블의 일반 컬럼 (그 외 키는 meta JSON에 병합)
+_JOB_COLUMNS = ("status", "original_filename", "source_url", "language", "model", "diarize", "text", "error")
+_BATCH_COLUMNS = ("kind", "source", "title", "status", "entry_count", "error")
+
+
+class JobStore:
+    """
+    작업/메타/구간을 담는 내장 SQLite 저장소 (API/워커 프로세스 공용, WAL 모드).
+    - jobs: 작업 한 건당 한 행. 메타 갱신은 읽고-고치고-쓰기 대신 UPSERT 한 번
+    - segments: seg_id 정수 키 + (job_id, idx) 유일 키로 시작/끝/화자/텍스트 보관, 결과 저장 시 executemany 일괄 삽입
+    - version: 결과/텍스트가 바뀔 때마다 증가 (내보내기 캐시 무효화 기준)
+    - segments_fts / jobs_fts: CJK 바이그램 그림자 컬럼(utils.fts)을 색인한 FTS5 테이블
+    - batches / batch_items: 일괄 제출·재생목록 수집 묶음 헤더와 항목(제출 순서)
+    - artifacts: (job_id, kind) → 파일 경로/크기/sha256/단계/상태 매니페스트 (+ 마지막 접근 시각, 보존 정리 LRU 기준)
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    original_filename TEXT,
+                    source_url TEXT,
+                    language TEXT,
+                    model TEXT,
+                    diarize INTEGER,
+                    text TEXT,
+                    error TEXT,
+                    meta TEXT NOT NULL DEFAULT '{}',
+                    segment_count INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at DESC, job_id DESC);
+                CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at DESC, job_id DESC);
+                """
+            )
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # segments에 고정 정수 키(seg_id)를 두어 FTS rowid와 1:1로 연결 (VACUUM에도 불변)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS segments (
+                    seg_id INTEGER PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    start REAL NOT NULL,
+                    end REAL NOT NULL,
+                    speaker INTEGER,
+                    text TEXT NOT NULL,
+                    UNIQUE (job_id, idx)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(body, tokenize = 'unicode61 remove_diacritics 2');
+                -- 직접 수정된 전사 텍스트 (구간과 어긋나므로 작업 단위로 따로 색인)
+                CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(body, job_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2');
+                """
+            )
+            conn.execute("PRAGMA user_version = 1")
+        if version < 2:
+            # 일괄 제출 묶음: 항목 순서 그대로 작업/Celery 태스크 id를 보관
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS batch_items (
+                    batch_id TEXT NOT NULL,
+                    pos INTEGER NOT NULL,
+                    job_id TEXT NOT NULL,
+                    task_id TEXT,
+                    kind TEXT NOT NULL,
+                    source TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (batch_id, pos)
+                );
+                """
+            )
+            conn.execute("PRAGMA user_version = 2")
+        if version < 3:
+            # 재생목록/채널 수집처럼 항목이 작업 도중에 확정되는 묶음의 헤더 (원본 링크, 확장 단계 상태)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS batches (
+                    batch_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    source TEXT,
+                    title TEXT,
+                    status TEXT NOT NULL,
+                    entry_count INTEGER,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                """
+            )
+            conn.execute("PRAGMA user_version = 3")
+        if version < 4:
+            # 산출물 매니페스트: 작업별 원본/오디오/결과 파일의 위치·크기·해시·생성 단계 상태 (utils.artifacts)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    job_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER,
+                    sha256 TEXT,
+                    stage TEXT,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, kind)
+                );
+                CREATE INDEX IF NOT EXISTS idx_artifacts_path ON artifacts(path);
+                CREATE INDEX IF NOT EXISTS idx_artifacts_kind_status ON artifacts(kind, status, updated_at);
+                """
+            )
+            conn.execute("PRAGMA user_version = 4")
+        if version < 5:
+            # 보존 정리(utils.lifecycle)의 LRU 축출 기준. NULL이면 updated_at을 쓴다
+            conn.execute("ALTER TABLE artifacts ADD COLUMN accessed_at REAL")
+            conn.execute("PRAGMA user_version = 5")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _split_fields(fields: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        cols: Dict[str, Any] = {}
+        extra: Dict[str, Any] = {}
+        for k, v in fields.items():
+            if k == "job_id":
+                continue
+            if k in _JOB_COLUMNS:
+                cols[k] = int(bool(v)) if k == "diarize" and v is not None else v
+            else:
+                extra[k] = v
+        return cols, extra
+
+    def _upsert(self, conn: sqlite3.Connection, job_id: str, fields: Dict[str, Any], bump: bool = False) -> None:
+        cols, extra = self._split_fields(fields)
+        now = time.time()
+        names = list(cols.keys())
+        insert_cols = ", ".join(["job_id", "meta", "created_at", "updated_at"] + names)
+        placeholders = ", ".join(["?"] * (4 + len(names)))
+        updates = [f"{n} = excluded.{n}" for n in names]
+        # meta는 기존 값에 병합 (json_patch)
+        updates.append("meta = json_patch(jobs.meta, excluded.meta)")
+        updates.append("updated_at = excluded.updated_at")
+        if bump:
+            updates.append("version = jobs.version + 1")
+        conn.execute(
+            f"INSERT INTO jobs({insert_cols}) VALUES({placeholders}) "
+            f"ON CONFLICT(job_id) DO UPDATE SET {', '.join(updates)}",
+            [job_id, json.dumps(extra, ensure_ascii=False), now, now] + [cols[n] for n in names],
+        )
+
+    def upsert_job(self, job_id: str, **fields: Any) -> None:
+        """메타/상태 갱신. 알려진 컬럼 외의 키는 meta JSON에 병합."""
+        with self._connect() as conn:
+            self._upsert(conn, job_id, fields)
+
+    def save_result(self, job_id: str, text: str, segments: Iterable[Dict[str, Any]], **fields: Any) -> None:
+        """전사 결과(텍스트 + 구간 전체)를 한 트랜잭션으로 교체 저장."""
+        rows = [
+            (job_id, i, float(seg.get("start", 0.0)), float(seg.get("end", 0.0)),
+             seg.get("speaker"), str(seg.get("text", "")).strip())
+            for i, seg in enumerate(segments)
+        ]
+        fields = {"status": "completed", **fields, "text": text}
+        with self._lock, self._connect() as conn:
+            self._upsert(conn, job_id, fields, bump=True)
+            self._delete_segments(conn, job_id)
+            conn.executemany(
+                "INSERT INTO segments(job_id, idx, start, end, speaker, text) VALUES(?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # 검색 색인도 같은 트랜잭션에서 증분 갱신
+            conn.executemany(
+                "INSERT INTO segments_fts(rowid, body) VALUES(?, ?)",
+                [(r["seg_id"], fts_terms(r["text"])) for r in conn.execute(
+                    "SELECT seg_id, text FROM segments WHERE job_id = ?", (job_id,)
+                )],
+            )
+            conn.execute("UPDATE jobs SET segment_count = ? WHERE job_id = ?", (len(rows), job_id))
+
+    @staticmethod
+    def _delete_segments(conn: sqlite3.Connection, job_id: str) -> None:
+        conn.execute(
+            "DELETE FROM segments_fts WHERE rowid IN (SELECT seg_id FROM segments WHERE job_id = ?)",
+            (job_id,),
+        )
+        conn.execute("DELETE FROM segments WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs_fts WHERE job_id = ?", (job_id,))
+
+    def update_text(self, job_id: str, text: str) -> bool:
+        """
+        사용자 편집 텍스트 저장 + 작업 단위 검색 색인 교체.
+        구간 텍스트는 편집 내용과 어긋나므로 그 작업의 구간 색인은 내린다 (지운 단어가 시각과 함께 검색되지 않도록).
+        """
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET text = ?, version = version + 1, updated_at = ?, "
+                "meta = json_set(meta, '$.text_edited', json('true')) WHERE job_id = ?",
+                (text, time.time(), job_id),
+            )
+            if cur.rowcount == 0:
+                return False
+            conn.execute(
+                "DELETE FROM segments_fts WHERE rowid IN (SELECT seg_id FROM segments WHERE job_id = ?)",
+                (job_id,),
+            )
+            conn.execute("DELETE FROM jobs_fts WHERE job_id = ?", (job_id,))
+            conn.execute("INSERT INTO jobs_fts(body, job_id) VALUES(?, ?)", (fts_terms(text), job_id))
+            return True
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        전사 전문 검색. 구간 색인 적중은 시작/끝 시각과 함께, 편집된 텍스트 적중은 작업 단위로 반환.
+        두 색인의 bm25 점수는 서로 비교할 수 없으므로 구간 적중 전체 → 편집 텍스트 적중 순으로 잇고,
+        각 묶음 안에서만 점수(작을수록 관련도 높음) 순. 두 색인을 UNION ALL 한 질의 하나에
+        LIMIT/OFFSET을 걸어 페이지 경계에서 적중이 빠지지 않는다.
+        """
+        match = fts_query(query)
+        if not match:
+            return {"query": query, "hits": [], "next_offset": None}
+        limit = max(1, min(int(limit), 100))
+        offset = max(0, int(offset))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT f.src, f.score, j.job_id, j.original_filename, s.start, s.end, s.speaker, "
+                "       CASE WHEN f.src = 0 THEN s.text ELSE j.text END AS text "
+                "FROM (SELECT src, seg_id, job_id, score FROM ("
+                "        SELECT 0 AS src, rowid AS seg_id, NULL AS job_id, rank AS score "
+                "        FROM segments_fts WHERE segments_fts MATCH ? "
+                "        UNION ALL "
+                "        SELECT 1 AS src, NULL AS seg_id, job_id, rank AS score "
+                "        FROM jobs_fts WHERE jobs_fts MATCH ?) "
+                "      ORDER BY src, score LIMIT ? OFFSET ?) AS f "
+                "LEFT JOIN segments s ON s.seg_id = f.seg_id "
+                "JOIN jobs j ON j.job_id = COALESCE(s.job_id, f.job_id) "
+                "ORDER BY f.src, f.score",
+                (match, match, limit, offset),
+            ).fetchall()
+        hits = [{
+            "job_id": r["job_id"],
+            "original_filename": r["original_filename"],
+            "start": r["start"],
+            "end": r["end"],
+            "speaker": r["speaker"],
+            "snippet": make_snippet(r["text"], query),
+            "score": round(r["score"], 4),
+            "source": "segment" if r["src"] == 0 else "text",
+        } for r in rows]
+        return {"query": query, "hits": hits, "next_offset": offset + limit if len(rows) == limit else None}
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        try:
+            meta = json.loads(job.pop("meta") or "{}")
+        except Exception:
+            meta = {}
+        if job.get("diarize") is not None:
+            job["diarize"] = bool(job["diarize"])
+        return {**meta, **job}
+
+    def get_job(self, job_id: str, with_text: bool = True) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        if not with_text:
+            job.pop("text", None)
+        return job
+
+    def segment_state(self, job_id: str) -> Optional[Tuple[int, int]]:
+        """(version, segment_count). 구간 캐시 유효성 확인용 가벼운 조회."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, segment_count FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return (row["version"], row["segment_count"] or 0) if row else None
+
+    def get_segments(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT start, end, speaker, text FROM segments WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def iter_segments(self, job_id: str, batch: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        구간을 idx 순서로 batch개씩 읽어 하나씩 내보낸다 (긴 녹음도 메모리 일정).
+        배치마다 새 연결로 (job_id, idx) 인덱스에서 이어 읽으므로 소비 스레드가 바뀌어도 안전.
+        """
+        last_idx = -1
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT idx, start, end, speaker, text FROM segments "
+                    "WHERE job_id = ? AND idx > ? ORDER BY idx LIMIT ?",
+                    (job_id, last_idx, batch),
+                ).fetchall()
+            for r in rows:
+                yield {"start": r["start"], "end": r["end"], "speaker": r["speaker"], "text": r["text"]}
+            if len(rows) < batch:
+                return
+            last_idx = rows[-1]["idx"]
+
+    def list_jobs(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None) -> Dict[str, Any]:
+        """
+        최신순 키셋 페이지네이션. cursor는 직전 페이지 마지막 행의 "created_at:job_id".
+        OFFSET 없이 (created_at, job_id) 인덱스에서 바로 이어 읽는다.
+        """
+        limit = max(1, min(int(limit), 200))
+        where: List[str] = []
+        params: List[Any] = []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if cursor:
+            try:
+                ts, last_id = cursor.split(":", 1)
+                where.append("(created_at, job_id) < (?, ?)")
+                params.extend([float(ts), last_id])
+            except Exception:
+                raise ValueError("잘못된 cursor")
+        sql = (
+            "SELECT job_id, status, original_filename, source_url, language, model, diarize, error, meta, "
+            "segment_count, version, created_at, updated_at FROM jobs"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, job_id DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        items = [self._row_to_job(r) for r in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit and items:
+            last = items[-1]
+            next_cursor = f"{last['created_at']!r}:{last['job_id']}"
+        return {"items": items, "next_cursor": next_cursor}
+
+    def save_batch(self, batch_id: str, items: List[Dict[str, Any]]) -> None:
+        """items: [{"job_id", "task_id"(캐시 적중이면 None), "kind"("file"|"url"), "source"}] (제출 순서)."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO batch_items(batch_id, pos, job_id, task_id, kind, source, created_at) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?)",
+                [(batch_id, i, it["job_id"], it.get("task_id"), it["kind"], it.get("source"), now)
+                 for i, it in enumerate(items)],
+            )
+
+    def upsert_batch(self, batch_id: str, **fields: Any) -> None:
+        """묶음 헤더 생성/갱신. fields: kind, source, title, status, entry_count, error (지정한 컬럼만 갱신)."""
+        names = [k for k in _BATCH_COLUMNS if k in fields]
+        row = {"kind": "batch", "status": "queued", **{n: fields[n] for n in names}}
+        cols = list(row.keys())
+        now = time.time()
+        updates = [f"{n} = excluded.{n}" for n in names] + ["updated_at = excluded.updated_at"]
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO batches(batch_id, created_at, updated_at, {', '.join(cols)}) "
+                f"VALUES({', '.join('?' * (3 + len(cols)))}) "
+                f"ON CONFLICT(batch_id) DO UPDATE SET {', '.join(updates)}",
+                [batch_id, now, now] + [row[c] for c in cols],
+            )
+
+    def get_batch_info(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_batch_task(self, batch_id: str, pos: int, task_id: str) -> None:
+        """항목이 나중에 큐에 들어갈 때(다운로드 완료 후 전사) 태스크 id 연결."""
+        with self._connect() as conn:
+            conn.execute("UPDATE batch_items SET task_id = ? WHERE batch_id = ? AND pos = ?", (task_id, batch_id, pos))
+
+    def get_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """묶음 항목 + 작업 저장소의 현재 상태/파일명/오류 (한 번의 조인)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT b.pos, b.job_id, b.task_id, b.kind, b.source, j.status, j.original_filename, j.error "
+                "FROM batch_items b LEFT JOIN jobs j ON j.job_id = b.job_id "
+                "WHERE b.batch_id = ? ORDER BY b.pos",
+                (batch_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def put_artifacts(self, job_id: str, entries: List[Dict[str, Any]]) -> None:
+        """
+        산출물 여러 개를 한 트랜잭션으로 기록 (작업/단계가 끝날 때 한 번).
+        entries: [{"kind", "path", "size", "sha256", "stage", "status"}]
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO artifacts(job_id, kind, path, size, sha256, stage, status, created_at, updated_at) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id, kind) DO UPDATE SET path = excluded.path, size = excluded.size, "
+                "sha256 = excluded.sha256, stage = excluded.stage, status = excluded.status, "
+                "updated_at = excluded.updated_at",
+                [(job_id, e["kind"], e["path"], e.get("size"), e.get("sha256"), e.get("stage"),
+                  e.get("status") or "ready", now, now) for e in entries],
+            )
+
+    def get_artifacts(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """kind → 매니페스트 행 (기본 키 조회)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT kind, path, size, sha256, stage, status, updated_at FROM artifacts WHERE job_id = ?",
+                (job_id,),
+            ).fetchall()
+        return {r["kind"]: dict(r) for r in rows}
+
+    def mark_artifact_deleted(self, job_id: str, path: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE artifacts SET status = 'deleted', updated_at = ? WHERE job_id = ? AND path = ?",
+                (time.time(), job_id, path),
+            )
+
+    def touch_artifact(self, job_id: str, kind: str, min_interval: float = 3600.0) -> None:
+        """마지막 접근 시각 갱신. min_interval 안의 반복 접근은 쓰지 않는다 (다운로드마다 쓰기 방지)."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE artifacts SET accessed_at = ? WHERE job_id = ? AND kind = ? AND status = 'ready' "
+                "AND (accessed_at IS NULL OR accessed_at < ?)",
+                (now, job_id, kind, now - min_interval),
+            )
+
+    def artifact_candidates(self, kinds: Iterable[str], idle_before: float, live_statuses: Iterable[str],
+                            live_since: float, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        정리 후보: kinds 중 ready 상태이고 마지막 사용(accessed_at, 없으면 updated_at)이 idle_before 이전인 행,
+        오래 사용 안 한 순. 진행 중인 작업(live_statuses이면서 live_since 이후 갱신)의 파일은 제외.
+        """
+        kinds = list(kinds)
+        live = list(live_statuses)
+        if not kinds:
+            return []
+        sql = (
+            "SELECT a.job_id, a.kind, a.path, a.size, COALESCE(a.accessed_at, a.updated_at) AS last_used, "
+            "j.status AS job_status FROM artifacts a LEFT JOIN jobs j ON j.job_id = a.job_id "
+            f"WHERE a.kind IN ({', '.join('?' * len(kinds))}) AND a.status = 'ready' "
+            "AND COALESCE(a.accessed_at, a.updated_at) < ? "
+        )
+        params: List[Any] = kinds + [idle_before]
+        if live:
+            sql += f"AND NOT (COALESCE(j.status, '') IN ({', '.join('?' * len(live))}) AND j.updated_at >= ?) "
+            params += live + [live_since]
+        sql += "ORDER BY last_used LIMIT ?"
+        params.append(int(limit))
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def mark_artifacts(self, keys: Iterable[Tuple[str, str]], status: str) -> None:
+        """(job_id, kind) 여러 건의 상태를 한 트랜잭션으로 변경 (expired/evicted/missing 등)."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE artifacts SET status = ?, updated_at = ? WHERE job_id = ? AND kind = ?",
+                [(status, now, job_id, kind) for job_id, kind in keys],
+            )
+
+    def artifact_usage(self) -> Dict[str, Dict[str, int]]:
+        """kind → {"count", "bytes"} (ready 상태만)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT kind, COUNT(*) AS count, COALESCE(SUM(size), 0) AS bytes FROM artifacts "
+                "WHERE status = 'ready' GROUP BY kind"
+            ).fetchall()
+        return {r["kind"]: {"count": r["count"], "bytes": r["bytes"]} for r in rows}
+
+    def storage_index(self, job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        고아 파일 판별용: job_id → {"status", "updated_at", "ready_paths"}.
+        jobs 행이 없어도 매니페스트 행이 있으면 status None으로 들어간다.
+        """
+        ids = list(dict.fromkeys(job_ids))
+        index: Dict[str, Dict[str, Any]] = {}
+        with self._connect() as conn:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ", ".join("?" * len(chunk))
+                for r in conn.execute(f"SELECT job_id, status, updated_at FROM jobs WHERE job_id IN ({marks})", chunk):
+                    index[r["job_id"]] = {"status": r["status"], "updated_at": r["updated_at"], "ready_paths": set()}
+                for r in conn.execute(
+                    f"SELECT job_id, path FROM artifacts WHERE job_id IN ({marks}) AND status = 'ready'", chunk
+                ):
+                    entry = index.setdefault(r["job_id"], {"status": None, "updated_at": None, "ready_paths": set()})
+                    entry["ready_paths"].add(r["path"])
+        return index
+
+    def delete_job(self, job_id: str) -> bool:
+        with self._lock, self._connect() as conn:
+            self._delete_segments(conn, job_id)
+            conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+            cur = conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            return cur.rowcount > 0
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """프로세스 전역 작업 저장소. 위치는 JOB_STORE_PATH (기본 backend/data/jobs.db)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(os.getenv("JOB_STORE_PATH") or os.path.join(BASE_DIR, "data", "jobs.db"))
+    return _store
+
+
+def load_job_meta(job_id: str, output_dir: str) -> Dict[str, Any]:
+    """작업 메타 조회. 저장소에 없으면 이전 방식의 outputs/{job_id}.json을 읽는다."""
+    try:
+        job = get_job_store().get_job(job_id, with_text=False)
+        if job is not None:
+            return job
+    except Exception:
+        pass
+    try:
+        from utils.artifacts import resolve_output
+        with open(resolve_output(output_dir, job_id, "json"), "r", encoding="utf-8") as mf:
+            return json.load(mf)
+    except Exception:
+        return {}
+
+
+def record_job(job_id: str, **fields: Any) -> None:
+    """메타 기록 (실패해도 작업은 계속)."""
+    try:
+        get_job_store().upsert_job(job_id, **fields)
+    except Exception as e:
+        print(f"작업 저장소 기록 실패: {e}")
+
+
+def record_result(job_id: str, text: str, segments: Iterable[Dict[str, Any]], **fields: Any) -> None:
+    try:
+        get_job_store().save_result(job_id, text, segments, **fields)
+    except Exception as e:
+        print(f"작업 저장소 결과 저장 실패: {e}")
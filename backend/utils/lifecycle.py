@@ -0,0 +1,547 @@
+"""
+저장소 보존 정리: 종류별 TTL, 용량 할당(LRU 축출), 고아 파일 정리.
+
+- TTL: LIFECYCLE_TTL_{KIND}_HOURS (source 24, wav 6, exports 168, mp3/txt/srt 0=무기한).
+  MP3는 사용자가 내려받는 결과물이라 기본으로는 만료시키지 않는다 (켜려면 LIFECYCLE_TTL_MP3_HOURS).
+  매니페스트의 (kind, status, updated_at) 색인으로 만료 후보만 조회하고 디렉터리를 뒤지지 않는다.
+- 용량 할당: uploads+outputs+내보내기 캐시 합계가 STORAGE_QUOTA_GB(0=끔)를 넘거나 디스크 여유가
+  STORAGE_MIN_FREE_GB 아래면 마지막 사용(접근 시각, 없으면 갱신 시각)이 오래된 순으로 원본/WAV/MP3/내보내기를 지운다.
+  txt/srt는 전사 결과 자체이므로 축출하지 않는다.
+- 고아: 팬아웃 디렉터리에 있지만 매니페스트에 ready로 없고 진행 중 작업의 것도 아닌 파일
+  (실패/워커 크래시로 남은 중간 파일, 삭제된 작업의 MP3/내보내기 등).
+- 진행 중 작업(pending/queued/processing/downloading 이면서 LIFECYCLE_STALE_HOURS 이내 갱신)의 파일과
+  LIFECYCLE_STALE_HOURS 안에 PATCH가 있었던 재개 업로드의 부분 파일은 건드리지 않는다.
+  그보다 오래 멈춘 재개 업로드는 부분 파일과 상태 파일을 함께 지운다.
+
+정리는 프로세스 간 잠금(Redis SET NX)을 잡았을 때만, 시간 예산 안에서만 돈다. 이미 다른 곳에서 정리 중이면
+기다리지 않고 바로 돌아오므로 디스크가 부족해도 워커가 정리 때문에 멈추지 않는다.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.artifacts import _job_id_of, resolve_output
+from utils.job_store import BASE_DIR, get_job_store
+from utils.resumable import STATE_DIRNAME
+
+UPLOAD_ROOT = os.path.join(BASE_DIR, "uploads")
+OUTPUT_ROOT = os.path.join(BASE_DIR, "outputs")
+RESUMABLE_STATE_ROOT = os.path.join(BASE_DIR, STATE_DIRNAME)
+
+_GB = 1024 ** 3
+_TTL_DEFAULT_HOURS = {"source": 24.0, "wav": 6.0, "mp3": 0.0, "txt": 0.0, "srt": 0.0, "exports": 24.0 * 7}
+EVICTABLE_KINDS = ("source", "wav", "mp3")
+LIVE_STATUSES = ("pending", "queued", "processing", "downloading")
+
+_LOCK_KEY = "storage:lifecycle:lock"
+_DUE_KEY = "storage:lifecycle:due"
+
+_local_lock = threading.Lock()
+_last_due = 0.0
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                import redis  # type: ignore
+                _redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _redis_client
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def export_root() -> str:
+    return os.getenv("EXPORT_CACHE_DIR") or os.path.join(BASE_DIR, "cache", "exports")
+
+
+def policy() -> Dict[str, Any]:
+    """현재 정리 정책 (환경 변수는 호출 때마다 읽음)."""
+    return {
+        "ttl_hours": {k: max(0.0, _env_float(f"LIFECYCLE_TTL_{k.upper()}_HOURS", v))
+                      for k, v in _TTL_DEFAULT_HOURS.items()},
+        "quota_bytes": int(max(0.0, _env_float("STORAGE_QUOTA_GB", 0.0)) * _GB),
+        # 할당 초과 시 이 비율까지 내려가도록 지워 매번 경계에서 다시 돌지 않게 함
+        "low_water": min(1.0, max(0.1, _env_float("STORAGE_QUOTA_LOW_WATER", 0.9))),
+        "min_free_bytes": int(max(0.0, _env_float("STORAGE_MIN_FREE_GB", 2.0)) * _GB),
+        "stale_hours": max(1.0, _env_float("LIFECYCLE_STALE_HOURS", 24.0)),
+        "orphan_grace_hours": max(0.0, _env_float("LIFECYCLE_ORPHAN_GRACE_HOURS", 1.0)),
+        "max_sec": max(1.0, _env_float("LIFECYCLE_MAX_SEC", 120.0)),
+        "batch": max(1, int(_env_float("LIFECYCLE_BATCH", 500))),
+    }
+
+
+@contextmanager
+def _sweep_guard(ttl: float) -> Iterator[bool]:
+    """
+    정리 중복 방지. 이미 다른 스레드/프로세스가 정리 중이면 기다리지 않고 False.
+    Redis가 없으면 프로세스 안 잠금만 쓴다.
+    """
+    if not _local_lock.acquire(blocking=False):
+        yield False
+        return
+    token = uuid.uuid4().hex
+    client = None
+    held = True
+    try:
+        try:
+            r = _redis()
+            if r.set(_LOCK_KEY, token, nx=True, ex=int(ttl) + 60):
+                client = r
+            else:
+                held = False
+        except Exception:
+            pass
+        yield held
+    finally:
+        if client is not None:
+            try:
+                if (client.get(_LOCK_KEY) or b"").decode() == token:
+                    client.delete(_LOCK_KEY)
+            except Exception:
+                pass
+        _local_lock.release()
+
+
+def claim_sweep_slot() -> bool:
+    """
+    주기 정리 차례인지 (LIFECYCLE_INTERVAL_MIN, 기본 30분에 한 번). celery beat 없이 워커만 돌려도
+    작업이 끝날 때 이 슬롯을 잡은 한 곳에서만 정리 태스크를 넣는다.
+    """
+    global _last_due
+    interval = max(60, int(_env_float("LIFECYCLE_INTERVAL_MIN", 30.0) * 60))
+    try:
+        return bool(_redis().set(_DUE_KEY, "1", nx=True, ex=interval))
+    except Exception:
+        now = time.monotonic()
+        if now - _last_due < interval:
+            return False
+        _last_due = now
+        return True
+
+
+class _Tally:
+    """분류별 건수/바이트 합계와 앞쪽 일부 항목 (보고서용)."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self.count = 0
+        self.bytes = 0
+        self.by_kind: Dict[str, Dict[str, int]] = {}
+        self.items: List[Dict[str, Any]] = []
+
+    def add(self, kind: str, path: str, size: int, **extra: Any) -> None:
+        self.count += 1
+        self.bytes += size
+        k = self.by_kind.setdefault(kind, {"count": 0, "bytes": 0})
+        k["count"] += 1
+        k["bytes"] += size
+        if len(self.items) < self.max_items:
+            self.items.append({"kind": kind, "path": path, "size": size, **extra})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "bytes": self.bytes, "by_kind": self.by_kind, "items": self.items}
+
+
+def _remove(path: str) -> bool:
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except FileNotFoundError:
+        return True
+    except Exception:
+        return False
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except Exception:
+        return 0
+
+
+class _Sweep:
+    """정리 한 번의 상태: 시간 예산, 이미 처리한 경로, 분류별 집계."""
+
+    def __init__(self, dry_run: bool, budget_sec: float, pol: Dict[str, Any]):
+        self.dry_run = dry_run
+        self.policy = pol
+        self.now = time.time()
+        self.deadline = time.monotonic() + budget_sec
+        self.live_since = self.now - pol["stale_hours"] * 3600
+        self.truncated = False
+        self.freed = 0
+        self.missing = 0
+        self.dropped: set = set()
+        self.errors: List[str] = []
+        max_items = max(0, int(_env_float("LIFECYCLE_REPORT_ITEMS", 100)))
+        self.expired = _Tally(max_items)
+        self.evicted = _Tally(max_items)
+        self.orphans = _Tally(max_items)
+        self.store = get_job_store()
+
+    def timed_out(self) -> bool:
+        if time.monotonic() >= self.deadline:
+            self.truncated = True
+        return self.truncated
+
+    def _is_live(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and entry.get("status") in LIVE_STATUSES and (entry.get("updated_at") or 0) >= self.live_since
+
+    def _drop(self, tally: _Tally, kind: str, path: str, size: int, **extra: Any) -> bool:
+        """파일(또는 내보내기 디렉터리) 하나 정리. dry_run이면 집계만."""
+        if path in self.dropped:
+            return False
+        if not self.dry_run and not _remove(path):
+            self.errors.append(f"삭제 실패: {path}")
+            return False
+        self.dropped.add(path)
+        self.freed += size
+        tally.add(kind, path, size, **extra)
+        return True
+
+    def _drop_rows(self, rows: List[Dict[str, Any]], status: str, tally: _Tally) -> None:
+        """매니페스트 행들의 파일을 지우고 상태를 한 트랜잭션으로 바꾼다."""
+        done: List[Tuple[str, str]] = []
+        missing: List[Tuple[str, str]] = []
+        for r in rows:
+            if self.timed_out():
+                break
+            key = (r["job_id"], r["kind"])
+            if not os.path.exists(r["path"]):
+                missing.append(key)
+                continue
+            size = r.get("size") or _size(r["path"])
+            if self._drop(tally, r["kind"], r["path"], size, job_id=r["job_id"], last_used=r.get("last_used")):
+                done.append(key)
+        self.missing += len(missing)
+        if self.dry_run:
+            return
+        try:
+            if done:
+                self.store.mark_artifacts(done, status)
+            if missing:
+                self.store.mark_artifacts(missing, "missing")
+        except Exception as e:
+            self.errors.append(f"매니페스트 갱신 실패: {e}")
+
+    # ---- 디렉터리 스캔 (주기 정리에서만) ----
+
+    def scan(self, root: str) -> List[Tuple[str, int, float]]:
+        """root 아래 파일 (경로, 크기, mtime). 시간 예산을 넘기면 거기까지만."""
+        files: List[Tuple[str, int, float]] = []
+        if not os.path.isdir(root):
+            return files
+        for dirpath, _dirnames, filenames in os.walk(root):
+            if self.timed_out():
+                break
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except Exception:
+                    continue
+                files.append((os.path.abspath(path), st.st_size, st.st_mtime))
+        return files
+
+    # ---- 단계 ----
+
+    def expire(self) -> None:
+        """종류별 TTL이 지난 매니페스트 산출물 정리 (색인 조회, 배치 단위)."""
+        batch = self.policy["batch"]
+        for kind, hours in self.policy["ttl_hours"].items():
+            if kind == "exports" or hours <= 0:
+                continue
+            while not self.timed_out():
+                rows = self.store.artifact_candidates([kind], self.now - hours * 3600, LIVE_STATUSES,
+                                                      self.live_since, batch)
+                rows = [r for r in rows if r["path"] not in self.dropped]
+                if not rows:
+                    break
+                self._drop_rows(rows, "expired", self.expired)
+                # dry_run은 상태가 안 바뀌어 같은 행이 다시 나오므로 한 배치만 보고
+                if self.dry_run or len(rows) < batch:
+                    break
+
+    def expire_exports(self, exports: List[Tuple[str, int, float]]) -> None:
+        hours = self.policy["ttl_hours"].get("exports", 0.0)
+        if hours <= 0:
+            return
+        cutoff = self.now - hours * 3600
+        for path, size, mtime in exports:
+            if self.timed_out():
+                break
+            if mtime < cutoff:
+                self._drop(self.expired, "exports", path, size)
+
+    def resumable_states(self) -> List[Dict[str, Any]]:
+        """재개 업로드 상태 파일 목록. 상태 파일은 PATCH마다 다시 쓰이므로 mtime이 마지막 활동 시각."""
+        states: List[Dict[str, Any]] = []
+        if not os.path.isdir(RESUMABLE_STATE_ROOT):
+            return states
+        with os.scandir(RESUMABLE_STATE_ROOT) as it:
+            for entry in it:
+                if self.timed_out():
+                    break
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except Exception:
+                    continue
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except Exception:
+                    state = {}
+                path = state.get("path")
+                states.append({
+                    "state_path": entry.path,
+                    "size": st.st_size,
+                    "mtime": st.st_mtime,
+                    "upload_path": os.path.abspath(path) if path else None,
+                    "completed": bool(state.get("completed")),
+                })
+        return states
+
+    def collect_orphans(self, uploads: List[Tuple[str, int, float]], outputs: List[Tuple[str, int, float]],
+                        exports: List[Tuple[str, int, float]], resumable: Optional[List[Dict[str, Any]]] = None) -> None:
+        grace_cutoff = self.now - self.policy["orphan_grace_hours"] * 3600
+        ids = set()
+        for path, _size, _mtime in uploads + outputs:
+            job_id = _job_id_of(os.path.basename(path))
+            if job_id:
+                ids.add(job_id)
+        for path, _size, _mtime in exports:
+            job_id = _job_id_of(os.path.basename(os.path.dirname(path)))
+            if job_id:
+                ids.add(job_id)
+        try:
+            index = self.store.storage_index(ids)
+        except Exception as e:
+            self.errors.append(f"작업 조회 실패: {e}")
+            return
+
+        # 받는 중인 재개 업로드의 부분 파일 (작업 행은 생성 시각 그대로라 작업 상태로는 판단할 수 없음)
+        receiving = {r["upload_path"] for r in resumable or []
+                     if r["upload_path"] and not r["completed"] and r["mtime"] >= self.live_since}
+
+        def known_job(job_id: str) -> bool:
+            # 결과물/내보내기는 작업이 완전히 사라졌을 때만 고아 (매니페스트 이전에 만들어진 결과 파일 보호)
+            entry = index.get(job_id)
+            if entry and entry.get("status") is not None:
+                return True
+            return os.path.exists(resolve_output(OUTPUT_ROOT, job_id, "json"))
+
+        for tree, files in (("uploads", uploads), ("outputs", outputs)):
+            for path, size, mtime in files:
+                if self.timed_out():
+                    return
+                job_id = _job_id_of(os.path.basename(path))
+                if not job_id or mtime > grace_cutoff or path in self.dropped:
+                    continue
+                entry = index.get(job_id)
+                if (entry and path in entry["ready_paths"]) or self._is_live(entry) or path in receiving:
+                    continue
+                if tree == "outputs" and known_job(job_id):
+                    continue
+                self._drop(self.orphans, tree, path, size, job_id=job_id)
+
+        # 내보내기 캐시는 작업 디렉터리 단위 (TTL로 이미 지운 파일은 제외하고 합산)
+        job_dirs: Dict[str, Tuple[int, float]] = {}
+        for path, size, mtime in exports:
+            if path in self.dropped:
+                continue
+            # 렌더링 중 죽은 임시 파일
+            if path.endswith(".tmp") and mtime < grace_cutoff:
+                self._drop(self.orphans, "exports", path, size)
+                continue
+            total, newest = job_dirs.get(os.path.dirname(path), (0, 0.0))
+            job_dirs[os.path.dirname(path)] = (total + size, max(newest, mtime))
+        for job_dir, (total, newest) in job_dirs.items():
+            if self.timed_out():
+                return
+            job_id = _job_id_of(os.path.basename(job_dir))
+            if not job_id or newest > grace_cutoff:
+                continue
+            if not known_job(job_id):
+                self._drop(self.orphans, "exports", job_dir, total, job_id=job_id)
+
+    def collect_resumable_states(self, resumable: List[Dict[str, Any]]) -> None:
+        """끝났거나 버려진 재개 업로드 상태 파일. 받다 만 업로드는 부분 파일도 함께 지운다."""
+        for r in resumable:
+            if self.timed_out():
+                return
+            if r["mtime"] >= self.live_since:
+                continue
+            if not r["completed"] and r["upload_path"] and os.path.exists(r["upload_path"]):
+                if not self._drop(self.orphans, "uploads", r["upload_path"], _size(r["upload_path"])):
+                    if r["upload_path"] not in self.dropped:
+                        # 부분 파일을 못 지웠으면 상태도 남겨 다음 정리에서 다시 시도
+                        continue
+            self._drop(self.orphans, "resumable", r["state_path"], r["size"])
+
+    def evict(self, need: int, exports: Optional[List[Tuple[str, int, float]]] = None) -> None:
+        """need 바이트를 비울 때까지 마지막 사용이 오래된 순으로 축출 (매니페스트 + 내보내기 캐시)."""
+        if need <= 0:
+            return
+        try:
+            rows = self.store.artifact_candidates(EVICTABLE_KINDS, self.now, LIVE_STATUSES, self.live_since,
+                                                  self.policy["batch"] * 4)
+        except Exception as e:
+            self.errors.append(f"축출 후보 조회 실패: {e}")
+            rows = []
+        candidates = [r for r in rows if r["path"] not in self.dropped]
+        for path, size, mtime in exports or []:
+            # 고아 정리에서 작업 디렉터리째 지운 파일도 제외
+            if path in self.dropped or os.path.dirname(path) in self.dropped or path.endswith(".tmp"):
+                continue
+            candidates.append({"job_id": None, "kind": "exports", "path": path, "size": size, "last_used": mtime})
+        candidates.sort(key=lambda c: c["last_used"] or 0)
+        # 필요한 만큼 앞에서부터 고르고, 매니페스트 행은 모아서 상태 갱신을 한 트랜잭션으로
+        rows: List[Dict[str, Any]] = []
+        planned = 0
+        for c in candidates:
+            if planned >= need or self.timed_out():
+                break
+            size = c.get("size") or _size(c["path"])
+            planned += size
+            if c["kind"] == "exports":
+                self._drop(self.evicted, "exports", c["path"], size, last_used=c["last_used"])
+            else:
+                rows.append(c)
+        self._drop_rows(rows, "evicted", self.evicted)
+
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        return {
+            "dry_run": self.dry_run,
+            "expired": self.expired.as_dict(),
+            "evicted": self.evicted.as_dict(),
+            "orphans": self.orphans.as_dict(),
+            "missing": self.missing,
+            "freed_bytes": self.freed,
+            "truncated": self.truncated,
+            "errors": self.errors[:50],
+            **extra,
+        }
+
+
+def _disk(path: str) -> Dict[str, int]:
+    try:
+        usage = shutil.disk_usage(path if os.path.exists(path) else BASE_DIR)
+        return {"total": usage.total, "free": usage.free}
+    except Exception:
+        return {"total": 0, "free": 0}
+
+
+def _run_sweep(sweep: "_Sweep") -> Dict[str, Any]:
+    pol = sweep.policy
+    started = time.monotonic()
+    uploads = sweep.scan(UPLOAD_ROOT)
+    outputs = sweep.scan(OUTPUT_ROOT)
+    exports = sweep.scan(export_root())
+    usage = {
+        "uploads": sum(f[1] for f in uploads),
+        "outputs": sum(f[1] for f in outputs),
+        "exports": sum(f[1] for f in exports),
+    }
+    usage["total"] = sum(usage.values())
+    disk_before = _disk(UPLOAD_ROOT)
+
+    resumable = sweep.resumable_states()
+
+    sweep.expire()
+    sweep.expire_exports(exports)
+    sweep.collect_orphans(uploads, outputs, exports, resumable)
+    sweep.collect_resumable_states(resumable)
+
+    # 할당/여유 공간: TTL·고아 정리 뒤에도 부족한 만큼만 LRU 축출 (dry_run은 지운 셈 치고 계산)
+    need = 0
+    remaining = usage["total"] - sweep.freed
+    if pol["quota_bytes"] > 0 and remaining > pol["quota_bytes"]:
+        need = remaining - int(pol["quota_bytes"] * pol["low_water"])
+    free = disk_before["free"] + sweep.freed if sweep.dry_run else _disk(UPLOAD_ROOT)["free"]
+    if pol["min_free_bytes"] > 0 and free < pol["min_free_bytes"]:
+        need = max(need, int(pol["min_free_bytes"] / pol["low_water"]) - free)
+    sweep.evict(need, exports)
+
+    try:
+        by_kind = sweep.store.artifact_usage()
+    except Exception:
+        by_kind = {}
+    return sweep.report(
+        usage={**usage, "by_kind": by_kind},
+        disk={**disk_before, "min_free": pol["min_free_bytes"]},
+        quota={"limit": pol["quota_bytes"] or None, "need": need,
+               "over": max(0, usage["total"] - sweep.freed - pol["quota_bytes"]) if pol["quota_bytes"] else 0},
+        policy={k: pol[k] for k in ("ttl_hours", "stale_hours", "orphan_grace_hours")},
+        elapsed_sec=round(time.monotonic() - started, 3),
+    )
+
+
+def sweep_storage(dry_run: bool = True) -> Dict[str, Any]:
+    """
+    TTL 만료 → 고아 → 용량 할당 순으로 정리하고 보고서 반환. dry_run이면 지울 대상만 집계.
+    실제 정리는 잠금을 잡은 한 곳에서만 돌며, 이미 정리 중이면 {"skipped": True}.
+    """
+    pol = policy()
+    if dry_run:
+        return _run_sweep(_Sweep(True, pol["max_sec"], pol))
+    with _sweep_guard(pol["max_sec"]) as held:
+        if not held:
+            return {"dry_run": False, "skipped": True, "reason": "다른 곳에서 정리 중"}
+        return _run_sweep(_Sweep(False, pol["max_sec"], pol))
+
+
+def relieve_disk_pressure(path: str = UPLOAD_ROOT) -> Optional[Dict[str, Any]]:
+    """
+    작업이 큰 파일을 쓰기 전에 호출. 여유 공간이 STORAGE_MIN_FREE_GB 이상이면 statvfs 한 번으로 끝난다.
+    부족하면 디렉터리 스캔 없이 매니페스트 색인 조회만으로 LIFECYCLE_RELIEF_SEC(기본 5초) 안에서 LRU 축출.
+    다른 곳에서 정리 중이면 기다리지 않고 바로 진행한다.
+    """
+    pol = policy()
+    if pol["min_free_bytes"] <= 0:
+        return None
+    free = _disk(path)["free"]
+    if not free or free >= pol["min_free_bytes"]:
+        return None
+    budget = max(0.5, _env_float("LIFECYCLE_RELIEF_SEC", 5.0))
+    with _sweep_guard(budget) as held:
+        if not held:
+            return None
+        sweep = _Sweep(False, budget, pol)
+        try:
+            sweep.evict(int(pol["min_free_bytes"] / pol["low_water"]) - free)
+        except Exception as e:
+            sweep.errors.append(str(e))
+        report = sweep.report(disk={"free": free, "min_free": pol["min_free_bytes"]})
+    if report["freed_bytes"]:
+        print(f"디스크 여유 부족: {report['freed_bytes'] // (1024 * 1024)}MB 축출")
+    return report
+
+
+if __name__ == "__main__":
+    # 사용: backend/ 에서 python -m utils.lifecycle [--apply] (기본은 dry-run 보고서)
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="uploads/outputs/내보내기 캐시 보존 정리")
+    parser.add_argument("--apply", action="store_true", help="실제로 삭제 (없으면 dry-run)")
+    args = parser.parse_args()
+    print(json.dumps(sweep_storage(dry_run=not args.apply), ensure_ascii=False, indent=2, default=str))
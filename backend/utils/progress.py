@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# 늦게 접속한 구독자를 위한 백로그 보관 시간
+try:
+    PROGRESS_TTL_SEC = max(1, int(os.getenv("PROGRESS_TTL_SEC", "3600")))
+except Exception:
+    PROGRESS_TTL_SEC = 3600
+
+
+def channel_name(task_id: str) -> str:
+    return f"progress:{task_id}"
+
+
+def segments_key(task_id: str) -> str:
+    return f"progress:{task_id}:segments"
+
+
+def last_key(task_id: str) -> str:
+    return f"progress:{task_id}:last"
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _redis():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import redis  # type: ignore
+                _client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _client
+
+
+class ProgressReporter:
+    """
+    전사 작업의 실시간 진행 상황을 Redis pub/sub으로 내보낸다.
+    - progress: 디코딩된 오디오 초 / 전체 초 (+ 기존 update_state 진행률 유지)
+    - segment: 완성된 구간을 즉시 전송하고, 늦은 구독자용으로 리스트에 누적
+    어떤 API 레플리카든 채널을 구독해 SSE로 중계할 수 있다. Redis 오류는 작업을 막지 않는다.
+    """
+
+    def __init__(self, task=None, task_id: Optional[str] = None, job_id: Optional[str] = None,
+                 start_pct: int = 30, end_pct: int = 90):
+        self.task = task
+        self.task_id = task_id or (getattr(getattr(task, "request", None), "id", None) if task else None)
+        self.job_id = job_id
+        self.start_pct = start_pct
+        self.end_pct = end_pct
+        self._last_state_at = 0.0
+        self._lock = threading.Lock()
+
+    def _publish(self, event: Dict[str, Any], keep_segment: bool = False) -> None:
+        if not self.task_id:
+            return
+        try:
+            payload = json.dumps(event, ensure_ascii=False)
+            pipe = _redis().pipeline()
+            if keep_segment:
+                pipe.rpush(segments_key(self.task_id), payload)
+                pipe.expire(segments_key(self.task_id), PROGRESS_TTL_SEC)
+            else:
+                pipe.set(last_key(self.task_id), payload, ex=PROGRESS_TTL_SEC)
+            pipe.publish(channel_name(self.task_id), payload)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def _update_state(self, meta: Dict[str, Any], force: bool = False) -> None:
+        # /status 폴링 호환: 결과 백엔드 쓰기는 초당 1회로 제한
+        if self.task is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_state_at < 1.0:
+            return
+        self._last_state_at = now
+        try:
+            self.task.update_state(state="PROGRESS", meta=meta)
+        except Exception:
+            pass
+
+    def progress(self, pct: int, **extra: Any) -> None:
+        meta = {"progress": int(pct), **extra}
+        self._update_state(meta, force=True)
+        self._publish({"type": "progress", "job_id": self.job_id, **meta})
+
+    def audio(self, decoded_sec: float, total_sec: float) -> None:
+        """디코딩 위치를 start_pct~end_pct 구간 진행률로 환산해 전송."""
+        with self._lock:
+            ratio = max(0.0, min(1.0, decoded_sec / total_sec)) if total_sec else 0.0
+            pct = self.start_pct + int(ratio * (self.end_pct - self.start_pct))
+            meta = {"progress": pct, "decoded_sec": round(decoded_sec, 2), "total_sec": round(total_sec, 2)}
+            self._update_state(meta)
+            self._publish({"type": "progress", "job_id": self.job_id, **meta})
+
+    def stream(self, state: Dict[str, Any]) -> None:
+        """
+        스트리밍 URL 모드: 다운로드 위치와 디코딩(전사) 위치를 함께 전송.
+        전체 길이를 알면 전사 위치, 모르면 다운로드 바이트 비율로 진행률을 환산한다.
+        """
+        with self._lock:
+            decoded_sec = float(state.get("decoded_sec") or 0.0)
+            total_sec = float(state.get("total_sec") or 0.0)
+            downloaded = int(state.get("downloaded_bytes") or 0)
+            total_bytes = int(state.get("total_bytes") or 0)
+            download_ratio = max(0.0, min(1.0, downloaded / total_bytes)) if total_bytes else None
+            if total_sec:
+                ratio = max(0.0, min(1.0, decoded_sec / total_sec))
+            else:
+                ratio = download_ratio or 0.0
+            meta = {
+                "progress": self.start_pct + int(ratio * (self.end_pct - self.start_pct)),
+                "decoded_sec": round(decoded_sec, 2),
+                "buffered_sec": round(float(state.get("buffered_sec") or 0.0), 2),
+                "downloaded_bytes": downloaded,
+            }
+            if total_sec:
+                meta["total_sec"] = round(total_sec, 2)
+            if total_bytes:
+                meta["total_bytes"] = total_bytes
+            if download_ratio is not None:
+                meta["download_pct"] = int(download_ratio * 100)
+            self._update_state(meta)
+            self._publish({"type": "progress", "job_id": self.job_id, **meta})
+
+    def segment(self, seg: Dict[str, Any]) -> None:
+        with self._lock:
+            self._publish({
+                "type": "segment",
+                "job_id": self.job_id,
+                "segment": {
+                    "id": seg.get("id"),
+                    "start": float(seg.get("start", 0.0)),
+                    "end": float(seg.get("end", 0.0)),
+                    "text": str(seg.get("text", "")).strip(),
+                },
+            }, keep_segment=True)
+
+    def done(self, success: bool = True, error: Optional[str] = None) -> None:
+        self._publish({"type": "done", "job_id": self.job_id, "success": bool(success), "error": error})
@@ -0,0 +1,229 @@
+import errno
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from utils.artifacts import upload_file
+from utils.validator import MAX_FILE_SIZE
+
+# 재개 가능한 업로드 상태 파일 위치 (업로드 폴더 옆: /uploads 정적 서빙 대상에서 제외)
+STATE_DIRNAME = ".resumable_uploads"
+
+# 이 시간 넘게 PATCH가 없는 업로드의 누적 해시는 메모리에서 버린다 (재개 시 디스크에서 복원)
+try:
+    HASHER_IDLE_SEC = max(60.0, float(os.getenv("RESUMABLE_HASHER_IDLE_SEC", "3600")))
+except Exception:
+    HASHER_IDLE_SEC = 3600.0
+
+
+class UploadError(Exception):
+    """status_code: 응답 코드 (404 없음, 409 오프셋 불일치, 413 크기 초과 등)."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class ResumableUploads:
+    """
+    tus 방식의 재개 가능한 업로드.
+    - 청크를 최종 위치(uploads/{id}_{파일명})에 바로 기록 (임시 파일/재복사 없음)
+    - 받는 즉시 sha256 누적, 도착 바이트 기준으로 선언 길이/MAX_FILE_SIZE 초과 차단
+    - 상태(offset 등)는 JSON으로 저장해 연결이 끊기거나 API가 재시작돼도 이어서 받는다
+    - 파일 기록/해시 복원은 스레드 풀에서 실행 (이벤트 루프를 막지 않음)
+    해시 객체는 직렬화할 수 없으므로 프로세스 메모리에 두고, 없으면(재시작/다른 워커/유휴 만료)
+    디스크의 기존 바이트를 한 번 읽어 복원한다.
+    완료된 업로드는 전사 작업 인계(job_status 기록)가 끝날 때까지 점유를 유지하며,
+    인계가 실패하면 같은 오프셋의 빈 PATCH로 인계만 다시 시도할 수 있다.
+    """
+
+    def __init__(self, upload_dir: str):
+        self.upload_dir = upload_dir
+        self.state_dir = os.path.join(os.path.dirname(os.path.abspath(upload_dir)), STATE_DIRNAME)
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hashers: Dict[str, Any] = {}  # upload_id -> (offset, sha256, 마지막 사용 시각)
+        self._busy: set = set()
+
+    def _state_path(self, upload_id: str) -> str:
+        return os.path.join(self.state_dir, f"{os.path.basename(upload_id)}.json")
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        path = self._state_path(state["upload_id"])
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def create(self, upload_id: str, filename: str, length: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        if length < 0:
+            raise UploadError(400, "Upload-Length가 올바르지 않습니다")
+        if length > MAX_FILE_SIZE:
+            raise UploadError(413, f"파일이 너무 큽니다 (최대 {MAX_FILE_SIZE // (1024 * 1024)}MB)")
+        path = upload_file(self.upload_dir, upload_id, filename)
+        # 선언 길이만큼 미리 만들지 않고 빈 파일로 시작 (오프셋 = 실제 기록된 바이트)
+        open(path, "wb").close()
+        state = {
+            "upload_id": upload_id,
+            "filename": os.path.basename(filename),
+            "path": path,
+            "length": int(length),
+            "offset": 0,
+            "created_at": time.time(),
+            "completed": False,
+            "sha256": None,
+            "metadata": metadata,
+        }
+        self._save_state(state)
+        with self._lock:
+            self._hashers[upload_id] = (0, hashlib.sha256(), time.time())
+        return state
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._state_path(upload_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _hasher_at(self, state: Dict[str, Any]):
+        upload_id = state["upload_id"]
+        offset = state["offset"]
+        with self._lock:
+            entry = self._hashers.get(upload_id)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+        # 재시작 등으로 누적 해시가 없으면 기록된 바이트로 복원
+        h = hashlib.sha256()
+        with open(state["path"], "rb") as f:
+            remaining = offset
+            while remaining > 0:
+                chunk = f.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                h.update(chunk)
+                remaining -= len(chunk)
+        return h
+
+    def _prune_hashers(self) -> None:
+        cutoff = time.time() - HASHER_IDLE_SEC
+        with self._lock:
+            for upload_id in [k for k, v in self._hashers.items() if v[2] < cutoff and k not in self._busy]:
+                del self._hashers[upload_id]
+
+    def begin(self, upload_id: str, client_offset: int) -> Dict[str, Any]:
+        """PATCH 시작: 상태/오프셋 확인 후 업로드를 점유 (완료됐지만 작업 인계 전이면 인계 재시도용으로 점유)."""
+        self._prune_hashers()
+        state = self.get(upload_id)
+        if state is None:
+            raise UploadError(404, "업로드를 찾을 수 없습니다")
+        if state["completed"] and state.get("job_status"):
+            raise UploadError(409, "이미 완료된 업로드입니다")
+        if client_offset != state["offset"]:
+            raise UploadError(409, f"Upload-Offset 불일치 (서버: {state['offset']})")
+        with self._lock:
+            if upload_id in self._busy:
+                raise UploadError(409, "같은 업로드에 대한 다른 요청이 진행 중입니다")
+            self._busy.add(upload_id)
+        return state
+
+    @staticmethod
+    def _open_at(path: str, offset: int):
+        f = open(path, "r+b")
+        f.seek(offset)
+        f.truncate()
+        return f
+
+    @staticmethod
+    def _write(f, hasher, chunk: bytes) -> None:
+        f.write(chunk)
+        hasher.update(chunk)
+
+    async def append(self, state: Dict[str, Any], stream) -> Dict[str, Any]:
+        """
+        요청 본문 스트림을 현재 오프셋부터 기록. 중간에 끊겨도 받은 만큼은 오프셋에 반영.
+        선언 길이를 넘는 바이트가 오면 413 (그때까지 받은 바이트는 유지).
+        서버 쪽 기록 실패는 연결 끊김과 구분해 410(부분 파일 없음)/507(디스크 부족)/500으로 알린다.
+        """
+        upload_id = state["upload_id"]
+        if state["completed"]:
+            # 작업 인계가 실패했던 완료 업로드: 본문 없이 인계만 다시 (점유는 호출자가 release)
+            return state
+        try:
+            hasher = await run_in_threadpool(self._hasher_at, state)
+        except OSError:
+            self.release(upload_id)
+            raise UploadError(410, "업로드 중인 파일이 없습니다")
+        limit = min(state["length"], MAX_FILE_SIZE)
+        error: Optional[UploadError] = None
+        f = None
+        try:
+            f = await run_in_threadpool(self._open_at, state["path"], state["offset"])
+            async for chunk in stream:
+                if not chunk:
+                    continue
+                if state["offset"] + len(chunk) > limit:
+                    error = UploadError(413, "선언한 Upload-Length/최대 크기를 초과했습니다")
+                    break
+                await run_in_threadpool(self._write, f, hasher, chunk)
+                state["offset"] += len(chunk)
+        except (ClientDisconnect, ConnectionError):
+            # 연결 끊김: 지금까지 기록한 바이트로 상태 저장 후 클라이언트가 HEAD로 재개
+            pass
+        except FileNotFoundError:
+            error = UploadError(410, "업로드 중인 파일이 없습니다")
+        except OSError as e:
+            status = 507 if e.errno == errno.ENOSPC else 500
+            error = UploadError(status, f"업로드 파일 기록 실패: {e.strerror or e}")
+        finally:
+            if f is not None:
+                try:
+                    await run_in_threadpool(f.close)
+                except OSError as e:
+                    error = error or UploadError(500, f"업로드 파일 기록 실패: {e.strerror or e}")
+            if error is None and state["offset"] >= state["length"]:
+                state["completed"] = True
+                state["sha256"] = hasher.hexdigest()
+            try:
+                self._save_state(state)
+            except OSError as e:
+                # 상태를 못 남기면 완료로 취급하지 않음 (다음 PATCH가 저장된 오프셋부터 다시 기록)
+                state["completed"] = False
+                error = error or UploadError(500, f"업로드 상태 저장 실패: {e.strerror or e}")
+            with self._lock:
+                if state["completed"]:
+                    self._hashers.pop(upload_id, None)
+                else:
+                    self._hashers[upload_id] = (state["offset"], hasher, time.time())
+                    self._busy.discard(upload_id)
+        if error is not None:
+            raise error
+        return state
+
+    def release(self, upload_id: str) -> None:
+        with self._lock:
+            self._busy.discard(upload_id)
+
+    def update(self, state: Dict[str, Any]) -> None:
+        self._save_state(state)
+
+    def delete(self, upload_id: str) -> bool:
+        state = self.get(upload_id)
+        if state is None:
+            return False
+        for path in (state.get("path"), self._state_path(upload_id)):
+            try:
+                if path and os.path.exists(path):
+                    os.remove(path)
+            except Exception:
+                pass
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        return True
@@ -0,0 +1,213 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from utils.artifacts import resolve_output
+from utils.job_store import get_job_store
+
+
+def _fmt_hms(sec: float) -> str:
+    # SRT 파서 결과와 같은 "HH:MM:SS" (밀리초 버림)
+    total = max(0, int(sec))
+    return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d}"
+
+
+def _srt_blocks(f) -> Iterator[List[str]]:
+    # 빈 줄(공백만 있는 줄 포함)로 구분된 블록을 한 줄씩 읽으며 내보냄
+    block: List[str] = []
+    for line in f:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            block.append(line)
+        elif block:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _parse_srt_block(lines: List[str]) -> Optional[Dict[str, Any]]:
+    if len(lines) < 2:
+        return None
+    # 첫 줄이 번호일 수 있음
+    if re.match(r"^\d+$", lines[0].strip()):
+        lines = lines[1:]
+    time_line = lines[0]
+    m = re.match(r"(\d{2}:\d{2}:\d{2}),\d{3}\s*-->\s*(\d{2}:\d{2}:\d{2}),\d{3}", time_line)
+    if not m:
+        # 밀리초 포함 매치
+        m = re.match(r"(\d{2}:\d{2}:\d{2}),\d{1,3}\s*-->\s*(\d{2}:\d{2}:\d{2}),\d{1,3}", time_line)
+    if not m:
+        return None
+    start_ts, end_ts = m.group(1), m.group(2)
+    text = " ".join(lines[1:]).strip()
+    # 화자 라벨 추출: [화자 N] / [SPEAKER_1] / '화자 N:' / 'SPEAKER 1:' 지원
+    speaker = None
+    msp = re.match(r"^\[(?:\s*화자\s*(\d+)|\s*SPEAKER[_\s]*(\d+))\]\s*(.*)$", text, flags=re.IGNORECASE)
+    if msp:
+        speaker = msp.group(1) or msp.group(2)
+        text = msp.group(3).strip()
+    else:
+        msp2 = re.match(r"^(?:\s*화자\s*(\d+)|\s*SPEAKER[_\s]*(\d+))\s*:\s*(.*)$", text, flags=re.IGNORECASE)
+        if msp2:
+            speaker = msp2.group(1) or msp2.group(2)
+            text = msp2.group(3).strip()
+    ent = {"start": start_ts, "end": end_ts, "text": text}
+    if speaker:
+        try:
+            ent["speaker"] = int(speaker)
+        except Exception:
+            pass
+    return ent
+
+
+def iter_srt_file(srt_path: str) -> Iterator[Dict[str, Any]]:
+    """SRT 파서 (간단, 화자 라벨 인식). 파일을 통째로 읽지 않고 블록 단위로 내보낸다."""
+    if not os.path.exists(srt_path):
+        return
+    with open(srt_path, "r", encoding="utf-8") as f:
+        for block in _srt_blocks(f):
+            ent = _parse_srt_block(block)
+            if ent is not None:
+                yield ent
+
+
+def parse_srt_file(srt_path: str) -> List[Dict[str, Any]]:
+    """저장소에 구간이 없는 작업(도입 이전 결과)용 전체 파싱."""
+    return list(iter_srt_file(srt_path))
+
+
+def _store_entry(r: Dict[str, Any]) -> Dict[str, Any]:
+    # 저장소 구간 → SRT 파서와 같은 모양 (+ 초 단위 원본 시각)
+    ent = {
+        "start": _fmt_hms(r["start"]),
+        "end": _fmt_hms(r["end"]),
+        "text": r["text"],
+        "start_sec": r["start"],
+        "end_sec": r["end"],
+    }
+    if r.get("speaker"):
+        ent["speaker"] = int(r["speaker"])
+    return ent
+
+
+def _store_entries(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [_store_entry(r) for r in rows]
+
+
+class SegmentCache:
+    """
+    내보내기용 구간 목록 LRU.
+    - 키: 저장소에 구간이 있으면 (job_id, version), 없으면 (job_id, SRT mtime)
+      → 텍스트 수정/재전사로 version이 오르거나 SRT가 바뀌면 자동으로 새로 읽음
+    - 삭제 시 invalidate(job_id)로 즉시 제거
+    - 구간이 max_segments를 넘는 긴 작업은 캐시에 담지 않고 iter_entries로 흘려 보낸다
+    반환 목록은 여러 요청이 공유하므로 호출 측에서 수정하지 않는다.
+    """
+
+    def __init__(self, max_entries: int = 64, max_segments: int = 20000):
+        self.max_entries = max(1, max_entries)
+        self.max_segments = max(1, max_segments)
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[Hashable, List[Dict[str, Any]]]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _lookup(self, job_id: str, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            item = self._items.get(job_id)
+            if item is not None and item[0] == key:
+                self._items.move_to_end(job_id)
+                self._stats["hits"] += 1
+                return item[1]
+            self._stats["misses"] += 1
+            return None
+
+    def _put(self, job_id: str, key: Hashable, entries: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._items[job_id] = (key, entries)
+            self._items.move_to_end(job_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get_entries(self, job_id: str, output_dir: str) -> List[Dict[str, Any]]:
+        store = get_job_store()
+        state = None
+        try:
+            state = store.segment_state(job_id)
+        except Exception:
+            pass
+        if state and state[1] > 0:
+            key: Hashable = ("v", state[0])
+            entries = self._lookup(job_id, key)
+            if entries is None:
+                entries = _store_entries(store.get_segments(job_id))
+                if state[1] <= self.max_segments:
+                    self._put(job_id, key, entries)
+            return entries
+        srt_path = resolve_output(output_dir, job_id, "srt")
+        try:
+            key = ("m", os.stat(srt_path).st_mtime_ns)
+        except OSError:
+            return []
+        entries = self._lookup(job_id, key)
+        if entries is None:
+            entries = parse_srt_file(srt_path)
+            self._put(job_id, key, entries)
+        return entries
+
+    def iter_entries(self, job_id: str, output_dir: str) -> Iterator[Dict[str, Any]]:
+        """
+        스트리밍 내보내기용. 캐시에 있거나 작은 작업은 get_entries 목록을, 긴 작업은
+        저장소/SRT에서 배치 단위로 읽어 메모리를 일정하게 유지한다.
+        """
+        store = get_job_store()
+        state = None
+        try:
+            state = store.segment_state(job_id)
+        except Exception:
+            pass
+        if state and state[1] > self.max_segments:
+            cached = self._lookup(job_id, ("v", state[0]))
+            if cached is not None:
+                return iter(cached)
+            return (_store_entry(r) for r in store.iter_segments(job_id))
+        if not (state and state[1] > 0):
+            srt_path = resolve_output(output_dir, job_id, "srt")
+            try:
+                if os.path.getsize(srt_path) > self.max_segments * 100:
+                    return iter_srt_file(srt_path)
+            except OSError:
+                return iter(())
+        return iter(self.get_entries(job_id, output_dir))
+
+    def invalidate(self, job_id: str) -> None:
+        with self._lock:
+            self._items.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._items), "max_entries": self.max_entries, **self._stats}
+
+
+_cache: Optional[SegmentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_segment_cache() -> SegmentCache:
+    """프로세스 전역 구간 캐시. SEGMENT_CACHE_SIZE(작업 수, 기본 64), SEGMENT_CACHE_MAX_SEGMENTS(작업당 상한, 기본 20000)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    size = int(os.getenv("SEGMENT_CACHE_SIZE", "64"))
+                except Exception:
+                    size = 64
+                try:
+                    max_segments = int(os.getenv("SEGMENT_CACHE_MAX_SEGMENTS", "20000"))
+                except Exception:
+                    max_segments = 20000
+                _cache = SegmentCache(size, max_segments)
+    return _cache
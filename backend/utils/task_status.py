@@ -0,0 +1,79 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from celery_app import celery_app
+
+
+def meta_status_payload(meta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """결과 백엔드 메타(dict) → /status/{task_id}와 같은 모양의 응답 (메타 없음 = PENDING)."""
+    if not meta:
+        return {"state": "PENDING", "progress": 0}
+    state = meta.get("status") or "PENDING"
+    result = meta.get("result")
+    if state == "PENDING":
+        return {"state": state, "progress": 0}
+    if state == "PROGRESS":
+        info = result if isinstance(result, dict) else {}
+        return {"state": state, "progress": info.get("progress", 0)}
+    if state == "SUCCESS":
+        return {"state": state, "result": result}
+    # 실패: 예외는 {"exc_type", "exc_message", ...}로 직렬화되어 있음
+    if isinstance(result, dict) and "exc_type" in result:
+        message = result.get("exc_message")
+        if isinstance(message, (list, tuple)):
+            message = " ".join(str(m) for m in message)
+        return {"state": state, "error": str(message)}
+    return {"state": state, "error": str(result)}
+
+
+def fetch_task_payloads(task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 태스크 상태를 Redis 결과 백엔드에서 파이프라인 GET 한 번(왕복 1회)으로 조회.
+    Redis 백엔드가 아니면 AsyncResult 개별 조회로 대체.
+    """
+    ids = list(dict.fromkeys(t for t in task_ids if t))
+    if not ids:
+        return {}
+    backend = celery_app.backend
+    try:
+        pipe = backend.client.pipeline(transaction=False)
+        for tid in ids:
+            pipe.get(backend.get_key_for_task(tid))
+        raws = pipe.execute()
+        return {
+            tid: meta_status_payload(backend.decode_result(raw) if raw else None)
+            for tid, raw in zip(ids, raws)
+        }
+    except Exception:
+        pass
+    payloads = {}
+    for tid in ids:
+        task = celery_app.AsyncResult(tid)
+        payloads[tid] = meta_status_payload({"status": task.state, "result": task.info})
+    return payloads
+
+
+def payload_etag(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def bulk_status(task_ids: List[str], known: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    known: {task_id: 직전에 받은 etag}. etag가 같은 항목은 본문에서 빼고 unchanged에만 나열해
+    변하지 않은 작업은 상태 전송 비용이 없도록 한다. 응답 전체 etag는 조건부 요청(If-None-Match)용.
+    """
+    known = known or {}
+    payloads = fetch_task_payloads(task_ids)
+    tasks: Dict[str, Any] = {}
+    unchanged: List[str] = []
+    etags: Dict[str, str] = {}
+    for tid, payload in payloads.items():
+        tag = payload_etag(payload)
+        etags[tid] = tag
+        if known.get(tid) == tag:
+            unchanged.append(tid)
+        else:
+            tasks[tid] = {**payload, "etag": tag}
+    return {"tasks": tasks, "unchanged": unchanged, "etag": payload_etag(etags)}
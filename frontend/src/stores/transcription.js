@@ -1,6 +1,12 @@
 import { defineStore } from 'pinia'
 import axios from 'axios'
 
+// 진행 중인 작업의 SSE 연결 (상태에 넣지 않고 모듈 단위로 보관)
+let progressSource = null
+// 재개 가능한 업로드 청크 크기/연속 실패 허용 횟수
+const UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+const UPLOAD_MAX_RETRIES = 5
+
 export const useTranscriptionStore = defineStore('transcription', {
   state: () => ({
     selectedFile: null,
@@ -11,6 +17,8 @@ export const useTranscriptionStore = defineStore('transcription', {
     progress: 0,
     statusMessage: '',
     transcriptionResult: null,
+    // 전사 중 실시간으로 받은 구간 (SSE)
+    liveSegments: [],
     error: null,
     history: [],
     enableDiarization: false,
@@ -26,6 +34,8 @@ export const useTranscriptionStore = defineStore('transcription', {
     linkFetchTaskId: null,
     linkFetchProgress: 0,
     linkFetching: false,
+    // 재생목록/채널 수집 진행 상태: { batchId, title, total, counts, progress, done }
+    playlistIngest: null,
     // 링크로 가져온 항목 선택 상태
     selectedRemote: null, // { jobId, title, sizeBytes }
     // URL 리스너 1회 등록용
@@ -111,6 +121,40 @@ export const useTranscriptionStore = defineStore('transcription', {
     getAudioDownloadUrl(jobId) {
       return `/api/export/audio/${jobId}`
     },
+    // 여러 작업 × 여러 형식을 한 번의 요청(스트리밍 ZIP)으로 다운로드
+    // 폼 제출로 브라우저가 직접 내려받게 함 (수백 개 작업 ZIP도 메모리에 Blob으로 모으지 않음)
+    async downloadBundle(jobIds, formats, { ts = false, spk = false } = {}) {
+      const ids = (jobIds || []).filter((id) => String(id || '').trim())
+      if (!ids.length || !(formats || []).length) return
+      const form = document.createElement('form')
+      form.method = 'POST'
+      form.action = '/api/export/bundle'
+      // 오류 응답이 와도 현재 페이지를 벗어나지 않도록 숨은 iframe으로 제출
+      const frameName = `bundle-download-${Date.now()}`
+      const frame = document.createElement('iframe')
+      frame.name = frameName
+      frame.style.display = 'none'
+      form.target = frameName
+      const fields = [
+        ...ids.map((id) => ['job_ids', id]),
+        ...formats.map((fmt) => ['formats', fmt]),
+        ['ts', ts ? '1' : '0'],
+        ['spk', spk ? '1' : '0'],
+      ]
+      for (const [name, value] of fields) {
+        const input = document.createElement('input')
+        input.type = 'hidden'
+        input.name = name
+        input.value = String(value)
+        form.appendChild(input)
+      }
+      document.body.appendChild(frame)
+      document.body.appendChild(form)
+      form.submit()
+      document.body.removeChild(form)
+      // 다운로드가 시작될 시간을 두고 iframe 정리
+      setTimeout(() => frame.remove(), 60000)
+    },
     // 오디오 재생 상태 보고/제어
     reportAudioTime(sec) {
       this.audioCurrentTime = Number.isFinite(sec) ? sec : 0
@@ -264,6 +308,45 @@ export const useTranscriptionStore = defineStore('transcription', {
         this.error = e?.response?.data?.detail || '링크 요청 실패'
       }
     },
+    // 재생목록/채널 전체 수집: 서버가 항목을 펼쳐 다운로드가 끝나는 대로 전사하며, 묶음 진행률만 폴링
+    async ingestPlaylist(url) {
+      this.error = null
+      try {
+        const payload = new URLSearchParams()
+        payload.append('url', url)
+        payload.append('language', this.selectedLanguage)
+        payload.append('model', this.resolveModelSize())
+        if (this.enableDiarization) payload.append('diarize', 'true')
+        const { data } = await axios.post('/api/ingest/playlist', payload, {
+          headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        })
+        this.playlistIngest = { batchId: data.batch_id, title: null, total: 0, counts: {}, progress: 0, done: false }
+        const poll = setInterval(async () => {
+          try {
+            const res = await axios.get(`/api/batch/${data.batch_id}`)
+            const { ingest, total, counts, progress, done } = res.data
+            this.playlistIngest = {
+              batchId: data.batch_id,
+              title: ingest?.title || null,
+              total: ingest?.entry_count || total,
+              counts: counts || {},
+              progress: progress || 0,
+              done: !!done,
+            }
+            if (done) {
+              clearInterval(poll)
+              if (ingest?.status === 'failed') this.error = ingest.error || '재생목록 가져오기 실패'
+              this.statusMessage = `재생목록 전사 완료 (${counts?.SUCCESS || 0}/${total})`
+            }
+          } catch (e) {
+            clearInterval(poll)
+            this.error = '재생목록 상태 확인 실패'
+          }
+        }, 2000)
+      } catch (e) {
+        this.error = e?.response?.data?.detail || '재생목록 요청 실패'
+      }
+    },
     // 결과 열기(지속성 + URL)
     openResult(item) {
       this.transcriptionResult = item?.result || null
@@ -322,6 +405,11 @@ export const useTranscriptionStore = defineStore('transcription', {
           const { data } = await axios.post('/api/transcribe-url-async', payload, {
             headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
           })
+          // 캐시 적중: 작업 없이 즉시 완료
+          if (data.status === 'completed' && data.result) {
+            this.completeTranscription(data.result)
+            return
+          }
           this.currentTaskId = data.task_id
           this.statusMessage = '작업이 시작되었습니다'
           this.pollTaskStatus()
@@ -381,16 +469,18 @@ export const useTranscriptionStore = defineStore('transcription', {
       this.transcriptionResult = null
       this.pendingCategoryIdForNewItem = this.selectedCategoryId
 
-      const formData = new FormData()
-      formData.append('file', this.selectedFile)
-      formData.append('language', this.selectedLanguage)
-      formData.append('model', this.resolveModelSize())
       try {
-        if (this.enableDiarization) formData.append('diarize', 'true')
-        const response = await axios.post('/api/transcribe-async', formData, {
-          headers: { 'Content-Type': 'multipart/form-data' },
+        // 청크 단위 재개 가능한 업로드: 끊겨도 받은 지점부터 이어서 전송
+        const data = await this.uploadResumable(this.selectedFile, {
+          language: this.selectedLanguage,
+          model: this.resolveModelSize(),
+          diarize: this.enableDiarization ? 'true' : '',
         })
-        this.currentTaskId = response.data.task_id
+        if (data.status === 'completed' && data.result) {
+          this.completeTranscription(data.result)
+          return
+        }
+        this.currentTaskId = data.task_id
         this.statusMessage = '작업이 시작되었습니다'
         this.pollTaskStatus()
       } catch (err) {
@@ -398,6 +488,54 @@ export const useTranscriptionStore = defineStore('transcription', {
         this.isProcessing = false
       }
     },
+    // tus 방식 업로드 (POST 생성 → PATCH 청크 전송, 실패 시 HEAD로 서버 오프셋 확인 후 재개)
+    async uploadResumable(file, meta) {
+      const encode = (v) => btoa(unescape(encodeURIComponent(String(v))))
+      const metadata = Object.entries({ filename: file.name, ...meta })
+        .filter(([, v]) => v !== undefined && v !== null && v !== '')
+        .map(([k, v]) => `${k} ${encode(v)}`)
+        .join(',')
+      const tus = { 'Tus-Resumable': '1.0.0' }
+      const { data } = await axios.post('/api/upload/resumable', null, {
+        headers: { ...tus, 'Upload-Length': String(file.size), 'Upload-Metadata': metadata },
+      })
+      const url = `/api/upload/resumable/${data.upload_id}`
+      let offset = 0
+      let failures = 0
+      while (true) {
+        const end = Math.min(offset + UPLOAD_CHUNK_SIZE, file.size)
+        try {
+          const res = await axios.patch(url, file.slice(offset, end), {
+            headers: { ...tus, 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+          })
+          if (res.status === 200) return res.data
+          const next = Number(res.headers['upload-offset'] ?? end)
+          // 성공 응답인데 오프셋이 그대로면 재시도 횟수에 포함 (같은 청크를 끝없이 보내지 않도록)
+          if (next > offset) failures = 0
+          else if (++failures > UPLOAD_MAX_RETRIES) throw new Error('업로드가 진행되지 않습니다')
+          offset = next
+          // 업로드 구간은 진행률 0~10%
+          this.progress = file.size ? Math.floor((offset / file.size) * 10) : 10
+          this.statusMessage = `업로드 중... ${Math.round((offset / (file.size || 1)) * 100)}%`
+        } catch (err) {
+          const status = err?.response?.status
+          // 이미 작업으로 넘어간 업로드(마지막 응답 유실 후 재시도): 본문의 작업 정보로 이어서 진행
+          if (status === 409 && err.response.data?.status) return err.response.data
+          // 오프셋 불일치(409)/서버 오류/네트워크 오류만 재시도
+          if ((status && status !== 409 && status < 500) || ++failures > UPLOAD_MAX_RETRIES) throw err
+          await new Promise((resolve) => setTimeout(resolve, 1000 * failures))
+          try {
+            const head = await axios.head(url, { headers: tus })
+            offset = Number(head.headers['upload-offset'] || 0)
+            const taskId = head.headers['upload-task-id']
+            if (offset >= file.size && taskId) {
+              return { job_id: data.upload_id, task_id: taskId, status: head.headers['upload-job-status'] || 'processing' }
+            }
+            // 캐시로 바로 완료됐거나 작업 등록이 실패한 경우: 같은 오프셋의 빈 PATCH가 결과(409)/재등록(200)을 받는다
+          } catch {}
+        }
+      }
+    },
     resolveModelSize() {
       const map = {
         cheetah: 'tiny',     // 가장 빠름
@@ -406,7 +544,73 @@ export const useTranscriptionStore = defineStore('transcription', {
       }
       return map[this.selectedModel] || 'base'
     },
-    async pollTaskStatus() {
+    // 전사 완료 처리 (폴링 완료/캐시 즉시 완료 공통)
+    completeTranscription(result) {
+      this.progress = 100
+      this.transcriptionResult = result
+      this.statusMessage = '전사 완료!'
+      this.isProcessing = false
+      this.addToHistory(result, this.pendingCategoryIdForNewItem)
+      // 완료 후 이전 파일 선택 초기화
+      this.selectedFile = null
+      try { localStorage.setItem('transcriptionOpenResultId', String(result.job_id)) } catch {}
+      this.setUrlState({ job: result.job_id })
+      this.pendingCategoryIdForNewItem = null
+    },
+    // 진행 상황 구독: SSE 우선, 연결 실패 시 기존 2초 폴링으로 폴백
+    pollTaskStatus() {
+      this.liveSegments = []
+      if (typeof EventSource === 'undefined') {
+        this.pollTaskStatusInterval()
+        return
+      }
+      const taskId = this.currentTaskId
+      if (progressSource) progressSource.close()
+      const source = new EventSource(`/api/events/${taskId}`)
+      progressSource = source
+      let finished = false
+      source.addEventListener('progress', (e) => {
+        try {
+          const data = JSON.parse(e.data)
+          this.progress = data.progress || 0
+          const position = data.total_sec
+            ? ` (${Math.round(data.decoded_sec)}/${Math.round(data.total_sec)}초)`
+            : ''
+          // 스트리밍 URL 모드: 다운로드 진행률도 함께 표시
+          const download = data.download_pct != null && data.download_pct < 100 ? ` · 다운로드 ${data.download_pct}%` : ''
+          this.statusMessage = `처리 중... ${this.progress}%${position}${download}`
+        } catch {}
+      })
+      source.addEventListener('segment', (e) => {
+        try {
+          const { segment } = JSON.parse(e.data)
+          if (segment && !this.liveSegments.some((s) => s.id === segment.id)) this.liveSegments.push(segment)
+        } catch {}
+      })
+      source.addEventListener('done', (e) => {
+        finished = true
+        source.close()
+        try {
+          const { state, result, error } = JSON.parse(e.data)
+          if (state === 'SUCCESS') {
+            this.completeTranscription(result)
+          } else if (state === 'FAILURE') {
+            this.error = error || '전사 실패'
+            this.isProcessing = false
+          } else {
+            this.pollTaskStatusInterval()
+          }
+        } catch {
+          this.pollTaskStatusInterval()
+        }
+      })
+      source.onerror = () => {
+        if (finished) return
+        source.close()
+        if (this.currentTaskId === taskId && this.isProcessing) this.pollTaskStatusInterval()
+      }
+    },
+    async pollTaskStatusInterval() {
       const poll = setInterval(async () => {
         try {
           const response = await axios.get(`/api/status/${this.currentTaskId}`)
@@ -416,16 +620,7 @@ export const useTranscriptionStore = defineStore('transcription', {
             this.statusMessage = `처리 중... ${this.progress}%`
           } else if (state === 'SUCCESS') {
             clearInterval(poll)
-            this.progress = 100
-            this.transcriptionResult = result
-            this.statusMessage = '전사 완료!'
-            this.isProcessing = false
-            this.addToHistory(result, this.pendingCategoryIdForNewItem)
-            // 완료 후 이전 파일 선택 초기화
-            this.selectedFile = null
-            try { localStorage.setItem('transcriptionOpenResultId', String(result.job_id)) } catch {}
-            this.setUrlState({ job: result.job_id })
-            this.pendingCategoryIdForNewItem = null
+            this.completeTranscription(result)
           } else if (state === 'FAILURE') {
             clearInterval(poll)
             this.error = error || '전사 실패'
@@ -586,6 +781,11 @@ export const useTranscriptionStore = defineStore('transcription', {
       }
     },
     reset() {
+      if (progressSource) {
+        progressSource.close()
+        progressSource = null
+      }
+      this.liveSegments = []
       this.selectedFile = null
       this.selectedRemote = null
       this.isProcessing = false